@@ -2,4 +2,4 @@
 set -euo pipefail
 
 ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
-python3 "$ROOT_DIR/scripts/add_okrplan_score_field.py"
+python3 ${OKR_PROFILE:+"$ROOT_DIR/scripts/profile_run.py"} "$ROOT_DIR/scripts/add_okrplan_score_field.py"
@@ -0,0 +1,146 @@
+"""Adaptive (AIMD) concurrency for bulk Bitable writes.
+
+Batches are sent from a thread pool, but the number in flight is set by an
+AdaptiveLimiter instead of a fixed worker count:
+
+    additive increase        +1 slot per window of healthy responses
+                             (latency within LATENCY_TOLERANCE x the best seen)
+    multiplicative decrease  x0.5 on throttling (HTTP 429 / frequency-limit
+                             codes) or timeouts, at most once per cooldown;
+                             x0.9 when latency drifts above the target
+
+Throttled batches are retried with jittered backoff. Timed-out batches are
+retried too, unless the caller passes retry_timeouts=False: a batch_create that
+timed out may already have been applied, and sending it again duplicates rows.
+The starting and maximum window come from FEISHU_WRITE_CONCURRENCY (default 8);
+HTTP_TIMEOUT (FEISHU_HTTP_TIMEOUT, default 30s) is the urlopen timeout the
+calling scripts use, so a hung request surfaces as a timeout at all.
+
+Usage from a script in scripts/:
+    from aimd_limiter import run_adaptive
+    results, report = run_adaptive(chunks, send_chunk, retry_timeouts=op != "batch_create")
+    print(report)
+"""
+
+import os
+import random
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import URLError
+
+DEFAULT_MAX_CONCURRENCY = int(os.environ.get("FEISHU_WRITE_CONCURRENCY", "8"))
+HTTP_TIMEOUT = float(os.environ.get("FEISHU_HTTP_TIMEOUT", "30"))
+LATENCY_TOLERANCE = 2.0
+DECREASE_FACTOR = 0.5
+SLOW_FACTOR = 0.9
+MAX_RETRIES = 6
+BACKOFF_BASE = 0.5
+# Feishu frequency-limit codes (gateway and Bitable).
+THROTTLE_CODES = {99991400, 1254290, 1254291, 1254607}
+
+
+def classify(resp=None, exc=None):
+    """Return "ok", "error", "throttle" or "timeout" for a response dict or an exception."""
+    if exc is not None:
+        text = str(exc)
+        if isinstance(exc, (socket.timeout, TimeoutError)) or "timed out" in text:
+            return "timeout"
+        if "HTTP 429" in text or any(str(code) in text for code in THROTTLE_CODES):
+            return "throttle"
+        if isinstance(exc, URLError):
+            return "timeout"
+        return "error"
+    code = (resp or {}).get("code")
+    if code in THROTTLE_CODES:
+        return "throttle"
+    return "ok" if code in (0, None) else "error"
+
+
+class AdaptiveLimiter:
+    def __init__(self, max_limit=DEFAULT_MAX_CONCURRENCY, min_limit=1, initial=2):
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.in_flight = 0
+        self.best_latency = None
+        self.cooldown_until = 0.0
+        self.cond = threading.Condition()
+        self.stats = {"sent": 0, "ok": 0, "error": 0, "throttle": 0, "timeout": 0, "decreases": 0}
+        self.limit_samples = []
+
+    def acquire(self):
+        with self.cond:
+            while self.in_flight >= int(self.limit):
+                self.cond.wait()
+            self.in_flight += 1
+            self.stats["sent"] += 1
+
+    def release(self, outcome, latency):
+        with self.cond:
+            self.in_flight -= 1
+            self.stats[outcome] += 1
+            now = time.monotonic()
+            if outcome in ("throttle", "timeout"):
+                # One cut per cooldown: every batch in the same burst reports the same congestion.
+                if now >= self.cooldown_until:
+                    self.limit = max(self.min_limit, self.limit * DECREASE_FACTOR)
+                    self.cooldown_until = now + (self.best_latency or 0.1) * 4
+                    self.stats["decreases"] += 1
+            elif outcome == "ok":
+                if self.best_latency is None or latency < self.best_latency:
+                    self.best_latency = latency
+                if latency <= self.best_latency * LATENCY_TOLERANCE:
+                    self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+                elif now >= self.cooldown_until:
+                    self.limit = max(self.min_limit, self.limit * SLOW_FACTOR)
+            self.limit_samples.append(self.limit)
+            self.cond.notify_all()
+
+
+def run_adaptive(chunks, send, max_concurrency=None, item_count=len, retry_timeouts=True):
+    """Send every chunk with send(chunk) -> response dict; returns (responses in order, report line).
+
+    A chunk that is still throttled after MAX_RETRIES gets its last response (or
+    {"code": -1, "msg": ...} after an exception) so callers can report it. With
+    retry_timeouts=False (non-idempotent ops such as batch_create) a timeout or
+    connection error still slows the window down but fails the chunk at once.
+    """
+    limiter = AdaptiveLimiter(max_concurrency or DEFAULT_MAX_CONCURRENCY)
+    results = [None] * len(chunks)
+    started = time.monotonic()
+
+    def worker(index):
+        chunk = chunks[index]
+        for attempt in range(MAX_RETRIES + 1):
+            limiter.acquire()
+            sent_at = time.monotonic()
+            resp, exc = None, None
+            try:
+                resp = send(chunk)
+            except Exception as err:  # classified below; the last one is surfaced to the caller
+                exc = err
+            outcome = classify(resp, exc)
+            limiter.release(outcome, time.monotonic() - sent_at)
+            if outcome == "timeout" and not retry_timeouts:
+                results[index] = {"code": -1, "msg": f"not retried, may have been applied: {exc}"}
+                return
+            if outcome in ("ok", "error") or attempt == MAX_RETRIES:
+                results[index] = resp if resp is not None else {"code": -1, "msg": str(exc)}
+                return
+            time.sleep(BACKOFF_BASE * (2 ** attempt) * random.uniform(0.5, 1.0))
+
+    with ThreadPoolExecutor(max_workers=limiter.max_limit) as pool:
+        list(pool.map(worker, range(len(chunks))))
+
+    elapsed = time.monotonic() - started
+    items = sum(item_count(chunk) for chunk in chunks)
+    stats = limiter.stats
+    mean_limit = sum(limiter.limit_samples) / len(limiter.limit_samples) if limiter.limit_samples else limiter.limit
+    report = (
+        f"{len(chunks)} batches / {items} records in {elapsed:.1f}s "
+        f"({items / elapsed if elapsed else 0:.0f} rec/s); window avg {mean_limit:.1f}, final {limiter.limit:.1f}, "
+        f"max {limiter.max_limit}; {stats['throttle']} throttled, {stats['timeout']} timeouts, {stats['error']} errors"
+    )
+    return results, report
@@ -0,0 +1,141 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+api_base = os.environ.get("FEISHU_API_BASE", "https://open.feishu.cn")
+app_id = os.environ.get("FEISHU_APP_ID")
+app_secret = os.environ.get("FEISHU_APP_SECRET")
+app_token = os.environ.get("FEISHU_BASE_APP_TOKEN")
+
+if not (app_id and app_secret and app_token):
+    print("Missing env vars: FEISHU_APP_ID/FEISHU_APP_SECRET/FEISHU_BASE_APP_TOKEN")
+    sys.exit(1)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKUP_ROOT = os.path.join(ROOT_DIR, "generated", "backups")
+
+
+def http_json(method, url, data=None, token=None):
+    body = None
+    headers = {"Content-Type": "application/json; charset=utf-8"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if data is not None:
+        body = json.dumps(data).encode("utf-8")
+    req = Request(url, data=body, headers=headers, method=method)
+    try:
+        with urlopen(req) as resp:
+            raw = resp.read().decode("utf-8")
+            return json.loads(raw)
+    except HTTPError as exc:
+        body = exc.read().decode("utf-8")
+        raise RuntimeError(f"HTTP {exc.code}: {body}") from exc
+
+
+def get_tenant_token():
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/auth/v3/tenant_access_token/internal",
+        {"app_id": app_id, "app_secret": app_secret},
+    )
+    token = resp.get("tenant_access_token")
+    if not token:
+        print("Failed to get tenant access token", resp)
+        sys.exit(1)
+    return token
+
+
+def get_tables(token):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables?page_size=100",
+        None,
+        token,
+    )
+    items = resp.get("data", {}).get("items", [])
+    return {item.get("name"): item.get("table_id") for item in items}
+
+
+def get_fields(token, table_id):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/fields?page_size=200",
+        None,
+        token,
+    )
+    return resp.get("data", {}).get("items", [])
+
+
+def iter_pages(token, table_id, page_size=500):
+    page_token = ""
+    while True:
+        url = f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records?page_size={page_size}"
+        if page_token:
+            url += f"&page_token={page_token}"
+        resp = http_json("GET", url, None, token)
+        data = resp.get("data") or {}
+        yield data.get("items") or []
+        page_token = data.get("page_token")
+        if not data.get("has_more") or not page_token:
+            break
+
+
+def backup_table(token, name, table_id, out_dir):
+    started = time.monotonic()
+    path = os.path.join(out_dir, f"{name}.ndjson")
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        schema = {"type": "schema", "name": name, "table_id": table_id, "fields": get_fields(token, table_id)}
+        f.write(json.dumps(schema, ensure_ascii=False) + "\n")
+        # One page in memory at a time; each page is flushed before the next request.
+        for items in iter_pages(token, table_id):
+            for item in items:
+                line = {"type": "record", "record_id": item.get("record_id"), "fields": item.get("fields") or {}}
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+            count += len(items)
+            f.flush()
+    return {"name": name, "table_id": table_id, "file": os.path.basename(path), "records": count,
+            "seconds": round(time.monotonic() - started, 3)}
+
+
+parser = argparse.ArgumentParser(description="Back up every table of the Base to NDJSON.")
+parser.add_argument("--out", help="Backup directory (default generated/backups/<timestamp>)")
+parser.add_argument("--tables", default="", help="Only back up these tables (comma-separated)")
+parser.add_argument("--workers", type=int, default=4, help="Tables exported in parallel")
+args = parser.parse_args()
+
+TOKEN = get_tenant_token()
+TABLES = get_tables(TOKEN)
+wanted = [t.strip() for t in args.tables.split(",") if t.strip()]
+selected = {name: tid for name, tid in TABLES.items() if not wanted or name in wanted}
+for name in wanted:
+    if name not in TABLES:
+        print(f"Table not found: {name}")
+
+out_dir = args.out or os.path.join(BACKUP_ROOT, datetime.now().strftime("%Y%m%d-%H%M%S"))
+os.makedirs(out_dir, exist_ok=True)
+
+started = time.monotonic()
+with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+    futures = [pool.submit(backup_table, TOKEN, name, tid, out_dir) for name, tid in selected.items()]
+    results = [future.result() for future in futures]
+
+for result in results:
+    print(f"- {result['name']}: {result['records']} records in {result['seconds']:.1f}s")
+
+manifest = {
+    "app_token": app_token,
+    "created_at": datetime.now().isoformat(timespec="seconds"),
+    "tables": results,
+}
+with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+    json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+total = sum(r["records"] for r in results)
+print(f"Backed up {len(results)} tables / {total} records in {time.monotonic() - started:.1f}s -> {out_dir}")
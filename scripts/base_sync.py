@@ -0,0 +1,555 @@
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from aimd_limiter import HTTP_TIMEOUT, run_adaptive
+
+api_base = os.environ.get("FEISHU_API_BASE", "https://open.feishu.cn")
+app_id = os.environ.get("FEISHU_APP_ID")
+app_secret = os.environ.get("FEISHU_APP_SECRET")
+app_token = os.environ.get("FEISHU_BASE_APP_TOKEN")
+
+if not (app_id and app_secret and app_token):
+    print("Missing env vars: FEISHU_APP_ID/FEISHU_APP_SECRET/FEISHU_BASE_APP_TOKEN")
+    sys.exit(1)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PLAN = os.path.join(ROOT_DIR, "generated", "base_sync_plan.json")
+BATCH_SIZE = 500
+LINK_TYPES = {18, 21}
+# Fields whose definition references other tables/fields; created after plain fields.
+DEFERRED_TYPES = {18, 19, 20, 21}
+# Values Bitable computes itself; never written back.
+READ_ONLY_TYPES = {19, 20, 1001, 1002, 1003, 1004, 1005}
+# Attachments are tokens scoped to the source Base and cannot be copied by value.
+SKIPPED_VALUE_TYPES = {17}
+# Property keys that are ids of the Base itself or of things re-created by Bitable.
+VOLATILE_PROPERTY_KEYS = {"back_field_id"}
+
+
+def http_json(method, url, data=None, token=None):
+    body = None
+    headers = {"Content-Type": "application/json; charset=utf-8"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if data is not None:
+        body = json.dumps(data).encode("utf-8")
+    req = Request(url, data=body, headers=headers, method=method)
+    try:
+        with urlopen(req, timeout=HTTP_TIMEOUT) as resp:
+            raw = resp.read().decode("utf-8")
+            return json.loads(raw)
+    except HTTPError as exc:
+        body = exc.read().decode("utf-8")
+        raise RuntimeError(f"HTTP {exc.code}: {body}") from exc
+
+
+def get_tenant_token():
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/auth/v3/tenant_access_token/internal",
+        {"app_id": app_id, "app_secret": app_secret},
+    )
+    token = resp.get("tenant_access_token")
+    if not token:
+        print("Failed to get tenant access token", resp)
+        sys.exit(1)
+    return token
+
+
+def get_tables(token, base):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{base}/tables?page_size=100",
+        None,
+        token,
+    )
+    items = resp.get("data", {}).get("items", [])
+    return {item.get("name"): item.get("table_id") for item in items}
+
+
+def get_fields(token, base, table_id):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{base}/tables/{table_id}/fields?page_size=200",
+        None,
+        token,
+    )
+    return resp.get("data", {}).get("items", [])
+
+
+def iter_records(token, base, table_id, page_size=500):
+    page_token = ""
+    while True:
+        url = f"{api_base}/open-apis/bitable/v1/apps/{base}/tables/{table_id}/records?page_size={page_size}"
+        if page_token:
+            url += f"&page_token={page_token}"
+        resp = http_json("GET", url, None, token)
+        data = resp.get("data") or {}
+        for item in data.get("items") or []:
+            yield item
+        page_token = data.get("page_token")
+        if not data.get("has_more") or not page_token:
+            break
+
+
+def create_table(token, base, name, fields):
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/bitable/v1/apps/{base}/tables",
+        {"table": {"name": name, "fields": fields}},
+        token,
+    )
+    table_id = (resp.get("data") or {}).get("table_id")
+    if not table_id:
+        print(f"Failed to create table {name}: {resp}")
+    return table_id
+
+
+def field_request(token, method, base, table_id, field_id, config, label):
+    url = f"{api_base}/open-apis/bitable/v1/apps/{base}/tables/{table_id}/fields"
+    if field_id:
+        url += f"/{field_id}"
+    try:
+        resp = http_json(method, url, config, token)
+    except RuntimeError as exc:
+        print(f"Failed to {label}: {exc}")
+        return False
+    if resp.get("code") not in (0, None):
+        print(f"Failed to {label}: {resp}")
+        return False
+    return True
+
+
+def delete_table(token, base, table_id, name):
+    resp = http_json("DELETE", f"{api_base}/open-apis/bitable/v1/apps/{base}/tables/{table_id}", None, token)
+    if resp.get("code") not in (0, None):
+        print(f"Failed to delete table {name}: {resp}")
+        return False
+    return True
+
+
+def batch_write(token, base, table_id, op, items):
+    """Run batch_create/batch_update/batch_delete in chunks; return the API records."""
+    chunks = [items[i:i + BATCH_SIZE] for i in range(0, len(items), BATCH_SIZE)]
+    if not chunks:
+        return []
+
+    def send(chunk):
+        return http_json(
+            "POST",
+            f"{api_base}/open-apis/bitable/v1/apps/{base}/tables/{table_id}/records/{op}",
+            {"records": chunk},
+            token,
+        )
+
+    responses, report = run_adaptive(chunks, send, retry_timeouts=op != "batch_create")
+    print(f"  {op}: {report}")
+    results = []
+    for chunk, resp in zip(chunks, responses):
+        if resp.get("code") not in (0, None):
+            print(f"Failed to {op} {len(chunk)} records: {resp}")
+            results.extend([None] * len(chunk))
+            continue
+        results.extend((resp.get("data") or {}).get("records") or [{}] * len(chunk))
+    return results
+
+
+def to_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float, bool)):
+        return str(value)
+    if isinstance(value, list):
+        return "".join(to_text(v) for v in value)
+    if isinstance(value, dict):
+        return str(value.get("text") or value.get("name") or "")
+    return str(value)
+
+
+def to_link_ids(value):
+    if isinstance(value, list):
+        ids = []
+        for item in value:
+            if isinstance(item, str):
+                ids.append(item)
+            elif isinstance(item, dict):
+                ids.extend(item.get("record_ids") or [])
+        return ids
+    if isinstance(value, dict):
+        return value.get("link_record_ids") or value.get("record_ids") or []
+    return []
+
+
+def writable_value(field_type, value):
+    """Convert a value as returned by the list API into what the write API accepts."""
+    if value in (None, "", []):
+        return None
+    if field_type == 1:
+        return to_text(value) or None
+    if field_type == 11 and isinstance(value, list):
+        return sorted(({"id": item.get("id")} for item in value if isinstance(item, dict) and item.get("id")),
+                      key=lambda item: item["id"]) or None
+    if field_type == 15 and isinstance(value, dict):
+        return {"link": value.get("link"), "text": value.get("text") or value.get("link")}
+    return value
+
+
+class Base:
+    """Schema of one Base with table/field ids swapped for @{Table} / @{Table.Field} names.
+
+    The symbolic form makes link targets, lookups and formula expressions comparable
+    across Bases, and is turned back into ids of the target when applying.
+    """
+
+    def __init__(self, token, base, only_tables=None):
+        self.base = base
+        all_tables = get_tables(token, base)
+        # Every table gets a symbol, so links into tables outside --tables still compare by name.
+        self.to_symbol = {tid: f"@{{{name}}}" for name, tid in all_tables.items()}
+        self.table_ids = {name: tid for name, tid in all_tables.items() if not only_tables or name in only_tables}
+        self.fields = {}
+        for name, tid in self.table_ids.items():
+            self.refresh_table(token, name, tid)
+
+    def refresh_table(self, token, name, table_id):
+        self.table_ids[name] = table_id
+        self.fields[name] = get_fields(token, self.base, table_id)
+        self.to_symbol[table_id] = f"@{{{name}}}"
+        for field in self.fields[name]:
+            self.to_symbol[field.get("field_id")] = f"@{{{name}.{field.get('field_name')}}}"
+
+    def field(self, table, field_name):
+        return next((f for f in self.fields.get(table, []) if f.get("field_name") == field_name), None)
+
+    def symbolic(self, prop):
+        raw = json.dumps(prop or {}, ensure_ascii=False, sort_keys=True)
+        # Longest ids first so one id that prefixes another is never half-replaced.
+        for known in sorted(self.to_symbol, key=len, reverse=True):
+            if known:
+                raw = raw.replace(known, self.to_symbol[known])
+        return json.loads(raw)
+
+    def concrete(self, prop):
+        raw = json.dumps(prop, ensure_ascii=False)
+        by_symbol = {symbol: known for known, symbol in self.to_symbol.items()}
+        raw = re.sub(r"@\{[^{}]+\}", lambda m: by_symbol.get(m.group(0), m.group(0)), raw)
+        return json.loads(raw)
+
+
+def field_level(field):
+    """0 plain, 1 link, 2 lookup/formula: the order fields can be created in."""
+    if field.get("type") in LINK_TYPES:
+        return 1
+    return 2 if field.get("type") in DEFERRED_TYPES else 0
+
+
+def field_fingerprint(base, field):
+    """Comparable definition of a field: type plus its symbolic, id-free property."""
+    prop = base.symbolic(field.get("property"))
+    for key in VOLATILE_PROPERTY_KEYS:
+        prop.pop(key, None)
+    if prop.get("options"):
+        prop["options"] = [opt.get("name") for opt in prop["options"]]
+    return {"type": field.get("type"), "property": prop or None}
+
+
+def field_config(source, target, field, existing=None):
+    """Create/update payload for the target; existing option ids are kept so cell values survive."""
+    config = {"field_name": field.get("field_name"), "type": field.get("type")}
+    prop = source.symbolic(field.get("property"))
+    for key in VOLATILE_PROPERTY_KEYS:
+        prop.pop(key, None)
+    if prop.get("options"):
+        kept = {opt.get("name"): opt.get("id") for opt in ((existing or {}).get("property") or {}).get("options") or []}
+        options = []
+        for opt in prop["options"]:
+            opt = {k: v for k, v in opt.items() if k != "id"}
+            if kept.get(opt.get("name")):
+                opt["id"] = kept[opt["name"]]
+            options.append(opt)
+        prop["options"] = options
+    if prop:
+        config["property"] = target.concrete(prop)
+    return config
+
+
+def diff_schema(source, target, prune):
+    """Ordered schema operations that make target's tables/fields match source."""
+    ops = []
+    for name, fields in source.fields.items():
+        if name not in target.table_ids:
+            primary_first = sorted(fields, key=lambda f: not f.get("is_primary"))
+            plain = [f for f in primary_first if f.get("type") not in DEFERRED_TYPES]
+            ops.append({"op": "create_table", "table": name, "fields": [f.get("field_name") for f in plain]})
+            deferred = [f for f in primary_first if f.get("type") in DEFERRED_TYPES]
+        else:
+            plain, deferred = [], []
+            for field in fields:
+                current = target.field(name, field.get("field_name"))
+                if current is None:
+                    (deferred if field.get("type") in DEFERRED_TYPES else plain).append(field)
+                elif field_fingerprint(source, field) != field_fingerprint(target, current):
+                    ops.append({"op": "update_field", "table": name, "field": field.get("field_name"),
+                                "from": field_fingerprint(target, current), "to": field_fingerprint(source, field),
+                                "level": field_level(field)})
+            for field in plain:
+                ops.append({"op": "create_field", "table": name, "field": field.get("field_name"), "level": 0})
+        for field in deferred:
+            ops.append({"op": "create_field", "table": name, "field": field.get("field_name"), "level": field_level(field)})
+    if prune:
+        for name, fields in target.fields.items():
+            if name not in source.table_ids:
+                continue
+            # Computed fields first so nothing still refers to a link or plain field being removed.
+            extra = [f for f in fields if source.field(name, f.get("field_name")) is None and not f.get("is_primary")]
+            for field in sorted(extra, key=lambda f: (f.get("type") not in {19, 20}, f.get("type") not in LINK_TYPES)):
+                ops.append({"op": "delete_field", "table": name, "field": field.get("field_name")})
+        for name in target.table_ids:
+            if name not in source.table_ids:
+                ops.append({"op": "delete_table", "table": name})
+    return ops
+
+
+def apply_schema(token, source, target, ops):
+    done = 0
+    created_backs = set()
+    # Tables, then plain fields, links and finally lookups/formulas, so references resolve; deletes last.
+    ordered = sorted(ops, key=lambda o: (o["op"] in ("delete_field", "delete_table"), o.get("level", 0)))
+    for op in ordered:
+        name = op["table"]
+        if op["op"] != "create_table" and name not in target.table_ids:
+            print(f"Failed to {op['op']} {name}.{op.get('field')}: table missing in target")
+            continue
+        if op["op"] == "create_table":
+            plain = [field_config(source, target, source.field(name, f)) for f in op["fields"]]
+            table_id = create_table(token, target.base, name, plain)
+            if not table_id:
+                continue
+            target.refresh_table(token, name, table_id)
+        elif op["op"] == "create_field":
+            if (name, op["field"]) in created_backs or target.field(name, op["field"]):
+                continue
+            field = source.field(name, op["field"])
+            config = field_config(source, target, field)
+            if not field_request(token, "POST", target.base, target.table_ids[name], None, config,
+                                 f"create field {name}.{op['field']}"):
+                continue
+            prop = field.get("property") or {}
+            if field.get("type") == 21 and prop.get("back_field_name"):
+                # Creating one side of a two-way link also creates its back field.
+                created_backs.add((source.symbolic(prop).get("table_id", "")[2:-1], prop["back_field_name"]))
+            target.refresh_table(token, name, target.table_ids[name])
+        elif op["op"] == "update_field":
+            current = target.field(name, op["field"])
+            config = field_config(source, target, source.field(name, op["field"]), current)
+            if not field_request(token, "PUT", target.base, target.table_ids[name], current.get("field_id"), config,
+                                 f"update field {name}.{op['field']}"):
+                continue
+            target.refresh_table(token, name, target.table_ids[name])
+        elif op["op"] == "delete_field":
+            current = target.field(name, op["field"])
+            if not current or not field_request(token, "DELETE", target.base, target.table_ids[name],
+                                                current.get("field_id"), None, f"delete field {name}.{op['field']}"):
+                continue
+        elif op["op"] == "delete_table":
+            if not delete_table(token, target.base, target.table_ids[name], name):
+                continue
+        print(f"- {op['op']} {name}{'.' + op['field'] if op.get('field') else ''}")
+        done += 1
+    return done
+
+
+def keyed_records(token, base, name, key_field):
+    """{natural key: record}; duplicate keys are reported and only the first is kept."""
+    records = {}
+    duplicates = 0
+    for record in iter_records(token, base.base, base.table_ids[name]):
+        key = to_text((record.get("fields") or {}).get(key_field)).strip()
+        if not key:
+            continue
+        if key in records:
+            duplicates += 1
+            continue
+        records[key] = record
+    if duplicates:
+        print(f"- {name}: {duplicates} records share a {key_field} value in {base.base}; only the first is synced")
+    return records
+
+
+def record_values(base, name, record, id_to_key, link_targets):
+    """Writable values keyed by field name; links are expressed as natural keys of the linked table."""
+    values = {}
+    raw = record.get("fields") or {}
+    for field in base.fields[name]:
+        field_type = field.get("type")
+        field_name = field.get("field_name")
+        if field_type in READ_ONLY_TYPES or field_type in SKIPPED_VALUE_TYPES:
+            continue
+        if field_type in LINK_TYPES:
+            linked = link_targets.get(field_name)
+            if linked is None:
+                continue
+            keys = sorted(id_to_key[linked].get(rid) for rid in to_link_ids(raw.get(field_name)) if rid in id_to_key[linked])
+            values[field_name] = keys or None
+            continue
+        values[field_name] = writable_value(field_type, raw.get(field_name))
+    return values
+
+
+def diff_records(token, source, target, keys, prune):
+    """Per keyed table: records to create, changed fields to update, extra records to delete."""
+    loaded = {}
+    for name, key_field in keys.items():
+        if name not in source.table_ids:
+            print(f"Table not found in source: {name}")
+            continue
+        loaded[name] = {
+            "source": keyed_records(token, source, name, key_field),
+            "target": keyed_records(token, target, name, key_field) if name in target.table_ids else {},
+        }
+    id_to_key = {side: {name: {rec["record_id"]: key for key, rec in data[side].items()} for name, data in loaded.items()}
+                 for side in ("source", "target")}
+    plans = {}
+    for name, data in loaded.items():
+        links = {}
+        for field in source.fields[name]:
+            if field.get("type") in LINK_TYPES:
+                linked = source.symbolic(field.get("property")).get("table_id", "")[2:-1]
+                if linked in loaded:
+                    links[field.get("field_name")] = linked
+        target_fields = {f.get("field_name") for f in target.fields.get(name, [])} if name in target.table_ids else None
+        plan = {"create": [], "update": [], "delete": [], "links": links}
+        for key, record in data["source"].items():
+            wanted = record_values(source, name, record, id_to_key["source"], links)
+            if target_fields is not None:
+                wanted = {k: v for k, v in wanted.items() if k in target_fields}
+            current = data["target"].get(key)
+            if current is None:
+                plan["create"].append((key, wanted))
+                continue
+            have = record_values(target, name, current, id_to_key["target"], links)
+            changed = {k: v for k, v in wanted.items() if have.get(k) != v}
+            if not changed:
+                continue
+            plan["update"].append((current["record_id"], key, changed))
+        if prune:
+            plan["delete"] = [rec["record_id"] for key, rec in data["target"].items() if key not in data["source"]]
+        plans[name] = plan
+    return plans, loaded
+
+
+def apply_records(token, target, plans, loaded):
+    key_to_id = {name: {key: rec["record_id"] for key, rec in data["target"].items()} for name, data in loaded.items()}
+
+    def resolve(name, values):
+        out = {}
+        for field_name, value in values.items():
+            linked = plans[name]["links"].get(field_name)
+            if linked and value:
+                value = [key_to_id[linked][k] for k in value if k in key_to_id[linked]] or None
+            out[field_name] = value
+        return out
+
+    # Pass 1: new records without links (their link targets may be created in this same pass).
+    for name, plan in plans.items():
+        if not plan["create"]:
+            continue
+        payload = [{"fields": {k: v for k, v in values.items() if v is not None and k not in plan["links"]}}
+                   for _, values in plan["create"]]
+        created = batch_write(token, target.base, target.table_ids[name], "batch_create", payload)
+        for (key, _), record in zip(plan["create"], created):
+            if record and record.get("record_id"):
+                key_to_id[name][key] = record["record_id"]
+        print(f"- {name}: {sum(1 for r in created if r)} records created")
+    # Pass 2: changed fields of existing records plus links of the new ones.
+    for name, plan in plans.items():
+        updates = [{"record_id": rid, "fields": resolve(name, changed)} for rid, _, changed in plan["update"]]
+        for key, values in plan["create"]:
+            links = {k: v for k, v in values.items() if k in plan["links"] and v}
+            if links and key in key_to_id[name]:
+                updates.append({"record_id": key_to_id[name][key], "fields": resolve(name, links)})
+        if updates:
+            updated = batch_write(token, target.base, target.table_ids[name], "batch_update", updates)
+            print(f"- {name}: {sum(1 for r in updated if r is not None)} records updated")
+        if plan["delete"]:
+            deleted = batch_write(token, target.base, target.table_ids[name], "batch_delete", plan["delete"])
+            print(f"- {name}: {sum(1 for r in deleted if r is not None)} records deleted")
+
+
+def parse_keys(spec):
+    keys = {}
+    for part in spec.split(","):
+        if ":" in part:
+            table, key_field = part.split(":", 1)
+            keys[table.strip()] = key_field.strip()
+    return keys
+
+
+parser = argparse.ArgumentParser(description="Diff two Bases and apply the minimal batched operations to the target.")
+parser.add_argument("--source", required=True, help="Source (staging) app_token")
+parser.add_argument("--target", default=app_token, help="Target app_token (default FEISHU_BASE_APP_TOKEN)")
+parser.add_argument("--tables", default="", help="Only compare these tables (comma-separated)")
+parser.add_argument("--records", default="", help="Also sync records by natural key, e.g. UsageGuide:Title,OKRPlan:Actions")
+parser.add_argument("--prune", action="store_true", help="Also delete tables/fields/records missing from the source")
+parser.add_argument("--dry-run", action="store_true", help="Only print and save the plan")
+parser.add_argument("--plan-file", default=DEFAULT_PLAN, help="Where the computed plan is written")
+args = parser.parse_args()
+
+if args.source == args.target:
+    print("Source and target are the same Base.")
+    sys.exit(1)
+
+started = time.monotonic()
+TOKEN = get_tenant_token()
+only = {t.strip() for t in args.tables.split(",") if t.strip()}
+source = Base(TOKEN, args.source, only)
+target = Base(TOKEN, args.target, only)
+
+schema_ops = diff_schema(source, target, args.prune)
+keys = parse_keys(args.records)
+record_plans, loaded = diff_records(TOKEN, source, target, keys, args.prune) if keys else ({}, {})
+
+summary = {
+    "source": args.source,
+    "target": args.target,
+    "schema": schema_ops,
+    "records": {
+        name: {"create": [key for key, _ in plan["create"]],
+               "update": {key: sorted(changed) for _, key, changed in plan["update"]},
+               "delete": plan["delete"]}
+        for name, plan in record_plans.items()
+    },
+}
+os.makedirs(os.path.dirname(os.path.abspath(args.plan_file)), exist_ok=True)
+tmp_path = args.plan_file + ".tmp"
+with open(tmp_path, "w", encoding="utf-8") as f:
+    json.dump(summary, f, ensure_ascii=False, indent=2)
+os.replace(tmp_path, args.plan_file)
+
+for op in schema_ops:
+    print(f"{op['op']:<13} {op['table']}{'.' + op['field'] if op.get('field') else ''}")
+for name, plan in record_plans.items():
+    print(f"records       {name}: {len(plan['create'])} create, {len(plan['update'])} update, {len(plan['delete'])} delete")
+if not schema_ops and not any(p["create"] or p["update"] or p["delete"] for p in record_plans.values()):
+    print("Target already matches source.")
+    sys.exit(0)
+if args.dry_run:
+    print(f"Dry run; plan saved to {args.plan_file}")
+    sys.exit(0)
+
+apply_schema(TOKEN, source, target, schema_ops)
+if record_plans:
+    if schema_ops:
+        # The record diff must see the target schema as it is now.
+        target = Base(TOKEN, args.target, only)
+        record_plans, loaded = diff_records(TOKEN, source, target, keys, args.prune)
+    apply_records(TOKEN, target, record_plans, loaded)
+print(f"Base sync done in {time.monotonic() - started:.1f}s.")
@@ -0,0 +1,310 @@
+import argparse
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+api_base = os.environ.get("FEISHU_API_BASE", "https://open.feishu.cn")
+app_id = os.environ.get("FEISHU_APP_ID")
+app_secret = os.environ.get("FEISHU_APP_SECRET")
+app_token = os.environ.get("FEISHU_BASE_APP_TOKEN")
+verification_token = os.environ.get("FEISHU_EVENT_VERIFICATION_TOKEN")
+
+if not (app_id and app_secret and app_token):
+    print("Missing env vars: FEISHU_APP_ID/FEISHU_APP_SECRET/FEISHU_BASE_APP_TOKEN")
+    sys.exit(1)
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+EVENT_TYPE = "drive.file.bitable_record_changed_v1"
+# Ids per subprocess; a bigger burst is split into several runs.
+MAX_IDS_PER_RUN = 500
+SEEN_EVENT_IDS = 10000
+
+# Table -> steps refreshed for its changed records, in order: Parking Lot guardrail,
+# progress and score rollups, drift rules over the rolled-up rows, then the pull queue.
+# Steps without --record-ids support run whole (incrementally on their own watermark where they have one).
+ROUTES = {
+    "OKRPlan": ["guardrail_flags.py", "progress_rollup.py", "rollup_cube.py", "drift_rules.py", "daily_pull.py"],
+    "Evidence": ["rollup_cube.py", "drift_rules.py", "evidence_index.py"],
+    "Ideas": ["exploration_budget.py"],
+    "FocusBlocks": ["focus_aggregation.py"],
+}
+STEP_ORDER = ["guardrail_flags.py", "progress_rollup.py", "rollup_cube.py", "drift_rules.py", "daily_pull.py",
+              "evidence_index.py", "exploration_budget.py", "focus_aggregation.py"]
+NO_RECORD_IDS = {"focus_aggregation.py", "drift_rules.py"}
+STEP_ARGS = {"drift_rules.py": ["--apply"]}
+
+
+def http_json(method, url, data=None, token=None):
+    body = None
+    headers = {"Content-Type": "application/json; charset=utf-8"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if data is not None:
+        body = json.dumps(data).encode("utf-8")
+    req = Request(url, data=body, headers=headers, method=method)
+    try:
+        with urlopen(req) as resp:
+            raw = resp.read().decode("utf-8")
+            return json.loads(raw)
+    except HTTPError as exc:
+        body = exc.read().decode("utf-8")
+        raise RuntimeError(f"HTTP {exc.code}: {body}") from exc
+
+
+def get_tenant_token():
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/auth/v3/tenant_access_token/internal",
+        {"app_id": app_id, "app_secret": app_secret},
+    )
+    token = resp.get("tenant_access_token")
+    if not token:
+        print("Failed to get tenant access token", resp)
+        sys.exit(1)
+    return token
+
+
+def get_tables(token):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables?page_size=100",
+        None,
+        token,
+    )
+    items = resp.get("data", {}).get("items", [])
+    return {item.get("name"): item.get("table_id") for item in items}
+
+
+def subscribe(token):
+    """Ask Drive to push record-change events of this Base to the app's event endpoint."""
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/drive/v1/files/{app_token}/subscribe?file_type=bitable",
+        None,
+        token,
+    )
+    if resp.get("code") not in (0, None):
+        print(f"Failed to subscribe to Base events: {resp}")
+        return False
+    return True
+
+
+def parse_event(payload):
+    """Return [(table, record_id)] from a bitable_record_changed_v1 envelope or a stand-in line.
+
+    Stand-in lines are {"table": "OKRPlan", "record_id": "rec..."} (table name or id)
+    or {"table": ..., "record_ids": [...]}.
+    """
+    if "event" not in payload:
+        ids = payload.get("record_ids") or [payload.get("record_id")]
+        return [(payload.get("table") or payload.get("table_id"), rid) for rid in ids if rid]
+    header = payload.get("header") or {}
+    if header.get("event_type") not in (None, EVENT_TYPE):
+        return []
+    event = payload.get("event") or {}
+    if event.get("file_token") not in (None, app_token):
+        return []
+    table_id = event.get("table_id")
+    return [(table_id, action.get("record_id")) for action in event.get("action_list") or [] if action.get("record_id")]
+
+
+class Coalescer:
+    """Pending record ids per table; due once edits go quiet or the oldest has waited too long."""
+
+    def __init__(self, quiet, max_wait):
+        self.quiet = quiet
+        self.max_wait = max_wait
+        self.pending = OrderedDict()
+        self.first_at = None
+        self.last_at = None
+        self.events = 0
+
+    def add(self, table, record_id, now):
+        self.pending.setdefault(table, OrderedDict())[record_id] = True
+        self.first_at = self.first_at or now
+        self.last_at = now
+        self.events += 1
+
+    def due(self, now):
+        if not self.pending:
+            return False
+        return now - self.last_at >= self.quiet or now - self.first_at >= self.max_wait
+
+    def drain(self):
+        batch = {table: list(ids) for table, ids in self.pending.items()}
+        events = self.events
+        self.pending = OrderedDict()
+        self.first_at = self.last_at = None
+        self.events = 0
+        return batch, events
+
+
+def run_step(script, record_ids, dry_run):
+    runs = [record_ids[i:i + MAX_IDS_PER_RUN] for i in range(0, len(record_ids), MAX_IDS_PER_RUN)] or [[]]
+    ok = True
+    for chunk in runs:
+        cmd = [sys.executable, os.path.join(SCRIPTS_DIR, script)] + STEP_ARGS.get(script, [])
+        if chunk:
+            cmd += ["--record-ids", ",".join(chunk)]
+        if dry_run:
+            print(f"  would run {script} {len(chunk)} ids" if chunk else f"  would run {script}")
+            continue
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        lines = proc.stdout.splitlines()
+        for line in lines:
+            print(f"    {line}")
+        if proc.returncode != 0 or any(line.startswith("Failed") for line in lines):
+            print(f"Failed: {script} exited with {proc.returncode}")
+            ok = False
+    return ok
+
+
+def dispatch(batch, events, table_names, dry_run):
+    started = time.monotonic()
+    steps = {}
+    total = 0
+    for table, record_ids in batch.items():
+        name = table_names.get(table, table)
+        if name not in ROUTES:
+            continue
+        total += len(record_ids)
+        for script in ROUTES[name]:
+            ids = steps.setdefault(script, OrderedDict())
+            if script not in NO_RECORD_IDS:
+                ids.update(dict.fromkeys(record_ids, True))
+    if not steps:
+        return
+    print(f"{events} events -> {total} records, steps: {', '.join(s for s in STEP_ORDER if s in steps)}")
+    for script in STEP_ORDER:
+        if script in steps:
+            run_step(script, list(steps[script]), dry_run)
+    print(f"Refreshed in {time.monotonic() - started:.1f}s")
+
+
+def serve(host, port, events):
+    """Event callback endpoint: answers the URL challenge and queues record-change events."""
+    seen = OrderedDict()
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def reply(self, code, obj):
+            body = json.dumps(obj).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                return self.reply(400, {"msg": "invalid json"})
+            if "encrypt" in payload:
+                print("Failed: received an encrypted event; disable the Encrypt Key for this endpoint")
+                return self.reply(400, {"msg": "encrypted events are not supported"})
+            token = payload.get("token") or (payload.get("header") or {}).get("token")
+            if verification_token and token != verification_token:
+                return self.reply(403, {"msg": "bad verification token"})
+            if payload.get("type") == "url_verification":
+                return self.reply(200, {"challenge": payload.get("challenge")})
+            event_id = (payload.get("header") or {}).get("event_id")
+            with lock:
+                # Feishu redelivers until it gets a 200; drop repeats.
+                if event_id and event_id in seen:
+                    return self.reply(200, {})
+                if event_id:
+                    seen[event_id] = True
+                    if len(seen) > SEEN_EVENT_IDS:
+                        seen.popitem(last=False)
+            events.put(payload)
+            self.reply(200, {})
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Listening for Base events on http://{host}:{port}/")
+    return server
+
+
+def replay(path, follow, events):
+    """Local stand-in source: one JSON event per line from a file (or - for stdin); --follow tails it."""
+    handle = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    while True:
+        line = handle.readline()
+        if not line:
+            if not follow:
+                break
+            time.sleep(0.2)
+            continue
+        if line.strip():
+            try:
+                events.put(json.loads(line))
+            except ValueError:
+                print(f"Skipping invalid event line: {line.strip()[:80]}")
+    events.put(None)
+
+
+parser = argparse.ArgumentParser(description="Refresh guardrail flags, rollups, scores and drift rules for records changed in Bitable.")
+parser.add_argument("--listen", help="Serve the event callback on HOST:PORT")
+parser.add_argument("--replay", help="Read stand-in events (JSON lines) from this file, or - for stdin")
+parser.add_argument("--follow", action="store_true", help="Keep reading the --replay file as it grows")
+parser.add_argument("--subscribe", action="store_true", help="Subscribe the app to this Base's record-change events")
+parser.add_argument("--quiet", type=float, default=2.0, help="Seconds without new edits before refreshing")
+parser.add_argument("--max-wait", type=float, default=10.0, help="Refresh at least this often during a burst")
+parser.add_argument("--dry-run", action="store_true", help="Print the steps that would run")
+args = parser.parse_args()
+
+if not (args.listen or args.replay):
+    print("Pass --listen HOST:PORT or --replay FILE")
+    sys.exit(1)
+
+TOKEN = get_tenant_token()
+table_names = {table_id: name for name, table_id in get_tables(TOKEN).items()}
+if args.subscribe and not subscribe(TOKEN):
+    sys.exit(1)
+
+events = queue.Queue()
+if args.listen:
+    host, _, port = args.listen.rpartition(":")
+    serve(host or "127.0.0.1", int(port), events)
+if args.replay:
+    threading.Thread(target=replay, args=(args.replay, args.follow, events), daemon=True).start()
+
+coalescer = Coalescer(args.quiet, args.max_wait)
+unknown = set()
+finished = False
+try:
+    while not finished:
+        try:
+            payload = events.get(timeout=0.2)
+        except queue.Empty:
+            payload = False
+        if payload is None:
+            # Stand-in source exhausted; refresh what is left unless the callback server keeps running.
+            finished = not args.listen
+        elif payload:
+            for table, record_id in parse_event(payload):
+                if table not in table_names and table not in table_names.values() and table not in unknown:
+                    # A table created after start; look it up once.
+                    table_names = {table_id: name for name, table_id in get_tables(TOKEN).items()}
+                    if table not in table_names:
+                        unknown.add(table)
+                coalescer.add(table, record_id, time.monotonic())
+        if coalescer.due(time.monotonic()) or (finished and coalescer.pending):
+            dispatch(*coalescer.drain(), table_names, args.dry_run)
+except KeyboardInterrupt:
+    if coalescer.pending:
+        dispatch(*coalescer.drain(), table_names, args.dry_run)
+print("Change event consumer stopped.")
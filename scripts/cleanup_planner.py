@@ -0,0 +1,303 @@
+import argparse
+import json
+import os
+import sys
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from aimd_limiter import HTTP_TIMEOUT, run_adaptive
+
+api_base = os.environ.get("FEISHU_API_BASE", "https://open.feishu.cn")
+app_id = os.environ.get("FEISHU_APP_ID")
+app_secret = os.environ.get("FEISHU_APP_SECRET")
+app_token = os.environ.get("FEISHU_BASE_APP_TOKEN")
+
+if not (app_id and app_secret and app_token):
+    print("Missing env vars: FEISHU_APP_ID/FEISHU_APP_SECRET/FEISHU_BASE_APP_TOKEN")
+    sys.exit(1)
+
+LINK_TYPES = {18, 21}
+# Same targets as cleanup_tables.py / cleanup_fields.py / cleanup_okrplan_fields.py.
+PRESETS = {
+    "tables": {"tables": ["Plan", "WeeklyPlan", "TimeLog"]},
+    "fields": {
+        "fields": [
+            "Actions.Plan_Date", "Actions.Plan_Hours", "Actions.Plan_Week", "Actions.Plan",
+            "FocusBlocks.Plan",
+        ],
+    },
+    "okrplan_fields": {
+        "fields": [
+            f"OKRPlan.{name}"
+            for name in [
+                "Objective_Title", "KR_Title", "KR_Type", "KR_Target", "KR_Progress", "KR_Confidence",
+                "KR_Due_Date", "KR_Risk", "Action_Title", "Action_Status", "Action_Est_Minutes", "Action_Due",
+                "Action_Plan_Start", "Action_Plan_End", "Action_Guardrail_Flag", "Action_Risk_Tags",
+                "Action_Drift_Flag",
+            ]
+        ],
+    },
+}
+
+
+def http_json(method, url, data=None, token=None):
+    body = None
+    headers = {"Content-Type": "application/json; charset=utf-8"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if data is not None:
+        body = json.dumps(data).encode("utf-8")
+    req = Request(url, data=body, headers=headers, method=method)
+    try:
+        with urlopen(req, timeout=HTTP_TIMEOUT) as resp:
+            raw = resp.read().decode("utf-8")
+            return json.loads(raw)
+    except HTTPError as exc:
+        body = exc.read().decode("utf-8")
+        raise RuntimeError(f"HTTP {exc.code}: {body}") from exc
+
+
+def get_tenant_token():
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/auth/v3/tenant_access_token/internal",
+        {"app_id": app_id, "app_secret": app_secret},
+    )
+    token = resp.get("tenant_access_token")
+    if not token:
+        print("Failed to get tenant access token", resp)
+        sys.exit(1)
+    return token
+
+
+def get_tables(token):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables?page_size=100",
+        None,
+        token,
+    )
+    items = resp.get("data", {}).get("items", [])
+    return {item.get("name"): item.get("table_id") for item in items}
+
+
+def get_fields(token, table_id):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/fields?page_size=200",
+        None,
+        token,
+    )
+    return resp.get("data", {}).get("items", [])
+
+
+def delete_url(node):
+    url = f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{node[1]}"
+    return url + f"/fields/{node[2]}" if node[0] == "field" else url
+
+
+class Schema:
+    """Tables and fields of the Base, with each field's property kept as text for reference lookups."""
+
+    def __init__(self, token):
+        self.table_ids = get_tables(token)
+        self.table_names = {tid: name for name, tid in self.table_ids.items()}
+        self.fields = {tid: get_fields(token, tid) for tid in self.table_ids.values()}
+        self.by_id = {}
+        self.props = []
+        for table_id, fields in self.fields.items():
+            for field in fields:
+                self.by_id[field.get("field_id")] = (table_id, field)
+                self.props.append((table_id, field, json.dumps(field.get("property") or {}, ensure_ascii=False)))
+
+    def label(self, node):
+        table = self.table_names.get(node[1], node[1])
+        if node[0] == "table":
+            return table
+        return f"{table}.{self.by_id[node[2]][1].get('field_name')}"
+
+    def removed_by(self, node):
+        """Field ids that disappear with node: a table takes its fields, a two-way link its back field."""
+        if node[0] == "table":
+            fields = self.fields[node[1]]
+        else:
+            fields = [self.by_id[node[2]][1]]
+        removed = set()
+        for field in fields:
+            removed.add(field.get("field_id"))
+            back = (field.get("property") or {}).get("back_field_id") if field.get("type") == 21 else None
+            if back:
+                removed.add(back)
+        return removed
+
+    def dependents(self, node, removed):
+        """Fields outside node whose link target, lookup or formula mentions what node removes."""
+        tokens = set(removed)
+        if node[0] == "table":
+            tokens.add(node[1])
+        found = []
+        for table_id, field, prop in self.props:
+            if field.get("field_id") in removed:
+                continue
+            if any(token and token in prop for token in tokens):
+                found.append((table_id, field))
+        return found
+
+
+def build_plan(schema, tables, fields, cascade):
+    """Nodes to delete plus, per node, the nodes that must be deleted before it.
+
+    A dependent in a table that is itself being deleted goes with that table; a link
+    into a deleted table goes with it as a field of its own (it cannot outlive its
+    target); formulas and lookups in kept tables are only removed with --cascade and
+    otherwise reported as blockers.
+    """
+    deleted_tables = {tid for tid in tables}
+    nodes = {}
+    owner = {}
+    blockers = []
+
+    def add(node, reason):
+        nodes[node] = {"reason": reason, "after": set()}
+        for field_id in schema.removed_by(node):
+            owner.setdefault(field_id, node)
+
+    for table_id in tables:
+        add(("table", table_id), "requested")
+    for table_id, field_id in fields:
+        if table_id in deleted_tables or field_id in owner:
+            continue
+        add(("field", table_id, field_id), "requested")
+
+    pending = list(nodes)
+    while pending:
+        node = pending.pop(0)
+        for table_id, field in schema.dependents(node, schema.removed_by(node)):
+            field_id = field.get("field_id")
+            if table_id in deleted_tables:
+                first = ("table", table_id)
+            elif field_id in owner:
+                first = owner[field_id]
+            else:
+                first = ("field", table_id, field_id)
+                links_away = field.get("type") in LINK_TYPES and (field.get("property") or {}).get("table_id") in deleted_tables
+                if field.get("is_primary"):
+                    blockers.append((first, node, "primary field"))
+                    continue
+                if not (links_away or cascade):
+                    blockers.append((first, node, "formula/lookup"))
+                    continue
+                add(first, f"references {schema.label(node)}")
+                pending.append(first)
+            if first != node:
+                nodes[node]["after"].add(first)
+    return nodes, blockers
+
+
+def plan_levels(nodes):
+    """Group nodes into levels; every node comes after the nodes it waits for.
+
+    Returns (levels, cyclic): nodes left in a cycle are returned separately and
+    deleted one at a time.
+    """
+    done = set()
+    levels = []
+    remaining = set(nodes)
+    while remaining:
+        ready = sorted(node for node in remaining if nodes[node]["after"] <= done)
+        if not ready:
+            break
+        levels.append(ready)
+        done.update(ready)
+        remaining.difference_update(ready)
+    return levels, sorted(remaining)
+
+
+parser = argparse.ArgumentParser(description="Delete tables and fields in dependency order, independent ones in parallel.")
+parser.add_argument("--tables", default="", help="Tables to delete (comma-separated names)")
+parser.add_argument("--fields", default="", help="Fields to delete as Table.Field (comma-separated)")
+parser.add_argument("--preset", action="append", choices=sorted(PRESETS), default=[],
+                    help="Add the targets of an old cleanup script (repeatable)")
+parser.add_argument("--cascade", action="store_true", help="Also delete formulas/lookups in kept tables that reference a target")
+parser.add_argument("--concurrency", type=int, help="Deletes in flight per level (default FEISHU_WRITE_CONCURRENCY)")
+parser.add_argument("--dry-run", action="store_true", help="Print the plan without deleting")
+args = parser.parse_args()
+
+table_names = [name.strip() for name in args.tables.split(",") if name.strip()]
+field_names = [name.strip() for name in args.fields.split(",") if name.strip()]
+for preset in args.preset:
+    table_names += PRESETS[preset].get("tables", [])
+    field_names += PRESETS[preset].get("fields", [])
+if not (table_names or field_names):
+    print("Nothing to delete. Pass --tables, --fields or --preset.")
+    sys.exit(1)
+
+TOKEN = get_tenant_token()
+schema = Schema(TOKEN)
+
+target_tables = []
+for name in dict.fromkeys(table_names):
+    table_id = schema.table_ids.get(name)
+    if not table_id:
+        print(f"Table not found: {name}")
+        continue
+    target_tables.append(table_id)
+target_fields = []
+for name in dict.fromkeys(field_names):
+    table_name, _, field_name = name.partition(".")
+    table_id = schema.table_ids.get(table_name)
+    field = next((f for f in schema.fields.get(table_id, []) if f.get("field_name") == field_name), None)
+    if not field:
+        print(f"Field not found: {name}")
+        continue
+    if field.get("is_primary"):
+        print(f"Cannot delete primary field: {name}")
+        continue
+    target_fields.append((table_id, field.get("field_id")))
+
+nodes, blockers = build_plan(schema, target_tables, target_fields, args.cascade)
+if blockers:
+    for blocker, node, kind in blockers:
+        print(f"Blocked: {schema.label(blocker)} ({kind}) references {schema.label(node)}")
+    print("Delete or change these first, or rerun with --cascade to delete formula/lookup fields too.")
+    sys.exit(1)
+
+levels, cyclic = plan_levels(nodes)
+for index, level in enumerate(levels):
+    print(f"Level {index}: {len(level)} deletes")
+    for node in level:
+        reason = nodes[node]["reason"]
+        print(f"  {node[0]} {schema.label(node)}" + ("" if reason == "requested" else f" ({reason})"))
+if cyclic:
+    print(f"Cycle: {len(cyclic)} deletes run one at a time")
+    for node in cyclic:
+        print(f"  {node[0]} {schema.label(node)}")
+if args.dry_run:
+    sys.exit(0)
+
+
+def send(node):
+    return http_json("DELETE", delete_url(node), None, TOKEN)
+
+
+failed = set()
+for level in levels + [[node] for node in cyclic]:
+    # A node waiting on a failed delete would fail (or break a formula) too.
+    runnable = [node for node in level if not nodes[node]["after"] & failed]
+    for node in level:
+        if node not in runnable:
+            print(f"Skipped {node[0]} {schema.label(node)}: a delete it waits for failed")
+            failed.add(node)
+    if not runnable:
+        continue
+    responses, report = run_adaptive(runnable, send, args.concurrency, item_count=lambda node: 1)
+    print(f"  delete: {report}")
+    for node, resp in zip(runnable, responses):
+        if resp.get("code") not in (0, None):
+            print(f"Failed to delete {node[0]} {schema.label(node)}: {resp}")
+            failed.add(node)
+
+if failed:
+    print(f"Cleanup finished with {len(failed)} of {len(nodes)} deletes not done.")
+    sys.exit(1)
+print("Cleanup done.")
@@ -0,0 +1,420 @@
+import argparse
+import heapq
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+api_base = os.environ.get("FEISHU_API_BASE", "https://open.feishu.cn")
+app_id = os.environ.get("FEISHU_APP_ID")
+app_secret = os.environ.get("FEISHU_APP_SECRET")
+app_token = os.environ.get("FEISHU_BASE_APP_TOKEN")
+
+if not (app_id and app_secret and app_token):
+    print("Missing env vars: FEISHU_APP_ID/FEISHU_APP_SECRET/FEISHU_BASE_APP_TOKEN")
+    sys.exit(1)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_STATE = os.path.join(ROOT_DIR, "generated", "daily_pull_state.json")
+BATCH_SIZE = 500
+NO_DUE = 2**53
+RISK_RANK = {"Red": 0, "Yellow": 1, "Green": 2}
+UNASSIGNED = "(unassigned)"
+
+FIELD_CANDIDATES = {
+    "title": ["Actions", "Action_Title", "Action"],
+    "status": ["Action Status", "Action_Status", "Status"],
+    "plan_start": ["预期开始", "Action_Plan_Start", "Plan_Start", "Plan_Date"],
+    "plan_end": ["预期结束", "Action_Plan_End", "Plan_End", "Plan_Date"],
+    "progress": ["Action Progress"],
+    "due": ["Action_Due", "Due"],
+    "kr_due": ["KR_Due_Date", "Due_Date"],
+    "risk": ["KR_Risk", "Current_Risk"],
+    "confidence": ["KR_Confidence", "Confidence"],
+    "owner": ["Owner", "Action_Owner"],
+}
+
+
+def http_json(method, url, data=None, token=None):
+    body = None
+    headers = {"Content-Type": "application/json; charset=utf-8"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if data is not None:
+        body = json.dumps(data).encode("utf-8")
+    req = Request(url, data=body, headers=headers, method=method)
+    try:
+        with urlopen(req) as resp:
+            raw = resp.read().decode("utf-8")
+            return json.loads(raw)
+    except HTTPError as exc:
+        body = exc.read().decode("utf-8")
+        raise RuntimeError(f"HTTP {exc.code}: {body}") from exc
+
+
+def get_tenant_token():
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/auth/v3/tenant_access_token/internal",
+        {"app_id": app_id, "app_secret": app_secret},
+    )
+    token = resp.get("tenant_access_token")
+    if not token:
+        print("Failed to get tenant access token", resp)
+        sys.exit(1)
+    return token
+
+
+def get_tables(token):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables?page_size=100",
+        None,
+        token,
+    )
+    items = resp.get("data", {}).get("items", [])
+    return {item.get("name"): item.get("table_id") for item in items}
+
+
+def get_fields(token, table_id):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/fields?page_size=200",
+        None,
+        token,
+    )
+    return resp.get("data", {}).get("items", [])
+
+
+def iter_records(token, table_id, page_size=500):
+    page_token = ""
+    while True:
+        url = f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records?page_size={page_size}"
+        if page_token:
+            url += f"&page_token={page_token}"
+        resp = http_json("GET", url, None, token)
+        data = resp.get("data") or {}
+        for item in data.get("items") or []:
+            yield item
+        page_token = data.get("page_token")
+        if not data.get("has_more") or not page_token:
+            break
+
+
+def batch_get_records(token, table_id, record_ids):
+    records = []
+    for i in range(0, len(record_ids), 100):
+        resp = http_json(
+            "POST",
+            f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_get",
+            {"record_ids": record_ids[i:i + 100]},
+            token,
+        )
+        records.extend((resp.get("data") or {}).get("records") or [])
+    return records
+
+
+def batch_update_records(token, table_id, records):
+    updated = 0
+    for i in range(0, len(records), BATCH_SIZE):
+        chunk = records[i:i + BATCH_SIZE]
+        resp = http_json(
+            "POST",
+            f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_update",
+            {"records": chunk},
+            token,
+        )
+        if resp.get("code") not in (0, None):
+            print(f"Failed to update {len(chunk)} records: {resp}")
+            continue
+        updated += len(chunk)
+    return updated
+
+
+def to_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float, bool)):
+        return str(value)
+    if isinstance(value, list):
+        return "".join(to_text(v) for v in value)
+    if isinstance(value, dict):
+        if value.get("text"):
+            return str(value.get("text"))
+        if value.get("name"):
+            return str(value.get("name"))
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def to_number(value):
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(to_text(value))
+    except ValueError:
+        return None
+
+
+def day_stamp(ts):
+    d = datetime.fromtimestamp(ts / 1000)
+    return int(datetime(d.year, d.month, d.day).timestamp() * 1000)
+
+
+def normalize_progress(value):
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        return 0
+    return value / 100 if value > 1 else value
+
+
+def lag_delta(plan_start, plan_end, progress, today):
+    # Mirrors computeActionScore in App.tsx: actual progress minus time progress.
+    if not plan_start or not plan_end:
+        return 0.0
+    start = day_stamp(plan_start)
+    end = day_stamp(plan_end)
+    if end < start:
+        return 0.0
+    duration = end - start
+    time_progress = 1 if duration == 0 else min(1, max(0, (today - start) / duration))
+    return normalize_progress(progress) - time_progress
+
+
+def resolve_field_names(field_names):
+    return {key: next((n for n in names if n in field_names), None) for key, names in FIELD_CANDIDATES.items()}
+
+
+def extract_action(record, names):
+    values = record.get("fields") or {}
+
+    def get(key):
+        return values.get(names[key]) if names[key] else None
+
+    title = to_text(get("title"))
+    if not title:
+        return None
+    return {
+        "title": title,
+        "owner": to_text(get("owner")) or UNASSIGNED,
+        "status": to_text(get("status")),
+        "plan_start": to_number(get("plan_start")),
+        "plan_end": to_number(get("plan_end")),
+        "progress": to_number(get("progress")),
+        "due": to_number(get("due")) or to_number(get("plan_end")) or to_number(get("kr_due")),
+        "risk": to_text(get("risk")),
+        "confidence": to_number(get("confidence")),
+    }
+
+
+def priority_key(action, today):
+    """Smaller sorts first: most behind plan, then earliest due, riskiest KR, lowest confidence."""
+    if action["status"] in ("Done", "Blocked", "Today", "Doing"):
+        return None
+    if normalize_progress(action["progress"]) >= 1:
+        return None
+    delta = lag_delta(action["plan_start"], action["plan_end"], action["progress"], today)
+    due = day_stamp(action["due"]) if action["due"] else NO_DUE
+    confidence = action["confidence"] if action["confidence"] is not None else float("inf")
+    return (round(delta, 6), due, RISK_RANK.get(action["risk"], 1), confidence)
+
+
+class PullQueue:
+    """Per-owner min-heaps with lazy invalidation.
+
+    upsert/remove are O(log n); top(owner, k) pops at most k live entries
+    (plus any stale ones left behind by earlier updates) and pushes them back.
+    """
+
+    def __init__(self):
+        self.heaps = {}
+        self.live = {}
+        self.counts = {}
+        self.version = 0
+
+    def load(self, items):
+        """Bulk build from (record_id, owner, key) in O(n) via heapify."""
+        for record_id, owner, key in items:
+            if key is None:
+                continue
+            self.version += 1
+            self.live[record_id] = (owner, key, self.version)
+            self.counts[owner] = self.counts.get(owner, 0) + 1
+            self.heaps.setdefault(owner, []).append((key, self.version, record_id))
+        for heap in self.heaps.values():
+            heapq.heapify(heap)
+
+    def upsert(self, record_id, owner, key):
+        self.remove(record_id)
+        if key is None:
+            return
+        self.version += 1
+        self.live[record_id] = (owner, key, self.version)
+        self.counts[owner] = self.counts.get(owner, 0) + 1
+        heapq.heappush(self.heaps.setdefault(owner, []), (key, self.version, record_id))
+
+    def remove(self, record_id):
+        entry = self.live.pop(record_id, None)
+        if not entry:
+            return
+        owner = entry[0]
+        self.counts[owner] -= 1
+        if len(self.heaps[owner]) > 2 * self.counts[owner] + 32:
+            heap = [item for item in self.heaps[owner] if self._is_live(item)]
+            heapq.heapify(heap)
+            self.heaps[owner] = heap
+
+    def _is_live(self, item):
+        entry = self.live.get(item[2])
+        return entry is not None and entry[2] == item[1]
+
+    def top(self, owner, k):
+        heap = self.heaps.get(owner, [])
+        picked = []
+        while heap and len(picked) < k:
+            item = heapq.heappop(heap)
+            if self._is_live(item):
+                picked.append(item)
+        for item in picked:
+            heapq.heappush(heap, item)
+        return [item[2] for item in picked]
+
+    def owners(self):
+        return sorted(owner for owner, count in self.counts.items() if count > 0)
+
+    def dump(self):
+        return {"heaps": self.heaps, "live": self.live, "counts": self.counts, "version": self.version}
+
+    @classmethod
+    def restore(cls, data):
+        # JSON turns the tuple keys into lists; tuples again so heap order compares the same.
+        queue = cls()
+        queue.heaps = {
+            owner: [(tuple(key), version, record_id) for key, version, record_id in heap]
+            for owner, heap in data["heaps"].items()
+        }
+        queue.live = {record_id: (owner, tuple(key), version) for record_id, (owner, key, version) in data["live"].items()}
+        queue.counts = data["counts"]
+        queue.version = data["version"]
+        return queue
+
+
+def load_state(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(path, state):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def build_queue(actions, today):
+    queue = PullQueue()
+    queue.load((record_id, a["owner"], priority_key(a, today)) for record_id, a in actions.items())
+    return queue
+
+
+def active_counts(actions):
+    counts = {}
+    for action in actions.values():
+        if action["status"] in ("Today", "Doing"):
+            counts[action["owner"]] = counts.get(action["owner"], 0) + 1
+    return counts
+
+
+def format_candidate(action, today):
+    delta = lag_delta(action["plan_start"], action["plan_end"], action["progress"], today)
+    due = datetime.fromtimestamp(action["due"] / 1000).strftime("%Y-%m-%d") if action["due"] else "-"
+    return f"{action['title']} (lag {round(-delta * 100)}%, due {due}, KR {action['risk'] or '-'})"
+
+
+parser = argparse.ArgumentParser(description="Pick each owner's Today MITs from the Action Bank.")
+parser.add_argument("--top", type=int, default=2, help="MITs per owner (PRD C2: 1-2)")
+parser.add_argument("--owner", help="Only show this owner")
+parser.add_argument("--record-ids", default="", help="Refresh only these OKRPlan records (comma-separated)")
+parser.add_argument("--rebuild", action="store_true", help="Rescan OKRPlan and rebuild the queue")
+parser.add_argument("--apply", action="store_true", help="Move picked actions to Today")
+parser.add_argument("--state", default=DEFAULT_STATE, help="Local queue state file")
+args = parser.parse_args()
+
+TOKEN = get_tenant_token()
+TABLES = get_tables(TOKEN)
+table_id = TABLES.get("OKRPlan")
+if not table_id:
+    print("OKRPlan table not found")
+    sys.exit(1)
+
+names = resolve_field_names({f.get("field_name") for f in get_fields(TOKEN, table_id)})
+today = day_stamp(int(time.time() * 1000))
+state = None if args.rebuild else load_state(args.state)
+if state and state.get("table_id") != table_id:
+    state = None
+
+queue = None
+if state is None:
+    actions = {}
+    for record in iter_records(TOKEN, table_id):
+        action = extract_action(record, names)
+        if action:
+            actions[record.get("record_id")] = action
+    print(f"Scanned OKRPlan: {len(actions)} actions")
+else:
+    actions = state["actions"]
+    # Lag keys depend on the day, so the saved heaps are only reused on the day they were built.
+    if state.get("as_of") == today and state.get("queue"):
+        queue = PullQueue.restore(state["queue"])
+    record_ids = [rid.strip() for rid in args.record_ids.split(",") if rid.strip()]
+    if record_ids:
+        found = {}
+        for record in batch_get_records(TOKEN, table_id, record_ids):
+            found[record.get("record_id")] = extract_action(record, names)
+        for record_id in record_ids:
+            action = found.get(record_id)
+            if action:
+                actions[record_id] = action
+                if queue:
+                    queue.upsert(record_id, action["owner"], priority_key(action, today))
+            else:
+                actions.pop(record_id, None)
+                if queue:
+                    queue.remove(record_id)
+        print(f"Refreshed {len(record_ids)} actions from OKRPlan")
+
+if queue is None:
+    queue = build_queue(actions, today)
+active = active_counts(actions)
+owners = [args.owner] if args.owner else queue.owners()
+
+picks = []
+for owner in owners:
+    slots = max(0, args.top - active.get(owner, 0))
+    chosen = queue.top(owner, slots) if slots else []
+    print(f"{owner}: {active.get(owner, 0)} active, {len(chosen)} to pull")
+    for record_id in chosen:
+        print(f"- {record_id} {format_candidate(actions[record_id], today)}")
+        picks.append(record_id)
+
+if args.apply and picks:
+    if not names["status"]:
+        print("OKRPlan 缺少 Action Status 字段")
+        sys.exit(1)
+    updates = [{"record_id": rid, "fields": {names["status"]: "Today"}} for rid in picks]
+    print(f"Moved {batch_update_records(TOKEN, table_id, updates)} actions to Today.")
+    for record_id in picks:
+        actions[record_id]["status"] = "Today"
+        queue.remove(record_id)
+
+save_state(args.state, {"table_id": table_id, "as_of": today, "actions": actions, "queue": queue.dump()})
+print("Daily pull done.")
@@ -0,0 +1,490 @@
+import argparse
+import json
+import math
+import operator
+import os
+import string
+import sys
+from datetime import datetime, timedelta
+from functools import partial
+from itertools import compress, repeat
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from aimd_limiter import HTTP_TIMEOUT, run_adaptive
+
+api_base = os.environ.get("FEISHU_API_BASE", "https://open.feishu.cn")
+app_id = os.environ.get("FEISHU_APP_ID")
+app_secret = os.environ.get("FEISHU_APP_SECRET")
+app_token = os.environ.get("FEISHU_BASE_APP_TOKEN")
+
+if not (app_id and app_secret and app_token):
+    print("Missing env vars: FEISHU_APP_ID/FEISHU_APP_SECRET/FEISHU_BASE_APP_TOKEN")
+    sys.exit(1)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CONFIG = os.path.join(ROOT_DIR, "scripts", "drift_rules.json")
+DEFAULT_REPORT = os.path.join(ROOT_DIR, "generated", "drift_report.json")
+BATCH_SIZE = 500
+NO_KR = "(no KR)"
+UNASSIGNED = "(unassigned)"
+RISK_RANK = {"Red": 0, "Yellow": 1, "Green": 2}
+# Missing numbers are NaN so every comparison but != is false without a per-value check.
+MISSING = float("nan")
+
+# Columns rules can test, per entity kind; "text" columns only support == / != / in.
+METRICS = {
+    "kr": {
+        "actions": "number",
+        "lagging": "number",
+        "lagging_share": "number",
+        # Days since the last evidence; a KR without any counts from its first planned start.
+        "days_without_evidence": "number",
+        "confidence": "number",
+        "progress": "number",
+        "risk": "text",
+    },
+    "owner": {
+        "actions": "number",
+        "lagging": "number",
+        "week_minutes": "number",
+        "non_okr_minutes": "number",
+        "non_okr_share": "number",
+    },
+}
+OPS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le, "==": operator.eq, "!=": operator.ne}
+
+FIELD_CANDIDATES = {
+    "title": ["Actions", "Action_Title", "Action"],
+    "kr": ["Key Results", "KR_Title", "KR"],
+    "owner": ["Owner", "Action_Owner"],
+    "plan_start": ["预期开始", "Action_Plan_Start", "Plan_Start", "Plan_Date"],
+    "plan_end": ["预期结束", "Action_Plan_End", "Plan_End", "Plan_Date"],
+    "progress": ["Action Progress"],
+    "minutes": ["Action Est Minutes", "Action_Est_Minutes", "Est_Minutes"],
+    "risk": ["KR_Risk", "Current_Risk"],
+    "confidence": ["KR_Confidence", "Confidence"],
+    "kr_progress": ["KR_Progress", "Progress"],
+    "flag": ["Action_Drift_Flag", "Drift_Flag"],
+}
+
+
+def http_json(method, url, data=None, token=None):
+    body = None
+    headers = {"Content-Type": "application/json; charset=utf-8"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if data is not None:
+        body = json.dumps(data).encode("utf-8")
+    req = Request(url, data=body, headers=headers, method=method)
+    try:
+        with urlopen(req, timeout=HTTP_TIMEOUT) as resp:
+            raw = resp.read().decode("utf-8")
+            return json.loads(raw)
+    except HTTPError as exc:
+        body = exc.read().decode("utf-8")
+        raise RuntimeError(f"HTTP {exc.code}: {body}") from exc
+
+
+def get_tenant_token():
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/auth/v3/tenant_access_token/internal",
+        {"app_id": app_id, "app_secret": app_secret},
+    )
+    token = resp.get("tenant_access_token")
+    if not token:
+        print("Failed to get tenant access token", resp)
+        sys.exit(1)
+    return token
+
+
+def get_tables(token):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables?page_size=100",
+        None,
+        token,
+    )
+    items = resp.get("data", {}).get("items", [])
+    return {item.get("name"): item.get("table_id") for item in items}
+
+
+def get_fields(token, table_id):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/fields?page_size=200",
+        None,
+        token,
+    )
+    return resp.get("data", {}).get("items", [])
+
+
+def iter_records(token, table_id, page_size=500):
+    page_token = ""
+    while True:
+        url = f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records?page_size={page_size}"
+        if page_token:
+            url += f"&page_token={page_token}"
+        resp = http_json("GET", url, None, token)
+        data = resp.get("data") or {}
+        for item in data.get("items") or []:
+            yield item
+        page_token = data.get("page_token")
+        if not data.get("has_more") or not page_token:
+            break
+
+
+def batch_update_records(token, table_id, records):
+    chunks = [records[i:i + BATCH_SIZE] for i in range(0, len(records), BATCH_SIZE)]
+    if not chunks:
+        return 0
+
+    def send(chunk):
+        return http_json(
+            "POST",
+            f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_update",
+            {"records": chunk},
+            token,
+        )
+
+    responses, report = run_adaptive(chunks, send)
+    print(f"  batch_update: {report}")
+    updated = 0
+    for chunk, resp in zip(chunks, responses):
+        if resp.get("code") not in (0, None):
+            print(f"Failed to update {len(chunk)} records: {resp}")
+            continue
+        updated += len(chunk)
+    return updated
+
+
+def to_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float, bool)):
+        return str(value)
+    if isinstance(value, list):
+        return "".join(to_text(v) for v in value)
+    if isinstance(value, dict):
+        if value.get("text"):
+            return str(value.get("text"))
+        if value.get("name"):
+            return str(value.get("name"))
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def to_link_ids(value):
+    if isinstance(value, list):
+        ids = []
+        for item in value:
+            if isinstance(item, str):
+                ids.append(item)
+            elif isinstance(item, dict):
+                ids.extend(item.get("record_ids") or [])
+        return ids
+    if isinstance(value, dict):
+        return value.get("link_record_ids") or value.get("record_ids") or []
+    return []
+
+
+def to_number(value):
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(to_text(value))
+    except ValueError:
+        return None
+
+
+def to_day(ts):
+    return datetime.fromtimestamp(ts / 1000).date()
+
+
+def normalize_progress(value):
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        return 0
+    return value / 100 if value > 1 else value
+
+
+def action_score(plan_start, plan_end, progress, today):
+    # Mirrors computeActionScore in App.tsx.
+    start = to_day(plan_start)
+    end = to_day(plan_end)
+    if end < start:
+        return None
+    duration = (end - start).days
+    time_progress = 1 if duration == 0 else min(1, max(0, (today - start).days / duration))
+    actual = normalize_progress(progress)
+    delta = actual - time_progress
+    score = 100 if delta >= 0 else max(0, round(100 * (1 + delta)))
+    return score, actual, delta, time_progress
+
+
+def resolve_field_names(field_names):
+    return {key: next((n for n in names if n in field_names), None) for key, names in FIELD_CANDIDATES.items()}
+
+
+def compile_condition(per, condition):
+    """Turn {"metric", "op", "value"} into a function from columns to a lazy boolean column."""
+    metric, op, value = condition.get("metric"), condition.get("op"), condition.get("value")
+    kind = METRICS[per].get(metric)
+    if not kind:
+        raise ValueError(f"unknown {per} metric {metric!r}; expected one of {', '.join(METRICS[per])}")
+    if op == "in":
+        if not isinstance(value, list):
+            raise ValueError(f"{metric} in needs a list")
+        return lambda columns: map(partial(operator.contains, frozenset(value)), columns[metric])
+    if op not in OPS:
+        raise ValueError(f"unknown op {op!r}; expected one of {', '.join(OPS)}, in")
+    if kind == "number" and (isinstance(value, bool) or not isinstance(value, (int, float))):
+        raise ValueError(f"{metric} {op} needs a number")
+    if kind == "text" and op not in ("==", "!="):
+        raise ValueError(f"{metric} is text; use ==, != or in")
+    compare = OPS[op]
+    return lambda columns: map(compare, columns[metric], repeat(value))
+
+
+def compile_rules(config):
+    """Validate the config and compile each rule's conditions; raises ValueError naming the rule."""
+    rules = []
+    for rule in config.get("rules") or []:
+        if rule.get("enabled") is False:
+            continue
+        rule_id = rule.get("id") or f"rule{len(rules) + 1}"
+        try:
+            per = rule.get("per")
+            if per not in METRICS:
+                raise ValueError(f"per must be one of {', '.join(METRICS)}")
+            conditions = rule.get("when") or []
+            if not conditions:
+                raise ValueError("when needs at least one condition")
+            explain = rule.get("explain") or rule_id
+            allowed = set(METRICS[per]) | {"threshold", "entity"}
+            unknown = {name for _, name, _, _ in string.Formatter().parse(explain) if name} - allowed
+            if unknown:
+                raise ValueError(f"explain uses unknown names: {', '.join(sorted(unknown))}")
+            rules.append({
+                "id": rule_id,
+                "per": per,
+                "predicates": [compile_condition(per, condition) for condition in conditions],
+                "weight": float(rule.get("weight", 0)),
+                "explain": explain,
+                "threshold": conditions[0].get("value"),
+            })
+        except (ValueError, TypeError) as exc:
+            raise ValueError(f"rule {rule_id}: {exc}") from exc
+    return rules
+
+
+def evaluate(rules, frames):
+    """Run every rule over whole columns; returns {kind: [fired rules per entity]}."""
+    fired = {kind: [[] for _ in keys] for kind, (keys, _) in frames.items()}
+    for rule in rules:
+        keys, columns = frames[rule["per"]]
+        masks = [predicate(columns) for predicate in rule["predicates"]]
+        hits = masks[0] if len(masks) == 1 else map(all, zip(*masks))
+        for index in compress(range(len(keys)), hits):
+            fired[rule["per"]][index].append(rule)
+    return fired
+
+
+def explain(rule, key, columns, index):
+    row = {metric: columns[metric][index] for metric in columns}
+    try:
+        return rule["explain"].format(entity=key, threshold=rule["threshold"], **row)
+    except (ValueError, TypeError):
+        return f"{rule['id']}: " + ", ".join(f"{metric}={row[metric]}" for metric in columns)
+
+
+def build_frames(actions, evidence_krs, today):
+    """Aggregate actions and evidence into one column per metric, entities in sorted order."""
+    week_start = today - timedelta(days=today.weekday())
+    week_end = week_start + timedelta(days=6)
+    krs = {}
+    owners = {}
+    for action in actions.values():
+        kr = krs.setdefault(action["kr"], {"actions": 0, "lagging": 0, "first_start": None, "confidence": None,
+                                            "progress": None, "risk": ""}) if action["kr"] != NO_KR else None
+        owner = owners.setdefault(action["owner"], {"actions": 0, "lagging": 0, "week_minutes": 0, "non_okr_minutes": 0})
+        lagging = 0
+        start = to_day(action["plan_start"]) if action["plan_start"] else None
+        end = to_day(action["plan_end"]) if action["plan_end"] else None
+        if start and end:
+            scored = action_score(action["plan_start"], action["plan_end"], action["progress"], today)
+            lagging = 1 if scored and start <= today and scored[2] < 0 else 0
+            if start <= week_end and end >= week_start:
+                owner["week_minutes"] += action["minutes"] or 0
+                if not kr:
+                    owner["non_okr_minutes"] += action["minutes"] or 0
+        owner["actions"] += 1
+        owner["lagging"] += lagging
+        if not kr:
+            continue
+        kr["actions"] += 1
+        kr["lagging"] += lagging
+        if start and (kr["first_start"] is None or start < kr["first_start"]):
+            kr["first_start"] = start
+        if action["confidence"] is not None and (kr["confidence"] is None or action["confidence"] < kr["confidence"]):
+            kr["confidence"] = action["confidence"]
+        if action["kr_progress"] is not None:
+            kr["progress"] = max(kr["progress"] or 0, normalize_progress(action["kr_progress"]))
+        if action["risk"] and RISK_RANK.get(action["risk"], 1) < RISK_RANK.get(kr["risk"], 3):
+            kr["risk"] = action["risk"]
+
+    kr_keys = sorted(krs)
+    kr_columns = {metric: [] for metric in METRICS["kr"]}
+    for key in kr_keys:
+        kr = krs[key]
+        last = evidence_krs.get(key)
+        since = last or kr["first_start"]
+        kr_columns["actions"].append(kr["actions"])
+        kr_columns["lagging"].append(kr["lagging"])
+        kr_columns["lagging_share"].append(kr["lagging"] / kr["actions"])
+        kr_columns["days_without_evidence"].append((today - since).days if since and since <= today else MISSING)
+        kr_columns["confidence"].append(MISSING if kr["confidence"] is None else kr["confidence"])
+        kr_columns["progress"].append(MISSING if kr["progress"] is None else kr["progress"])
+        kr_columns["risk"].append(kr["risk"])
+    owner_keys = sorted(owners)
+    owner_columns = {metric: [owners[key][metric] for key in owner_keys] for metric in
+                     ("actions", "lagging", "week_minutes", "non_okr_minutes")}
+    owner_columns["non_okr_share"] = [
+        non_okr / total if total else MISSING
+        for non_okr, total in zip(owner_columns["non_okr_minutes"], owner_columns["week_minutes"])
+    ]
+    return {"kr": (kr_keys, kr_columns), "owner": (owner_keys, owner_columns)}
+
+
+def extract_action(record, names):
+    values = record.get("fields") or {}
+
+    def get(key):
+        return values.get(names[key]) if names[key] else None
+
+    return {
+        "kr": to_text(get("kr")) or NO_KR,
+        "owner": to_text(get("owner")) or UNASSIGNED,
+        "plan_start": to_number(get("plan_start")),
+        "plan_end": to_number(get("plan_end")),
+        "progress": to_number(get("progress")),
+        "minutes": to_number(get("minutes")),
+        "risk": to_text(get("risk")),
+        "confidence": to_number(get("confidence")),
+        "kr_progress": to_number(get("kr_progress")),
+        "flag": bool(get("flag")),
+    }
+
+
+def metric_text(value):
+    if isinstance(value, float):
+        return "-" if math.isnan(value) else f"{value:.4g}"
+    return str(value) if value != "" else "-"
+
+
+parser = argparse.ArgumentParser(description="Evaluate configurable drift rules (PRD F2) for every KR and owner.")
+parser.add_argument("--config", default=os.environ.get("OKR_DRIFT_RULES") or DEFAULT_CONFIG, help="Rule config (JSON)")
+parser.add_argument("--entity", help="Print every metric and rule result for one entity, e.g. kr:KR1 or owner:Alice")
+parser.add_argument("--apply", action="store_true", help="Write Action_Drift_Flag on OKRPlan (changed rows only)")
+parser.add_argument("--report", default=DEFAULT_REPORT, help="Where to write the JSON report")
+args = parser.parse_args()
+
+try:
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    rules = compile_rules(config)
+except (OSError, ValueError) as exc:
+    print(f"Failed to load drift rules from {args.config}: {exc}")
+    sys.exit(1)
+penalty_cap = config.get("penalty_cap")
+
+TOKEN = get_tenant_token()
+TABLES = get_tables(TOKEN)
+okr_table = TABLES.get("OKRPlan")
+if not okr_table:
+    print("OKRPlan table not found")
+    sys.exit(1)
+
+names = resolve_field_names({f.get("field_name") for f in get_fields(TOKEN, okr_table)})
+today = datetime.now().date()
+actions = {record.get("record_id"): extract_action(record, names) for record in iter_records(TOKEN, okr_table)}
+
+# Evidence counts for the KR of its linked action (or linked KR row), as in the rollup cube.
+evidence_krs = {}
+evidence_table = TABLES.get("Evidence")
+for record in iter_records(TOKEN, evidence_table) if evidence_table else []:
+    values = record.get("fields") or {}
+    date_ms = to_number(values.get("Date"))
+    linked = to_link_ids(values.get("Action")) or to_link_ids(values.get("KeyResult"))
+    action = actions.get(linked[0]) if linked else None
+    if not date_ms or not action or action["kr"] == NO_KR:
+        continue
+    day = to_day(date_ms)
+    if day <= today and (action["kr"] not in evidence_krs or evidence_krs[action["kr"]] < day):
+        evidence_krs[action["kr"]] = day
+
+frames = build_frames(actions, evidence_krs, today)
+fired = evaluate(rules, frames)
+
+entities = {}
+for kind, (keys, columns) in frames.items():
+    for index, key in enumerate(keys):
+        if not fired[kind][index]:
+            continue
+        penalty = sum(rule["weight"] for rule in fired[kind][index])
+        entities[f"{kind}:{key}"] = {
+            "penalty": min(penalty, penalty_cap) if penalty_cap is not None else penalty,
+            "rules": [rule["id"] for rule in fired[kind][index]],
+            "explanations": [explain(rule, key, columns, index) for rule in fired[kind][index]],
+        }
+
+if args.entity:
+    kind, _, key = args.entity.partition(":")
+    if kind not in frames or key not in frames[kind][0]:
+        print(f"Entity not found: {args.entity}")
+        sys.exit(1)
+    keys, columns = frames[kind]
+    index = keys.index(key)
+    print(f"{args.entity} (as of {today.isoformat()}):")
+    for metric in columns:
+        print(f"  {metric:<22} {metric_text(columns[metric][index])}")
+    for rule in (r for r in rules if r["per"] == kind):
+        hit = rule in fired[kind][index]
+        print(f"  {'FIRED' if hit else 'ok':<5} {rule['id']}" + (f": {explain(rule, key, columns, index)}" if hit else ""))
+    sys.exit(0)
+
+report = {
+    "as_of": today.isoformat(),
+    "config": os.path.relpath(os.path.abspath(args.config), ROOT_DIR),
+    "rules": [rule["id"] for rule in rules],
+    "entities": entities,
+}
+os.makedirs(os.path.dirname(os.path.abspath(args.report)), exist_ok=True)
+tmp_path = args.report + ".tmp"
+with open(tmp_path, "w", encoding="utf-8") as f:
+    json.dump(report, f, ensure_ascii=False, indent=2)
+os.replace(tmp_path, args.report)
+
+print(f"{len(rules)} rules over {len(frames['kr'][0])} KRs and {len(frames['owner'][0])} owners: {len(entities)} drifting")
+for name, entity in sorted(entities.items(), key=lambda item: -item[1]["penalty"]):
+    print(f"- {name} -{entity['penalty']:g}: {'；'.join(entity['explanations'])}")
+
+if args.apply:
+    if not names["flag"]:
+        print("OKRPlan has no Action_Drift_Flag field; run ensure_okrplan_fields.py first")
+        sys.exit(1)
+    drifting_krs = {name[3:] for name in entities if name.startswith("kr:")}
+    drifting_owners = {name[6:] for name in entities if name.startswith("owner:")}
+    updates = []
+    for record_id, action in actions.items():
+        # Owner rules are about time spent outside OKRs, so they flag that owner's actions without a KR.
+        flag = action["kr"] in drifting_krs or (action["kr"] == NO_KR and action["owner"] in drifting_owners)
+        if flag != action["flag"]:
+            updates.append({"record_id": record_id, "fields": {names["flag"]: flag}})
+    print(f"Updated {batch_update_records(TOKEN, okr_table, updates)} drift flags.")
+
+print("Drift rules done.")
@@ -0,0 +1,309 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+from bisect import bisect_left, insort
+from datetime import date, datetime
+from urllib.error import HTTPError
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from urllib.request import Request, urlopen
+
+api_base = os.environ.get("FEISHU_API_BASE", "https://open.feishu.cn")
+app_id = os.environ.get("FEISHU_APP_ID")
+app_secret = os.environ.get("FEISHU_APP_SECRET")
+app_token = os.environ.get("FEISHU_BASE_APP_TOKEN")
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_INDEX = os.path.join(ROOT_DIR, "generated", "evidence_index.json")
+NO_KR = "(no KR)"
+# Tracking parameters that do not change what a link points to. Names are matched
+# exactly (from_date or fromId are real parameters); only utm_* is a prefix family.
+IGNORED_QUERY_PARAMS = {"spm", "from", "share_source", "share_medium", "share_from"}
+IGNORED_QUERY_PREFIXES = ("utm_",)
+
+
+def http_json(method, url, data=None, token=None):
+    body = None
+    headers = {"Content-Type": "application/json; charset=utf-8"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if data is not None:
+        body = json.dumps(data).encode("utf-8")
+    req = Request(url, data=body, headers=headers, method=method)
+    try:
+        with urlopen(req) as resp:
+            raw = resp.read().decode("utf-8")
+            return json.loads(raw)
+    except HTTPError as exc:
+        body = exc.read().decode("utf-8")
+        raise RuntimeError(f"HTTP {exc.code}: {body}") from exc
+
+
+def get_tenant_token():
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/auth/v3/tenant_access_token/internal",
+        {"app_id": app_id, "app_secret": app_secret},
+    )
+    token = resp.get("tenant_access_token")
+    if not token:
+        print("Failed to get tenant access token", resp)
+        sys.exit(1)
+    return token
+
+
+def get_tables(token):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables?page_size=100",
+        None,
+        token,
+    )
+    items = resp.get("data", {}).get("items", [])
+    return {item.get("name"): item.get("table_id") for item in items}
+
+
+def iter_records(token, table_id, page_size=500):
+    page_token = ""
+    while True:
+        url = f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records?page_size={page_size}"
+        if page_token:
+            url += f"&page_token={page_token}"
+        resp = http_json("GET", url, None, token)
+        data = resp.get("data") or {}
+        for item in data.get("items") or []:
+            yield item
+        page_token = data.get("page_token")
+        if not data.get("has_more") or not page_token:
+            break
+
+
+def batch_get_records(token, table_id, record_ids):
+    records = []
+    for i in range(0, len(record_ids), 100):
+        resp = http_json(
+            "POST",
+            f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_get",
+            {"record_ids": record_ids[i:i + 100]},
+            token,
+        )
+        records.extend((resp.get("data") or {}).get("records") or [])
+    return records
+
+
+def to_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float, bool)):
+        return str(value)
+    if isinstance(value, list):
+        return "".join(to_text(v) for v in value)
+    if isinstance(value, dict):
+        if value.get("link"):
+            return str(value.get("link"))
+        if value.get("text"):
+            return str(value.get("text"))
+        if value.get("name"):
+            return str(value.get("name"))
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def to_link_ids(value):
+    if isinstance(value, list):
+        ids = []
+        for item in value:
+            if isinstance(item, str):
+                ids.append(item)
+            elif isinstance(item, dict):
+                ids.extend(item.get("record_ids") or [])
+        return ids
+    if isinstance(value, dict):
+        return value.get("link_record_ids") or value.get("record_ids") or []
+    return []
+
+
+def week_key(day):
+    # Same numbering as WEEKNUM(date, 2) and week_buckets.py.
+    jan1 = date(day.year, 1, 1)
+    number = (day.timetuple().tm_yday - 1 + jan1.weekday()) // 7 + 1
+    return f"{day.year}-W{number:02d}"
+
+
+def normalize_link(link):
+    """Canonical form of an evidence link: lower-case host, no www/fragment/trailing slash/tracking params."""
+    link = link.strip()
+    if not link:
+        return ""
+    if "://" not in link:
+        link = "https://" + link
+    parts = urlsplit(link)
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    path = parts.path.rstrip("/")
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in IGNORED_QUERY_PARAMS and not k.lower().startswith(IGNORED_QUERY_PREFIXES)
+    )
+    return urlunsplit(("https" if parts.scheme in ("http", "https") else parts.scheme, host, path, urlencode(query), ""))
+
+
+def link_hash(link):
+    normalized = normalize_link(link)
+    if not normalized:
+        return None
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def make_entry(record):
+    values = record.get("fields") or {}
+    date_ms = values.get("Date")
+    if isinstance(date_ms, bool) or not isinstance(date_ms, (int, float)):
+        date_ms = None
+    kr_ids = to_link_ids(values.get("KeyResult"))
+    return {
+        "title": to_text(values.get("Evidence_Title")),
+        "type": to_text(values.get("Evidence_Type")),
+        "quality": values.get("Evidence_Quality"),
+        "date": int(date_ms) if date_ms is not None else None,
+        "week": week_key(datetime.fromtimestamp(date_ms / 1000).date()) if date_ms is not None else None,
+        "kr": kr_ids[0] if kr_ids else NO_KR,
+        "actions": to_link_ids(values.get("Action")),
+        "link_hash": link_hash(to_text(values.get("Link"))),
+    }
+
+
+def load_index(path):
+    if not os.path.exists(path):
+        return {"records": {}, "by_week": {}, "by_link": {}, "timeline": []}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_index(path, index):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def unlink(index, record_id):
+    entry = index["records"].pop(record_id, None)
+    if not entry:
+        return
+    if entry["week"]:
+        by_kr = index["by_week"].get(entry["week"], {})
+        ids = by_kr.get(entry["kr"], [])
+        if record_id in ids:
+            ids.remove(record_id)
+            if not ids:
+                del by_kr[entry["kr"]]
+            if not by_kr:
+                index["by_week"].pop(entry["week"], None)
+    if entry["link_hash"]:
+        ids = index["by_link"].get(entry["link_hash"], [])
+        if record_id in ids:
+            ids.remove(record_id)
+            if not ids:
+                del index["by_link"][entry["link_hash"]]
+    if entry["date"] is not None:
+        timeline = index["timeline"]
+        pos = bisect_left(timeline, [entry["date"], record_id])
+        if pos < len(timeline) and timeline[pos] == [entry["date"], record_id]:
+            del timeline[pos]
+
+
+def link(index, record_id, entry):
+    index["records"][record_id] = entry
+    if entry["week"]:
+        index["by_week"].setdefault(entry["week"], {}).setdefault(entry["kr"], []).append(record_id)
+    if entry["link_hash"]:
+        index["by_link"].setdefault(entry["link_hash"], []).append(record_id)
+    if entry["date"] is not None:
+        insort(index["timeline"], [entry["date"], record_id])
+
+
+def describe(index, record_id):
+    entry = index["records"][record_id]
+    day = datetime.fromtimestamp(entry["date"] / 1000).date().isoformat() if entry["date"] is not None else "-"
+    duplicates = len(index["by_link"].get(entry["link_hash"], [])) - 1 if entry["link_hash"] else 0
+    suffix = f" (duplicate link x{duplicates})" if duplicates > 0 else ""
+    return f"- {day} {record_id} [{entry['type'] or '-'}] {entry['title']} KR={entry['kr']}{suffix}"
+
+
+parser = argparse.ArgumentParser(description="Maintain a (week, KR) archive index for Evidence with link dedup.")
+parser.add_argument("--record-ids", default="", help="Only refresh these Evidence records (comma-separated)")
+parser.add_argument("--index", default=DEFAULT_INDEX, help="Local index file")
+parser.add_argument("--recent", type=int, help="Print the N most recent evidence from the index")
+parser.add_argument("--week", help="Print evidence of a week, e.g. 2026-W03")
+parser.add_argument("--kr", help="With --week, only this KR record id")
+parser.add_argument("--duplicates", action="store_true", help="Print evidence sharing a normalized link")
+args = parser.parse_args()
+
+index = load_index(args.index)
+if args.recent or args.week or args.duplicates:
+    # Queries are served from the index alone; no table read.
+    if args.recent:
+        print(f"Recent {args.recent} evidence:")
+        for _, record_id in reversed(index["timeline"][-args.recent:]):
+            print(describe(index, record_id))
+    if args.week:
+        by_kr = index["by_week"].get(args.week, {})
+        for kr, ids in sorted(by_kr.items()):
+            if args.kr and kr != args.kr:
+                continue
+            print(f"{args.week} / {kr}: {len(ids)} evidence")
+            for record_id in sorted(ids, key=lambda rid: index["records"][rid]["date"] or 0):
+                print(describe(index, record_id))
+    if args.duplicates:
+        groups = [ids for ids in index["by_link"].values() if len(ids) > 1]
+        print(f"Duplicate links: {len(groups)} groups")
+        for ids in groups:
+            print(f"- {', '.join(ids)}")
+    sys.exit(0)
+
+# Index queries above are local; only a refresh from the Base needs credentials.
+if not (app_id and app_secret and app_token):
+    print("Missing env vars: FEISHU_APP_ID/FEISHU_APP_SECRET/FEISHU_BASE_APP_TOKEN")
+    sys.exit(1)
+
+TOKEN = get_tenant_token()
+TABLES = get_tables(TOKEN)
+table_id = TABLES.get("Evidence")
+if not table_id:
+    print("Evidence table not found")
+    sys.exit(1)
+if index.get("table_id") not in (None, table_id):
+    index = {"records": {}, "by_week": {}, "by_link": {}, "timeline": []}
+index["table_id"] = table_id
+
+only_ids = [rid.strip() for rid in args.record_ids.split(",") if rid.strip()]
+records = batch_get_records(TOKEN, table_id, only_ids) if only_ids else iter_records(TOKEN, table_id)
+seen = set()
+changed = 0
+for record in records:
+    record_id = record.get("record_id")
+    seen.add(record_id)
+    entry = make_entry(record)
+    if index["records"].get(record_id) == entry:
+        continue
+    unlink(index, record_id)
+    link(index, record_id, entry)
+    changed += 1
+
+# In --record-ids mode an id missing from batch_get was deleted.
+candidates = only_ids if only_ids else list(index["records"])
+removed = [rid for rid in candidates if rid not in seen and rid in index["records"]]
+for record_id in removed:
+    unlink(index, record_id)
+
+duplicates = sum(len(ids) - 1 for ids in index["by_link"].values() if len(ids) > 1)
+index["updated_at"] = datetime.now().isoformat(timespec="seconds")
+save_index(args.index, index)
+print(f"Evidence: {len(seen)} read, {changed} re-indexed, {len(removed)} removed, {duplicates} duplicate links")
+print(f"Evidence index saved to {args.index}")
@@ -0,0 +1,413 @@
+import argparse
+import json
+import os
+import sys
+from datetime import date, datetime
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+api_base = os.environ.get("FEISHU_API_BASE", "https://open.feishu.cn")
+app_id = os.environ.get("FEISHU_APP_ID")
+app_secret = os.environ.get("FEISHU_APP_SECRET")
+app_token = os.environ.get("FEISHU_BASE_APP_TOKEN")
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_LEDGER = os.path.join(ROOT_DIR, "generated", "exploration_budget.json")
+BATCH_SIZE = 500
+DAY_MS = 86400000
+LATENESS_DAYS = 7
+UNASSIGNED = "(unassigned)"
+
+# PRD G E3: weekly exploration budget (hours and/or count) before an Idea may be promoted.
+DEFAULT_BUDGET_MINUTES = 240
+DEFAULT_BUDGET_COUNT = 2
+EXPLORING = "Doing"
+PROMOTED = "Approved"
+PARKED = "Parking"
+
+
+def http_json(method, url, data=None, token=None):
+    body = None
+    headers = {"Content-Type": "application/json; charset=utf-8"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if data is not None:
+        body = json.dumps(data).encode("utf-8")
+    req = Request(url, data=body, headers=headers, method=method)
+    try:
+        with urlopen(req) as resp:
+            raw = resp.read().decode("utf-8")
+            return json.loads(raw)
+    except HTTPError as exc:
+        body = exc.read().decode("utf-8")
+        raise RuntimeError(f"HTTP {exc.code}: {body}") from exc
+
+
+def get_tenant_token():
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/auth/v3/tenant_access_token/internal",
+        {"app_id": app_id, "app_secret": app_secret},
+    )
+    token = resp.get("tenant_access_token")
+    if not token:
+        print("Failed to get tenant access token", resp)
+        sys.exit(1)
+    return token
+
+
+def get_tables(token):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables?page_size=100",
+        None,
+        token,
+    )
+    items = resp.get("data", {}).get("items", [])
+    return {item.get("name"): item.get("table_id") for item in items}
+
+
+def iter_records(token, table_id, page_size=500):
+    page_token = ""
+    while True:
+        url = f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records?page_size={page_size}"
+        if page_token:
+            url += f"&page_token={page_token}"
+        resp = http_json("GET", url, None, token)
+        data = resp.get("data") or {}
+        for item in data.get("items") or []:
+            yield item
+        page_token = data.get("page_token")
+        if not data.get("has_more") or not page_token:
+            break
+
+
+def search_records(token, table_id, body, page_size=500):
+    page_token = ""
+    while True:
+        url = f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/search?page_size={page_size}"
+        if page_token:
+            url += f"&page_token={page_token}"
+        resp = http_json("POST", url, body, token)
+        data = resp.get("data") or {}
+        for item in data.get("items") or []:
+            yield item
+        page_token = data.get("page_token")
+        if not data.get("has_more") or not page_token:
+            break
+
+
+def batch_get_records(token, table_id, record_ids):
+    records = []
+    for i in range(0, len(record_ids), 100):
+        resp = http_json(
+            "POST",
+            f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_get",
+            {"record_ids": record_ids[i:i + 100]},
+            token,
+        )
+        records.extend((resp.get("data") or {}).get("records") or [])
+    return records
+
+
+def batch_update_records(token, table_id, records):
+    updated = 0
+    for i in range(0, len(records), BATCH_SIZE):
+        chunk = records[i:i + BATCH_SIZE]
+        resp = http_json(
+            "POST",
+            f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_update",
+            {"records": chunk},
+            token,
+        )
+        if resp.get("code") not in (0, None):
+            print(f"Failed to update {len(chunk)} records: {resp}")
+            continue
+        updated += len(chunk)
+    return updated
+
+
+def to_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float, bool)):
+        return str(value)
+    if isinstance(value, list):
+        return "".join(to_text(v) for v in value)
+    if isinstance(value, dict):
+        if value.get("text"):
+            return str(value.get("text"))
+        if value.get("name"):
+            return str(value.get("name"))
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def to_link_ids(value):
+    if isinstance(value, list):
+        ids = []
+        for item in value:
+            if isinstance(item, str):
+                ids.append(item)
+            elif isinstance(item, dict):
+                ids.extend(item.get("record_ids") or [])
+        return ids
+    if isinstance(value, dict):
+        return value.get("link_record_ids") or value.get("record_ids") or []
+    return []
+
+
+def to_number(value):
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(to_text(value))
+    except ValueError:
+        return None
+
+
+def week_key(day):
+    # Same numbering as WEEKNUM(date, 2) and week_buckets.py.
+    jan1 = date(day.year, 1, 1)
+    number = (day.timetuple().tm_yday - 1 + jan1.weekday()) // 7 + 1
+    return f"{day.year}-W{number:02d}"
+
+
+class Ledger:
+    """Running exploration totals per (owner, week); every lookup is a dict access."""
+
+    def __init__(self, data, budget_minutes, budget_count):
+        self.data = data
+        self.cells = data["cells"]
+        self.budget_minutes = budget_minutes
+        self.budget_count = budget_count
+
+    def cell(self, owner, week):
+        return self.cells.get(f"{owner}|{week}") or {"minutes": 0, "promoted": 0}
+
+    def add(self, owner, week, minutes=0, promoted=0):
+        key = f"{owner}|{week}"
+        cell = self.cells.setdefault(key, {"minutes": 0, "promoted": 0})
+        cell["minutes"] = round(cell["minutes"] + minutes, 2)
+        cell["promoted"] += promoted
+        if not cell["minutes"] and not cell["promoted"] and not cell.get("closed"):
+            del self.cells[key]
+
+    def reset_minutes(self, ideas):
+        """Drop all counted minutes and re-add the ideas' own, before re-reading every block."""
+        for key in list(self.cells):
+            cell = self.cells[key]
+            cell["minutes"] = 0
+            if not cell["promoted"] and not cell.get("closed"):
+                del self.cells[key]
+        for idea in ideas.values():
+            if idea.get("explored_week"):
+                self.add(idea["owner"], idea["explored_week"], minutes=idea["minutes"])
+
+    def can_promote(self, owner, week):
+        cell = self.cell(owner, week)
+        if cell.get("closed"):
+            return False, "week closed"
+        if cell["minutes"] > self.budget_minutes:
+            return False, f"exploration {cell['minutes']:.0f}/{self.budget_minutes} min over budget"
+        if cell["promoted"] >= self.budget_count:
+            return False, f"{cell['promoted']}/{self.budget_count} promotions used"
+        return True, f"{cell['minutes']:.0f}/{self.budget_minutes} min, {cell['promoted']}/{self.budget_count} promotions"
+
+
+def idea_entry(record, previous, week):
+    values = record.get("fields") or {}
+    status = to_text(values.get("Status"))
+    entry = {
+        "title": to_text(values.get("Idea_Title")),
+        "owner": to_text(values.get("Owner")) or UNASSIGNED,
+        "minutes": to_number(values.get("Est_Minutes")) or 0,
+        "status": status,
+        # Weeks are stamped when a transition is first observed and never move afterwards.
+        "explored_week": (previous or {}).get("explored_week"),
+        "promoted_week": (previous or {}).get("promoted_week"),
+    }
+    if status in (EXPLORING, PROMOTED) and not entry["explored_week"]:
+        entry["explored_week"] = week
+    if status == PROMOTED and not entry["promoted_week"]:
+        entry["promoted_week"] = week
+    return entry
+
+
+def apply_idea(ledger, idea, sign):
+    if idea.get("explored_week"):
+        ledger.add(idea["owner"], idea["explored_week"], minutes=sign * idea["minutes"])
+    if idea.get("promoted_week"):
+        ledger.add(idea["owner"], idea["promoted_week"], promoted=sign)
+
+
+def load_ledger(path):
+    if not os.path.exists(path):
+        return {"cells": {}, "ideas": {}, "blocks": {}, "watermark": None}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_ledger(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+parser = argparse.ArgumentParser(description="Per-owner weekly exploration budget ledger for Ideas and FocusBlocks.")
+parser.add_argument("--rescan", action="store_true", help="Reconcile against a full read of Ideas and FocusBlocks")
+parser.add_argument("--record-ids", default="", help="Refresh these Ideas records (comma-separated)")
+parser.add_argument("--check", help="Answer from the ledger whether an Idea can be promoted")
+parser.add_argument("--promote", default="", help="Set these Ideas to Approved when within budget (comma-separated)")
+parser.add_argument("--close-week", help="Close a week (e.g. 2026-W03): over-budget owners' Doing ideas go back to Parking")
+parser.add_argument("--budget-minutes", type=int, default=DEFAULT_BUDGET_MINUTES, help="Weekly exploration minutes")
+parser.add_argument("--budget-count", type=int, default=DEFAULT_BUDGET_COUNT, help="Weekly promotions")
+parser.add_argument("--dry-run", action="store_true", help="Do not write Ideas")
+parser.add_argument("--ledger", default=DEFAULT_LEDGER, help="Local ledger file")
+args = parser.parse_args()
+
+data = load_ledger(args.ledger)
+ledger = Ledger(data, args.budget_minutes, args.budget_count)
+this_week = week_key(datetime.now().date())
+
+if args.check:
+    idea = data["ideas"].get(args.check)
+    if not idea:
+        print(f"{args.check}: not in ledger (run with --record-ids {args.check} first)")
+        sys.exit(1)
+    allowed, reason = ledger.can_promote(idea["owner"], this_week)
+    print(f"{args.check} ({idea['owner']}, {this_week}): {'yes' if allowed else 'no'} - {reason}")
+    sys.exit(0 if allowed else 2)
+
+# --check above is answered from the ledger; every other path talks to the Base.
+if not (app_id and app_secret and app_token):
+    print("Missing env vars: FEISHU_APP_ID/FEISHU_APP_SECRET/FEISHU_BASE_APP_TOKEN")
+    sys.exit(1)
+
+TOKEN = get_tenant_token()
+TABLES = get_tables(TOKEN)
+ideas_table = TABLES.get("Ideas")
+blocks_table = TABLES.get("FocusBlocks")
+if not ideas_table:
+    print("Ideas table not found")
+    sys.exit(1)
+
+# Ideas: full reconcile on first run or --rescan, otherwise only the given records.
+ideas = data["ideas"]
+only_ids = [rid.strip() for rid in args.record_ids.split(",") if rid.strip()]
+promote_ids = [rid.strip() for rid in args.promote.split(",") if rid.strip()]
+full = args.rescan or not ideas
+wanted = sorted(set(only_ids) | set(promote_ids))
+records = iter_records(TOKEN, ideas_table) if full else batch_get_records(TOKEN, ideas_table, wanted) if wanted else []
+seen = set()
+changed = 0
+for record in records:
+    record_id = record.get("record_id")
+    seen.add(record_id)
+    previous = ideas.get(record_id)
+    entry = idea_entry(record, previous, this_week)
+    if entry == previous:
+        continue
+    if previous:
+        apply_idea(ledger, previous, -1)
+    apply_idea(ledger, entry, 1)
+    ideas[record_id] = entry
+    changed += 1
+for record_id in [rid for rid in (ideas if full else wanted) if rid not in seen and rid in ideas]:
+    apply_idea(ledger, ideas.pop(record_id), -1)
+    changed += 1
+
+# FocusBlocks without a KR/Action link are exploration time; read past the watermark only.
+blocks = data["blocks"]
+block_reads = 0
+if blocks_table:
+    if args.rescan:
+        # Blocks below the horizon were pruned from the ledger but their minutes are still
+        # in the cells; without a reset the full read would count them a second time.
+        ledger.reset_minutes(ideas)
+        blocks.clear()
+        data["watermark"] = None
+    query = {"automatic_fields": False}
+    if data["watermark"] is not None and not args.rescan:
+        since = data["watermark"] - LATENESS_DAYS * DAY_MS
+        query["filter"] = {
+            "conjunction": "and",
+            "conditions": [{"field_name": "Start_Time", "operator": "isGreater", "value": ["ExactDate", str(since)]}],
+        }
+    for record in search_records(TOKEN, blocks_table, query):
+        values = record.get("fields") or {}
+        start_ms = to_number(values.get("Start_Time"))
+        if start_ms is None:
+            continue
+        block_reads += 1
+        aligned = to_link_ids(values.get("KR")) or to_link_ids(values.get("Action"))
+        block = {
+            "start": int(start_ms),
+            "owner": to_text(values.get("Owner")) or UNASSIGNED,
+            "week": week_key(datetime.fromtimestamp(start_ms / 1000).date()),
+            "minutes": 0 if aligned else to_number(values.get("Minutes")) or 0,
+        }
+        previous = blocks.get(record.get("record_id"))
+        if previous == block:
+            continue
+        if previous:
+            ledger.add(previous["owner"], previous["week"], minutes=-previous["minutes"])
+        ledger.add(block["owner"], block["week"], minutes=block["minutes"])
+        blocks[record.get("record_id")] = block
+        data["watermark"] = max(data["watermark"] or 0, block["start"])
+    horizon = (data["watermark"] or 0) - LATENESS_DAYS * DAY_MS
+    for record_id in [rid for rid, b in blocks.items() if b["start"] <= horizon]:
+        del blocks[record_id]
+print(f"Ledger: {changed} ideas changed, {block_reads} focus blocks read, {len(data['cells'])} owner-weeks")
+
+updates = []
+if promote_ids:
+    for record_id in promote_ids:
+        idea = ideas.get(record_id)
+        if not idea:
+            print(f"- {record_id}: not found")
+            continue
+        if idea["status"] == PROMOTED:
+            print(f"- {record_id}: already {PROMOTED}")
+            continue
+        allowed, reason = ledger.can_promote(idea["owner"], this_week)
+        print(f"- {record_id} {idea['title']}: {'promote' if allowed else 'blocked'} ({reason})")
+        if allowed:
+            promoted = dict(idea, status=PROMOTED)
+            promoted["explored_week"] = promoted["explored_week"] or this_week
+            promoted["promoted_week"] = this_week
+            apply_idea(ledger, idea, -1)
+            apply_idea(ledger, promoted, 1)
+            ideas[record_id] = promoted
+            updates.append({"record_id": record_id, "fields": {"Status": PROMOTED}})
+
+if args.close_week:
+    over = set()
+    for key, cell in data["cells"].items():
+        owner, week = key.rsplit("|", 1)
+        if week == args.close_week:
+            cell["closed"] = True
+            if cell["minutes"] > args.budget_minutes:
+                over.add(owner)
+    parked = [rid for rid, idea in ideas.items() if idea["status"] == EXPLORING and idea["owner"] in over
+              and idea["explored_week"] == args.close_week]
+    for record_id in parked:
+        ideas[record_id]["status"] = PARKED
+        updates.append({"record_id": record_id, "fields": {"Status": PARKED}})
+    print(f"Closed {args.close_week}: {len(over)} owners over budget, {len(parked)} ideas back to {PARKED}")
+
+if updates and not args.dry_run:
+    print(f"Updated {batch_update_records(TOKEN, ideas_table, updates)} ideas")
+if not args.dry_run:
+    save_ledger(args.ledger, data)
+
+for key in sorted(k for k in data["cells"] if k.endswith(this_week)):
+    owner = key.rsplit("|", 1)[0]
+    allowed, reason = ledger.can_promote(owner, this_week)
+    print(f"- {owner} {this_week}: {reason}{'' if allowed else ' (no promotions)'}")
@@ -0,0 +1,276 @@
+import argparse
+import json
+import math
+import os
+import struct
+import sys
+from array import array
+from datetime import datetime
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+api_base = os.environ.get("FEISHU_API_BASE", "https://open.feishu.cn")
+app_id = os.environ.get("FEISHU_APP_ID")
+app_secret = os.environ.get("FEISHU_APP_SECRET")
+app_token = os.environ.get("FEISHU_BASE_APP_TOKEN")
+
+if not (app_id and app_secret and app_token):
+    print("Missing env vars: FEISHU_APP_ID/FEISHU_APP_SECRET/FEISHU_BASE_APP_TOKEN")
+    sys.exit(1)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_TABLES = ["OKRPlan", "Evidence", "Ideas", "FocusBlocks", "UsageGuide"]
+DEFAULT_OUT = os.path.join(ROOT_DIR, "generated", "snapshots")
+
+# Must match snapshot_reader.py
+MAGIC = b"OKRSNAP1"
+TS_NULL = -(2**63)
+
+NUMBER_TYPES = {2, 99002, 99003, 99004}
+TIMESTAMP_TYPES = {5, 1001, 1002}
+CHECKBOX_TYPES = {7}
+
+
+def http_json(method, url, data=None, token=None):
+    body = None
+    headers = {"Content-Type": "application/json; charset=utf-8"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if data is not None:
+        body = json.dumps(data).encode("utf-8")
+    req = Request(url, data=body, headers=headers, method=method)
+    try:
+        with urlopen(req) as resp:
+            raw = resp.read().decode("utf-8")
+            return json.loads(raw)
+    except HTTPError as exc:
+        body = exc.read().decode("utf-8")
+        raise RuntimeError(f"HTTP {exc.code}: {body}") from exc
+
+
+def get_tenant_token():
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/auth/v3/tenant_access_token/internal",
+        {"app_id": app_id, "app_secret": app_secret},
+    )
+    token = resp.get("tenant_access_token")
+    if not token:
+        print("Failed to get tenant access token", resp)
+        sys.exit(1)
+    return token
+
+
+def get_tables(token):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables?page_size=100",
+        None,
+        token,
+    )
+    items = resp.get("data", {}).get("items", [])
+    return {item.get("name"): item.get("table_id") for item in items}
+
+
+def get_fields(token, table_id):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/fields?page_size=200",
+        None,
+        token,
+    )
+    return resp.get("data", {}).get("items", [])
+
+
+def iter_records(token, table_id, page_size=500):
+    page_token = ""
+    while True:
+        url = f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records?page_size={page_size}"
+        if page_token:
+            url += f"&page_token={page_token}"
+        resp = http_json("GET", url, None, token)
+        data = resp.get("data") or {}
+        for item in data.get("items") or []:
+            yield item
+        page_token = data.get("page_token")
+        if not data.get("has_more") or not page_token:
+            break
+
+
+def to_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, list):
+        if value and all(isinstance(v, dict) and "record_ids" in v for v in value):
+            return ",".join(rid for v in value for rid in v.get("record_ids") or [])
+        if value and all(isinstance(v, dict) and "text" not in v and "name" in v for v in value):
+            return ",".join(str(v.get("name")) for v in value)
+        if value and all(isinstance(v, str) for v in value):
+            return ",".join(value)
+        return "".join(to_text(v) for v in value)
+    if isinstance(value, dict):
+        if value.get("link_record_ids") is not None:
+            return ",".join(value.get("link_record_ids") or [])
+        if value.get("link"):
+            return str(value.get("link"))
+        if value.get("text"):
+            return str(value.get("text"))
+        if value.get("name"):
+            return str(value.get("name"))
+        return json.dumps(value, ensure_ascii=False, sort_keys=True)
+    return str(value)
+
+
+def to_number(value):
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return math.nan
+    return math.nan
+
+
+class ColumnBuilder:
+    def __init__(self, name, field_type):
+        self.name = name
+        self.field_type = field_type
+        if field_type in NUMBER_TYPES:
+            self.kind = "f64"
+            self.values = array("d")
+        elif field_type in TIMESTAMP_TYPES:
+            self.kind = "ts"
+            self.values = array("q")
+        elif field_type in CHECKBOX_TYPES:
+            self.kind = "u8"
+            self.values = array("B")
+        else:
+            self.kind = "dict"
+            self.values = array("I")
+            self.codes = {}
+
+    def append(self, value):
+        if self.kind == "f64":
+            self.values.append(math.nan if value is None else to_number(value))
+        elif self.kind == "ts":
+            self.values.append(int(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else TS_NULL)
+        elif self.kind == "u8":
+            self.values.append(1 if value else 0)
+        else:
+            text = to_text(value)
+            if text == "":
+                self.values.append(0)
+                return
+            code = self.codes.get(text)
+            if code is None:
+                code = len(self.codes) + 1
+                self.codes[text] = code
+            self.values.append(code)
+
+
+def to_le_bytes(values):
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def write_snapshot(path, table_name, builders, rows):
+    blocks = []
+    columns = []
+    cursor = 0
+
+    def add_block(payload):
+        nonlocal cursor
+        offset = cursor
+        blocks.append(payload)
+        pad = (-len(payload)) % 8
+        if pad:
+            blocks.append(b"\0" * pad)
+        cursor += len(payload) + pad
+        return offset
+
+    for builder in builders:
+        payload = to_le_bytes(builder.values)
+        meta = {
+            "name": builder.name,
+            "kind": builder.kind,
+            "field_type": builder.field_type,
+            "offset": add_block(payload),
+            "nbytes": len(payload),
+        }
+        if builder.kind == "dict":
+            ends = array("I")
+            blob = bytearray()
+            for text in builder.codes:
+                blob.extend(text.encode("utf-8"))
+                ends.append(len(blob))
+            meta["dict_count"] = len(ends)
+            meta["dict_offsets"] = add_block(to_le_bytes(ends))
+            meta["dict_blob"] = add_block(bytes(blob))
+            meta["dict_nbytes"] = len(blob)
+        columns.append(meta)
+
+    header = {
+        "table": table_name,
+        "rows": rows,
+        "app_token": app_token,
+        "exported_at": datetime.now().isoformat(timespec="seconds"),
+        "columns": columns,
+    }
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    prefix = MAGIC + struct.pack("<I", len(header_bytes)) + header_bytes
+    prefix += b"\0" * ((-len(prefix)) % 8)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(prefix)
+        for block in blocks:
+            f.write(block)
+    os.replace(tmp_path, path)
+    return len(prefix) + cursor
+
+
+def export_table(token, table_name, table_id, out_dir):
+    fields = get_fields(token, table_id)
+    builders = [ColumnBuilder("record_id", 1)]
+    builders += [ColumnBuilder(f.get("field_name"), f.get("type")) for f in fields]
+    rows = 0
+    for record in iter_records(token, table_id):
+        values = record.get("fields") or {}
+        builders[0].append(record.get("record_id"))
+        for builder in builders[1:]:
+            builder.append(values.get(builder.name))
+        rows += 1
+    path = os.path.join(out_dir, f"{table_name}.okrs")
+    size = write_snapshot(path, table_name, builders, rows)
+    return path, rows, size
+
+
+parser = argparse.ArgumentParser(description="Export tables to columnar binary snapshots.")
+parser.add_argument("--tables", default=",".join(DEFAULT_TABLES), help="Comma-separated table names")
+parser.add_argument("--out", default=DEFAULT_OUT, help="Output directory")
+args = parser.parse_args()
+
+TOKEN = get_tenant_token()
+TABLES = get_tables(TOKEN)
+os.makedirs(args.out, exist_ok=True)
+
+for name in [t.strip() for t in args.tables.split(",") if t.strip()]:
+    table_id = TABLES.get(name)
+    if not table_id:
+        print(f"Table not found: {name}")
+        continue
+    path, rows, size = export_table(TOKEN, name, table_id, args.out)
+    print(f"Exported {name}: {rows} rows, {size} bytes -> {path}")
+
+print("Snapshot export done.")
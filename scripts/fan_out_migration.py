@@ -0,0 +1,157 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+app_id = os.environ.get("FEISHU_APP_ID")
+app_secret = os.environ.get("FEISHU_APP_SECRET")
+
+if not (app_id and app_secret):
+    print("Missing env vars: FEISHU_APP_ID/FEISHU_APP_SECRET")
+    sys.exit(1)
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPTS_DIR)
+DEFAULT_REPORT = os.path.join(ROOT_DIR, "generated", "fanout_report.json")
+LOG_DIR = os.path.join(ROOT_DIR, "generated", "fanout_logs")
+
+
+class LaunchThrottle:
+    """Spaces out script launches so all Bases together stay under a tenant-wide start rate."""
+
+    def __init__(self, per_second):
+        self.interval = 1.0 / per_second if per_second > 0 else 0.0
+        self.lock = threading.Lock()
+        self.next_at = 0.0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            start_at = max(now, self.next_at)
+            self.next_at = start_at + self.interval
+        delay = start_at - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run one migration script against many Bases in parallel.")
+    parser.add_argument("script", help="Script in scripts/, e.g. ensure_okrplan_fields.py")
+    parser.add_argument("--tokens", default="", help="Comma-separated app_tokens")
+    parser.add_argument("--tokens-file", help="File with one app_token per line (# for comments)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Max Bases migrated at the same time")
+    parser.add_argument("--starts-per-second", type=float, default=2.0, help="Max script launches per second")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Seconds before a single Base run is killed")
+    parser.add_argument("--report", default=DEFAULT_REPORT, help="Where to write the JSON report")
+    return parser.parse_args()
+
+
+def load_tokens(args):
+    tokens = [t.strip() for t in args.tokens.split(",") if t.strip()]
+    if args.tokens_file:
+        with open(args.tokens_file, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+                if line:
+                    tokens.append(line)
+    seen = set()
+    unique = []
+    for token in tokens:
+        if token not in seen:
+            seen.add(token)
+            unique.append(token)
+    return unique
+
+
+def run_for_base(script_path, token, timeout, throttle):
+    throttle.wait()
+    env = dict(os.environ)
+    env["FEISHU_BASE_APP_TOKEN"] = token
+    started = time.monotonic()
+    try:
+        proc = subprocess.run(
+            [sys.executable, script_path],
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+        status = "ok" if proc.returncode == 0 else "failed"
+        exit_code = proc.returncode
+        output = proc.stdout + proc.stderr
+    except subprocess.TimeoutExpired as exc:
+        status = "timeout"
+        exit_code = None
+        output = (exc.stdout or "") + (exc.stderr or "")
+        if isinstance(output, bytes):
+            output = output.decode("utf-8", "replace")
+    elapsed = time.monotonic() - started
+
+    log_path = os.path.join(LOG_DIR, os.path.splitext(os.path.basename(script_path))[0], f"{token}.log")
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    with open(log_path, "w", encoding="utf-8") as f:
+        f.write(output)
+
+    lines = [line for line in output.splitlines() if line.strip()]
+    warnings = [line for line in lines if line.startswith("Failed")]
+    return {
+        "app_token": token,
+        "status": status,
+        "exit_code": exit_code,
+        "seconds": round(elapsed, 3),
+        "warnings": len(warnings),
+        "last_line": lines[-1] if lines else "",
+        "log": os.path.relpath(log_path, ROOT_DIR),
+    }
+
+
+args = parse_args()
+script_path = os.path.join(SCRIPTS_DIR, os.path.basename(args.script))
+if not os.path.isfile(script_path) or not script_path.endswith(".py"):
+    print(f"Script not found: {args.script}")
+    sys.exit(1)
+
+tokens = load_tokens(args)
+if not tokens:
+    print("No app_tokens given. Use --tokens or --tokens-file.")
+    sys.exit(1)
+
+concurrency = max(1, min(args.concurrency, len(tokens)))
+throttle = LaunchThrottle(args.starts_per_second)
+print(f"Running {os.path.basename(script_path)} on {len(tokens)} Bases (concurrency {concurrency})")
+
+wall_start = time.monotonic()
+results = []
+with ThreadPoolExecutor(max_workers=concurrency) as pool:
+    futures = [pool.submit(run_for_base, script_path, token, args.timeout, throttle) for token in tokens]
+    for future in futures:
+        result = future.result()
+        results.append(result)
+        flag = f" ({result['warnings']} warnings)" if result["warnings"] else ""
+        print(f"- {result['app_token']}: {result['status']} in {result['seconds']:.1f}s{flag}")
+wall_seconds = time.monotonic() - wall_start
+
+ok_count = sum(1 for r in results if r["status"] == "ok")
+serial_seconds = sum(r["seconds"] for r in results)
+report = {
+    "script": os.path.basename(script_path),
+    "bases": len(results),
+    "ok": ok_count,
+    "failed": len(results) - ok_count,
+    "concurrency": concurrency,
+    "wall_seconds": round(wall_seconds, 3),
+    "serial_seconds": round(serial_seconds, 3),
+    "results": results,
+}
+os.makedirs(os.path.dirname(os.path.abspath(args.report)), exist_ok=True)
+with open(args.report, "w", encoding="utf-8") as f:
+    json.dump(report, f, ensure_ascii=False, indent=2)
+
+print(f"{ok_count}/{len(results)} Bases ok; wall {wall_seconds:.1f}s vs serial {serial_seconds:.1f}s")
+print(f"Report saved to {args.report}")
+if ok_count != len(results):
+    sys.exit(1)
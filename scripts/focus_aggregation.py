@@ -0,0 +1,473 @@
+import argparse
+import json
+import os
+import sys
+from datetime import date, datetime
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from aimd_limiter import HTTP_TIMEOUT, run_adaptive
+
+api_base = os.environ.get("FEISHU_API_BASE", "https://open.feishu.cn")
+app_id = os.environ.get("FEISHU_APP_ID")
+app_secret = os.environ.get("FEISHU_APP_SECRET")
+app_token = os.environ.get("FEISHU_BASE_APP_TOKEN")
+
+if not (app_id and app_secret and app_token):
+    print("Missing env vars: FEISHU_APP_ID/FEISHU_APP_SECRET/FEISHU_BASE_APP_TOKEN")
+    sys.exit(1)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_STATE = os.path.join(ROOT_DIR, "generated", "focus_aggregation.json")
+BATCH_SIZE = 500
+DAY_MS = 86400000
+# Blocks are usually logged the same day; re-read this far behind the watermark
+# to pick up late entries and edits.
+LATENESS_DAYS = 7
+ALL_KRS = "(all)"
+# Robust z-score (median/MAD) above which a KR's effort-to-progress ratio is an outlier.
+OUTLIER_Z = 3.5
+# Minutes on a KR with no progress at all that is flagged regardless of the distribution.
+STALLED_MINUTES = 120
+
+STATS_TABLE = "FocusStats"
+STATS_FIELDS = [
+    {"field_name": "Stat_Key", "type": 1},
+    {"field_name": "Week", "type": 1},
+    {"field_name": "KR", "type": 1},
+    {"field_name": "Focus_Minutes", "type": 2},
+    {"field_name": "Week_Minutes", "type": 2},
+    {"field_name": "Aligned_Ratio", "type": 2},
+    {"field_name": "KR_Progress", "type": 2},
+    {"field_name": "Effort_Ratio", "type": 2},
+    {"field_name": "Outlier", "type": 7},
+]
+KR_CANDIDATES = ["Key Results", "KR_Title", "KR"]
+PROGRESS_CANDIDATES = ["KR_Progress", "KR Progress", "Progress"]
+
+
+def http_json(method, url, data=None, token=None):
+    body = None
+    headers = {"Content-Type": "application/json; charset=utf-8"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if data is not None:
+        body = json.dumps(data).encode("utf-8")
+    req = Request(url, data=body, headers=headers, method=method)
+    try:
+        with urlopen(req, timeout=HTTP_TIMEOUT) as resp:
+            raw = resp.read().decode("utf-8")
+            return json.loads(raw)
+    except HTTPError as exc:
+        body = exc.read().decode("utf-8")
+        raise RuntimeError(f"HTTP {exc.code}: {body}") from exc
+
+
+def get_tenant_token():
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/auth/v3/tenant_access_token/internal",
+        {"app_id": app_id, "app_secret": app_secret},
+    )
+    token = resp.get("tenant_access_token")
+    if not token:
+        print("Failed to get tenant access token", resp)
+        sys.exit(1)
+    return token
+
+
+def get_tables(token):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables?page_size=100",
+        None,
+        token,
+    )
+    items = resp.get("data", {}).get("items", [])
+    return {item.get("name"): item.get("table_id") for item in items}
+
+
+def get_fields(token, table_id):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/fields?page_size=200",
+        None,
+        token,
+    )
+    return resp.get("data", {}).get("items", [])
+
+
+def create_table(token, name, fields):
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables",
+        {"table": {"name": name, "fields": fields}},
+        token,
+    )
+    table_id = (resp.get("data") or {}).get("table_id")
+    if not table_id:
+        print(f"Failed to create table {name}: {resp}")
+    return table_id
+
+
+def search_records(token, table_id, body, page_size=500):
+    page_token = ""
+    while True:
+        url = f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/search?page_size={page_size}"
+        if page_token:
+            url += f"&page_token={page_token}"
+        resp = http_json("POST", url, body, token)
+        data = resp.get("data") or {}
+        for item in data.get("items") or []:
+            yield item
+        page_token = data.get("page_token")
+        if not data.get("has_more") or not page_token:
+            break
+
+
+def batch_get_records(token, table_id, record_ids):
+    records = []
+    for i in range(0, len(record_ids), 100):
+        resp = http_json(
+            "POST",
+            f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_get",
+            {"record_ids": record_ids[i:i + 100]},
+            token,
+        )
+        records.extend((resp.get("data") or {}).get("records") or [])
+    return records
+
+
+def batch_write(token, table_id, op, records):
+    chunks = [records[i:i + BATCH_SIZE] for i in range(0, len(records), BATCH_SIZE)]
+    if not chunks:
+        return []
+
+    def send(chunk):
+        return http_json(
+            "POST",
+            f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/{op}",
+            {"records": chunk},
+            token,
+        )
+
+    responses, report = run_adaptive(chunks, send, retry_timeouts=op != "batch_create")
+    print(f"  {op}: {report}")
+    results = []
+    for chunk, resp in zip(chunks, responses):
+        if resp.get("code") not in (0, None):
+            print(f"Failed to {op} {len(chunk)} records: {resp}")
+            results.extend([None] * len(chunk))
+            continue
+        results.extend((resp.get("data") or {}).get("records") or [{}] * len(chunk))
+    return results
+
+
+def to_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float, bool)):
+        return str(value)
+    if isinstance(value, list):
+        return "".join(to_text(v) for v in value)
+    if isinstance(value, dict):
+        if value.get("text"):
+            return str(value.get("text"))
+        if value.get("name"):
+            return str(value.get("name"))
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def to_link_ids(value):
+    if isinstance(value, list):
+        ids = []
+        for item in value:
+            if isinstance(item, str):
+                ids.append(item)
+            elif isinstance(item, dict):
+                ids.extend(item.get("record_ids") or [])
+        return ids
+    if isinstance(value, dict):
+        return value.get("link_record_ids") or value.get("record_ids") or []
+    return []
+
+
+def to_number(value):
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(to_text(value))
+    except ValueError:
+        return None
+
+
+def week_key(day):
+    # Same numbering as WEEKNUM(date, 2) and week_buckets.py.
+    jan1 = date(day.year, 1, 1)
+    number = (day.timetuple().tm_yday - 1 + jan1.weekday()) // 7 + 1
+    return f"{day.year}-W{number:02d}"
+
+
+def block_minutes(values):
+    minutes = to_number(values.get("Minutes"))
+    if minutes is None:
+        start, end = to_number(values.get("Start_Time")), to_number(values.get("End_Time"))
+        if start is not None and end is not None and end > start:
+            minutes = (end - start) / 60000
+    return round(minutes or 0, 2)
+
+
+def median(values):
+    ordered = sorted(values)
+    mid = len(ordered) // 2
+    return ordered[mid] if len(ordered) % 2 else (ordered[mid - 1] + ordered[mid]) / 2
+
+
+def flag_outliers(ratios):
+    """KR -> True when its effort-to-progress ratio is far above the others (robust z-score)."""
+    finite = [r for r in ratios.values() if r is not None]
+    flags = {kr: False for kr in ratios}
+    if len(finite) >= 3:
+        center = median(finite)
+        mad = median([abs(r - center) for r in finite])
+        if mad:
+            for kr, ratio in ratios.items():
+                flags[kr] = ratio is not None and 0.6745 * (ratio - center) / mad > OUTLIER_Z
+    return flags
+
+
+def load_state(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(path, state):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def read_stat_rows(token, table_id):
+    """Existing FocusStats rows by Stat_Key, plus record ids of duplicate keys.
+
+    Adopted rows carry no values, so the next diff rewrites each of them once.
+    """
+    rows, duplicates = {}, []
+    for record in search_records(token, table_id, {"automatic_fields": False}):
+        key = to_text((record.get("fields") or {}).get("Stat_Key"))
+        if not key or key in rows:
+            duplicates.append(record.get("record_id"))
+            continue
+        rows[key] = {"record_id": record.get("record_id"), "values": None}
+    return rows, duplicates
+
+
+parser = argparse.ArgumentParser(description="Aggregate FocusBlocks minutes per KR per week since the last watermark.")
+parser.add_argument("--full", action="store_true", help="Ignore the watermark and rebuild from all blocks")
+parser.add_argument("--dry-run", action="store_true", help="Print the aggregates without writing FocusStats")
+parser.add_argument("--state", default=DEFAULT_STATE, help="Local state file")
+args = parser.parse_args()
+
+TOKEN = get_tenant_token()
+TABLES = get_tables(TOKEN)
+blocks_table = TABLES.get("FocusBlocks")
+okr_table = TABLES.get("OKRPlan")
+if not (blocks_table and okr_table):
+    print("FocusBlocks/OKRPlan table not found")
+    sys.exit(1)
+
+previous = load_state(args.state)
+state = None if args.full else previous
+if state is None:
+    state = {"watermark": None, "blocks": {}, "weeks": {}, "kr_rows": {}, "rows": {}}
+    if previous:
+        # --full rebuilds the totals but keeps the written rows, so they are updated rather than duplicated.
+        state["rows"], state["stats_table"] = previous.get("rows", {}), previous.get("stats_table")
+blocks = state["blocks"]
+weeks = state["weeks"]
+
+query = {"automatic_fields": False}
+since = None
+if state["watermark"] is not None:
+    since = state["watermark"] - LATENESS_DAYS * DAY_MS
+    query["filter"] = {
+        "conjunction": "and",
+        "conditions": [{"field_name": "Start_Time", "operator": "isGreater", "value": ["ExactDate", str(since)]}],
+    }
+
+fresh = {}
+for record in search_records(TOKEN, blocks_table, query):
+    values = record.get("fields") or {}
+    start_ms = to_number(values.get("Start_Time"))
+    if start_ms is None:
+        continue
+    kr_row = (to_link_ids(values.get("KR")) or to_link_ids(values.get("Action")) or [None])[0]
+    fresh[record.get("record_id")] = {
+        "start": int(start_ms),
+        "week": week_key(datetime.fromtimestamp(start_ms / 1000).date()),
+        "kr_row": kr_row,
+        "minutes": block_minutes(values),
+    }
+
+# Resolve linked OKRPlan rows to KR names and progress; unseen rows first, then refresh the rest.
+kr_rows = state["kr_rows"]
+wanted = sorted({b["kr_row"] for b in fresh.values() if b["kr_row"]} | set(kr_rows))
+okr_field_names = {f.get("field_name") for f in get_fields(TOKEN, okr_table)}
+kr_field = next((n for n in KR_CANDIDATES if n in okr_field_names), None)
+progress_field = next((n for n in PROGRESS_CANDIDATES if n in okr_field_names), None)
+found = set()
+for record in batch_get_records(TOKEN, okr_table, wanted):
+    values = record.get("fields") or {}
+    found.add(record.get("record_id"))
+    progress = to_number(values.get(progress_field)) if progress_field else None
+    kr_rows[record.get("record_id")] = {
+        "kr": to_text(values.get(kr_field)).strip() if kr_field else "",
+        "progress": (progress * 100 if progress is not None and progress <= 1 else progress) or 0,
+    }
+for record_id in list(kr_rows):
+    if record_id not in found:
+        del kr_rows[record_id]
+
+
+def kr_of(block):
+    row = kr_rows.get(block["kr_row"]) if block["kr_row"] else None
+    return row["kr"] if row and row["kr"] else None
+
+
+def contribute(block, sign):
+    week = weeks.setdefault(block["week"], {"total": 0, "krs": {}})
+    week["total"] = round(week["total"] + sign * block["minutes"], 2)
+    kr = block["kr"]
+    if kr:
+        week["krs"][kr] = round(week["krs"].get(kr, 0) + sign * block["minutes"], 2)
+        if not week["krs"][kr]:
+            del week["krs"][kr]
+    if not week["total"] and not week["krs"]:
+        del weeks[block["week"]]
+
+
+added = updated = 0
+for record_id, block in fresh.items():
+    # The KR a block counted toward is stored with it, so a later rename of the
+    # KR row subtracts from the right bucket.
+    block["kr"] = kr_of(block)
+    old = blocks.get(record_id)
+    if old == block:
+        continue
+    if old:
+        contribute(old, -1)
+        updated += 1
+    else:
+        added += 1
+    contribute(block, 1)
+    blocks[record_id] = block
+
+# Every tracked block lies inside the re-read window, so one that was not read back was
+# deleted (or lost its Start_Time). The first day is skipped: the date filter is day-grained.
+removed = [
+    record_id
+    for record_id, block in blocks.items()
+    if record_id not in fresh and (since is None or block["start"] >= since + DAY_MS)
+]
+for record_id in removed:
+    contribute(blocks.pop(record_id), -1)
+
+if fresh:
+    state["watermark"] = max([state["watermark"] or 0] + [b["start"] for b in fresh.values()])
+# Blocks older than the re-read window can no longer be seen again; keep only their totals.
+horizon = (state["watermark"] or 0) - LATENESS_DAYS * DAY_MS
+for record_id in [rid for rid, b in blocks.items() if b["start"] <= horizon]:
+    del blocks[record_id]
+print(f"FocusBlocks: {len(fresh)} read since watermark, {added} new, {updated} changed, {len(removed)} removed")
+
+# Effort-to-progress: cumulative focus minutes per progress point of the KR.
+progress_by_kr = {row["kr"]: row["progress"] for row in kr_rows.values() if row["kr"]}
+cumulative = {}
+for week in weeks.values():
+    for kr, minutes in week["krs"].items():
+        cumulative[kr] = cumulative.get(kr, 0) + minutes
+ratios = {kr: round(minutes / progress_by_kr[kr], 2) if progress_by_kr.get(kr) else None for kr, minutes in cumulative.items()}
+outliers = flag_outliers(ratios)
+for kr, minutes in cumulative.items():
+    if ratios[kr] is None and minutes >= STALLED_MINUTES:
+        outliers[kr] = True
+
+target = {}
+for week_name, week in weeks.items():
+    aligned = sum(week["krs"].values())
+    target[f"{week_name}|{ALL_KRS}"] = {
+        "Week": week_name,
+        "KR": ALL_KRS,
+        "Focus_Minutes": aligned,
+        "Week_Minutes": week["total"],
+        "Aligned_Ratio": round(aligned / week["total"], 4) if week["total"] else 0,
+    }
+    for kr, minutes in week["krs"].items():
+        target[f"{week_name}|{kr}"] = {
+            "Week": week_name,
+            "KR": kr,
+            "Focus_Minutes": minutes,
+            "Week_Minutes": week["total"],
+            "Aligned_Ratio": round(minutes / week["total"], 4) if week["total"] else 0,
+            "KR_Progress": progress_by_kr.get(kr, 0),
+            "Effort_Ratio": ratios.get(kr),
+            "Outlier": outliers.get(kr, False),
+        }
+
+flagged = sorted(kr for kr, flag in outliers.items() if flag)
+print(f"Weeks: {len(weeks)}, KRs: {len(cumulative)}, outliers: {', '.join(flagged) or 'none'}")
+
+rows = state["rows"]
+stats_table = TABLES.get(STATS_TABLE)
+duplicates = []
+if state.get("stats_table") != stats_table:
+    # Lost or foreign state: adopt the rows already in the table instead of adding copies.
+    rows.clear()
+    if stats_table:
+        existing, duplicates = read_stat_rows(TOKEN, stats_table)
+        rows.update(existing)
+        print(f"{STATS_TABLE}: adopted {len(existing)} existing rows, {len(duplicates)} duplicate keys")
+creates = [key for key in target if key not in rows]
+updates = [key for key in target if key in rows and rows[key]["values"] != target[key]]
+# Owner/KR/week combinations with no blocks left (relinked or deleted) are removed.
+deletes = [key for key in rows if key not in target]
+print(f"FocusStats: {len(creates)} to create, {len(updates)} to update, {len(deletes) + len(duplicates)} to delete")
+if not args.dry_run:
+    if not stats_table:
+        print(f"Creating table: {STATS_TABLE}")
+        stats_table = create_table(TOKEN, STATS_TABLE, STATS_FIELDS)
+        if not stats_table:
+            sys.exit(1)
+    state["stats_table"] = stats_table
+
+    def payload(key):
+        return {name: value for name, value in dict(target[key], Stat_Key=key).items() if value is not None}
+
+    created = batch_write(TOKEN, stats_table, "batch_create", [{"fields": payload(key)} for key in creates])
+    for key, record in zip(creates, created):
+        if record:
+            rows[key] = {"record_id": record.get("record_id"), "values": target[key]}
+    updated_records = batch_write(
+        TOKEN, stats_table, "batch_update", [{"record_id": rows[key]["record_id"], "fields": payload(key)} for key in updates]
+    )
+    for key, record in zip(updates, updated_records):
+        if record is not None:
+            rows[key]["values"] = target[key]
+    deleted = batch_write(
+        TOKEN, stats_table, "batch_delete", [rows[key]["record_id"] for key in deletes] + duplicates
+    )
+    for key, record in zip(deletes, deleted):
+        if record is not None:
+            del rows[key]
+    save_state(args.state, state)
+
+print("Focus aggregation done.")
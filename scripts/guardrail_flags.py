@@ -0,0 +1,289 @@
+import argparse
+import json
+import os
+import re
+import sys
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from aimd_limiter import HTTP_TIMEOUT, run_adaptive
+
+api_base = os.environ.get("FEISHU_API_BASE", "https://open.feishu.cn")
+app_id = os.environ.get("FEISHU_APP_ID")
+app_secret = os.environ.get("FEISHU_APP_SECRET")
+app_token = os.environ.get("FEISHU_BASE_APP_TOKEN")
+
+if not (app_id and app_secret and app_token):
+    print("Missing env vars: FEISHU_APP_ID/FEISHU_APP_SECRET/FEISHU_BASE_APP_TOKEN")
+    sys.exit(1)
+
+# PRD G: a task over 30 minutes that cannot be linked to a KR goes to Parking Lot.
+GUARDRAIL_MINUTES = 30
+BATCH_SIZE = 500
+
+FIELD_CANDIDATES = {
+    "title": ["Actions", "Action_Title", "Action"],
+    "kr": ["Key Results", "KR_Title", "KR"],
+    "minutes": ["Action Est Minutes", "Action_Est_Minutes", "Est_Minutes"],
+    "flag": ["Action_Guardrail_Flag", "Guardrail_Flag"],
+}
+
+
+def http_json(method, url, data=None, token=None):
+    body = None
+    headers = {"Content-Type": "application/json; charset=utf-8"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if data is not None:
+        body = json.dumps(data).encode("utf-8")
+    req = Request(url, data=body, headers=headers, method=method)
+    try:
+        with urlopen(req, timeout=HTTP_TIMEOUT) as resp:
+            raw = resp.read().decode("utf-8")
+            return json.loads(raw)
+    except HTTPError as exc:
+        body = exc.read().decode("utf-8")
+        raise RuntimeError(f"HTTP {exc.code}: {body}") from exc
+
+
+def get_tenant_token():
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/auth/v3/tenant_access_token/internal",
+        {"app_id": app_id, "app_secret": app_secret},
+    )
+    token = resp.get("tenant_access_token")
+    if not token:
+        print("Failed to get tenant access token", resp)
+        sys.exit(1)
+    return token
+
+
+def get_tables(token):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables?page_size=100",
+        None,
+        token,
+    )
+    items = resp.get("data", {}).get("items", [])
+    return {item.get("name"): item.get("table_id") for item in items}
+
+
+def get_fields(token, table_id):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/fields?page_size=200",
+        None,
+        token,
+    )
+    return resp.get("data", {}).get("items", [])
+
+
+def iter_records(token, table_id, page_size=500):
+    page_token = ""
+    while True:
+        url = f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records?page_size={page_size}"
+        if page_token:
+            url += f"&page_token={page_token}"
+        resp = http_json("GET", url, None, token)
+        data = resp.get("data") or {}
+        for item in data.get("items") or []:
+            yield item
+        page_token = data.get("page_token")
+        if not data.get("has_more") or not page_token:
+            break
+
+
+def batch_get_records(token, table_id, record_ids):
+    records = []
+    for i in range(0, len(record_ids), 100):
+        resp = http_json(
+            "POST",
+            f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_get",
+            {"record_ids": record_ids[i:i + 100]},
+            token,
+        )
+        records.extend((resp.get("data") or {}).get("records") or [])
+    return records
+
+
+def batch_update_records(token, table_id, records):
+    chunks = [records[i:i + BATCH_SIZE] for i in range(0, len(records), BATCH_SIZE)]
+    if not chunks:
+        return 0
+
+    def send(chunk):
+        return http_json(
+            "POST",
+            f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_update",
+            {"records": chunk},
+            token,
+        )
+
+    responses, report = run_adaptive(chunks, send)
+    print(f"  batch_update: {report}")
+    updated = 0
+    for chunk, resp in zip(chunks, responses):
+        if resp.get("code") not in (0, None):
+            print(f"Failed to update {len(chunk)} records: {resp}")
+            continue
+        updated += len(chunk)
+    return updated
+
+
+def batch_create_records(token, table_id, records):
+    created = 0
+    for i in range(0, len(records), BATCH_SIZE):
+        chunk = records[i:i + BATCH_SIZE]
+        resp = http_json(
+            "POST",
+            f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_create",
+            {"records": [{"fields": fields} for fields in chunk]},
+            token,
+        )
+        if resp.get("code") not in (0, None):
+            print(f"Failed to create {len(chunk)} records: {resp}")
+            continue
+        created += len(chunk)
+    return created
+
+
+def to_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float, bool)):
+        return str(value)
+    if isinstance(value, list):
+        return "".join(to_text(v) for v in value)
+    if isinstance(value, dict):
+        if value.get("text"):
+            return str(value.get("text"))
+        if value.get("name"):
+            return str(value.get("name"))
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def to_link_ids(value):
+    if isinstance(value, list):
+        ids = []
+        for item in value:
+            if isinstance(item, str):
+                ids.append(item)
+            elif isinstance(item, dict):
+                ids.extend(item.get("record_ids") or [])
+        return ids
+    if isinstance(value, dict):
+        return value.get("link_record_ids") or value.get("record_ids") or []
+    return []
+
+
+def to_number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(to_text(value))
+    except ValueError:
+        return None
+
+
+def resolve_field_names(field_names):
+    resolved = {}
+    for key, candidates in FIELD_CANDIDATES.items():
+        resolved[key] = next((name for name in candidates if name in field_names), None)
+    return resolved
+
+
+def should_gate(minutes, kr_value):
+    if minutes is None or minutes <= GUARDRAIL_MINUTES:
+        return False
+    return not (to_link_ids(kr_value) or to_text(kr_value).strip())
+
+
+parser = argparse.ArgumentParser(description="Evaluate the Parking Lot guardrail for every OKRPlan action.")
+parser.add_argument("--create-ideas", action="store_true", help="Add newly gated actions to Ideas (Parking)")
+parser.add_argument("--record-ids", default="", help="Only evaluate these OKRPlan records (comma-separated)")
+parser.add_argument("--dry-run", action="store_true", help="Report changes without writing")
+args = parser.parse_args()
+
+TOKEN = get_tenant_token()
+TABLES = get_tables(TOKEN)
+table_id = TABLES.get("OKRPlan")
+if not table_id:
+    print("OKRPlan table not found")
+    sys.exit(1)
+
+names = resolve_field_names({f.get("field_name") for f in get_fields(TOKEN, table_id)})
+if not names["flag"]:
+    print("Missing Action_Guardrail_Flag field. Run scripts/ensure_okrplan_fields.py first.")
+    sys.exit(1)
+if not names["minutes"]:
+    print("Missing Action Est Minutes field.")
+    sys.exit(1)
+
+record_ids = [rid.strip() for rid in args.record_ids.split(",") if rid.strip()]
+records = batch_get_records(TOKEN, table_id, record_ids) if record_ids else iter_records(TOKEN, table_id)
+
+scanned = 0
+updates = []
+newly_gated = []
+for record in records:
+    scanned += 1
+    fields = record.get("fields") or {}
+    minutes = to_number(fields.get(names["minutes"]))
+    kr_value = fields.get(names["kr"]) if names["kr"] else None
+    gated = should_gate(minutes, kr_value)
+    if gated == bool(fields.get(names["flag"])):
+        continue
+    updates.append({"record_id": record.get("record_id"), "fields": {names["flag"]: gated}})
+    if gated:
+        title = to_text(fields.get(names["title"])) if names["title"] else ""
+        newly_gated.append((record.get("record_id"), title, minutes))
+
+print(f"Scanned {scanned} actions: {len(updates)} flags changed, {len(newly_gated)} newly gated.")
+if args.dry_run:
+    for record_id, title, minutes in newly_gated:
+        print(f"- gate {record_id} {title} ({minutes:g} min)")
+    sys.exit(0)
+
+if updates:
+    print(f"Updated {batch_update_records(TOKEN, table_id, updates)} guardrail flags.")
+
+if args.create_ideas and newly_gated:
+    ideas_table = TABLES.get("Ideas")
+    if not ideas_table:
+        print("Ideas table not found")
+        sys.exit(1)
+    ideas_fields = get_fields(TOKEN, ideas_table)
+    primary = next((f.get("field_name") for f in ideas_fields if f.get("is_primary")), None)
+    status_options = next(
+        (
+            {opt.get("name") for opt in (f.get("property") or {}).get("options") or []}
+            for f in ideas_fields
+            if f.get("field_name") == "Status"
+        ),
+        set(),
+    )
+    # Notes carry the source record id so reruns never park the same action twice.
+    parked = set()
+    for idea in iter_records(TOKEN, ideas_table):
+        parked.update(re.findall(r"OKRPlan (\w+)", to_text((idea.get("fields") or {}).get("Notes"))))
+    new_ideas = []
+    for record_id, title, minutes in newly_gated:
+        if record_id in parked:
+            continue
+        note = f"Guardrail: OKRPlan {record_id} >{GUARDRAIL_MINUTES}min 且未关联 KR"
+        payload = {"Idea_Title": title or record_id, "Est_Minutes": minutes, "Notes": note}
+        if primary:
+            payload[primary] = title or record_id
+        if "Parking" in status_options:
+            payload["Status"] = "Parking"
+        new_ideas.append(payload)
+    print(f"Created {batch_create_records(TOKEN, ideas_table, new_ideas)} Ideas rows.")
+
+print("Guardrail flags done.")
@@ -0,0 +1,218 @@
+import argparse
+import gzip
+import io
+import json
+import os
+import runpy
+import sys
+import threading
+import time
+import urllib.request
+from collections import defaultdict, deque
+from datetime import datetime
+from urllib.error import HTTPError
+from urllib.parse import urlsplit
+
+REDACTED = "<redacted>"
+# Request/response keys whose values never go into a cassette.
+SECRET_KEYS = {"app_secret", "app_id", "tenant_access_token", "app_access_token", "user_access_token"}
+TOKEN_PLACEHOLDER = "{app_token}"
+
+
+def redact(obj):
+    if isinstance(obj, dict):
+        return {k: REDACTED if k in SECRET_KEYS else redact(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [redact(v) for v in obj]
+    return obj
+
+
+def redact_body(raw):
+    if not raw:
+        return None
+    text = raw.decode("utf-8") if isinstance(raw, bytes) else raw
+    try:
+        return json.dumps(redact(json.loads(text)), ensure_ascii=False, sort_keys=True)
+    except ValueError:
+        return text
+
+
+def request_key(method, url, body):
+    """Host-independent request identity; the Base token is replaced so cassettes replay against any Base."""
+    parts = urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    app_token = os.environ.get("FEISHU_BASE_APP_TOKEN")
+    if app_token:
+        path = path.replace(app_token, TOKEN_PLACEHOLDER)
+        if body:
+            body = body.replace(app_token, TOKEN_PLACEHOLDER)
+    return f"{method} {path} {body or ''}"
+
+
+def route_of(key):
+    return " ".join(key.split(" ", 2)[:2])
+
+
+def unpack(request, data):
+    if isinstance(request, str):
+        return ("POST" if data is not None else "GET"), request, data
+    return request.get_method(), request.full_url, request.data if data is None else data
+
+
+class CassetteResponse:
+    def __init__(self, status, body):
+        self.status = status
+        self._fp = io.BytesIO(body)
+
+    def read(self, *args):
+        return self._fp.read(*args)
+
+    def getcode(self):
+        return self.status
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._fp.close()
+        return False
+
+
+class Recorder:
+    def __init__(self, real_urlopen):
+        self.real_urlopen = real_urlopen
+        self.entries = []
+        self.lock = threading.Lock()
+
+    def urlopen(self, request, data=None, *args, **kwargs):
+        method, url, body = unpack(request, data)
+        started = time.monotonic()
+        status, raw, error = 200, b"", None
+        try:
+            with self.real_urlopen(request, data, *args, **kwargs) as resp:
+                status = resp.status
+                raw = resp.read()
+        except HTTPError as exc:
+            status, raw, error = exc.code, exc.read(), exc
+        elapsed = time.monotonic() - started
+        entry = {
+            "key": request_key(method, url, redact_body(body)),
+            "status": status,
+            "body": redact_body(raw),
+            "elapsed": round(elapsed, 4),
+        }
+        with self.lock:
+            self.entries.append(entry)
+        if error is not None:
+            raise HTTPError(error.url, error.code, error.msg, error.hdrs, io.BytesIO(raw))
+        return CassetteResponse(status, raw)
+
+    def save(self, path, meta):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump({"meta": meta, "entries": self.entries}, f, ensure_ascii=False, separators=(",", ":"))
+
+
+class Player:
+    def __init__(self, cassette, timing):
+        self.queues = defaultdict(deque)
+        self.routes = defaultdict(deque)
+        for entry in cassette["entries"]:
+            entry["used"] = False
+            self.queues[entry["key"]].append(entry)
+            self.routes[route_of(entry["key"])].append(entry)
+        self.timing = timing
+        self.lock = threading.Lock()
+        self.served = 0
+        self.missed = 0
+
+    def urlopen(self, request, data=None, *args, **kwargs):
+        method, url, body = unpack(request, data)
+        key = request_key(method, url, redact_body(body))
+        with self.lock:
+            # Exact match first; bodies carrying timestamps fall back to the
+            # next unused response recorded for the same method and path.
+            entry = self._take(self.queues.get(key)) or self._take(self.routes.get(route_of(key)))
+            if entry is None:
+                self.missed += 1
+            else:
+                self.served += 1
+        if entry is None:
+            raise RuntimeError(f"No cassette entry for {key[:200]}")
+        if self.timing == "original":
+            time.sleep(entry["elapsed"])
+        raw = (entry["body"] or "").encode("utf-8")
+        if entry["status"] >= 400:
+            raise HTTPError(url, entry["status"], "replayed", {}, io.BytesIO(raw))
+        return CassetteResponse(entry["status"], raw)
+
+    @staticmethod
+    def _take(queue):
+        while queue:
+            entry = queue.popleft()
+            if not entry["used"]:
+                entry["used"] = True
+                return entry
+        return None
+
+    def remaining(self):
+        return sum(1 for q in self.queues.values() for entry in q if not entry["used"])
+
+
+def run_script(script, script_args):
+    sys.argv = [script] + script_args
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as exc:
+        return exc.code if isinstance(exc.code, int) else (0 if exc.code is None else 1)
+    return 0
+
+
+parser = argparse.ArgumentParser(
+    description="Record or replay the HTTP traffic of a scripts/*.py run.",
+    epilog="Example: http_cassette.py record generated/cassettes/seed.json.gz scripts/seed_mock_data.py",
+)
+parser.add_argument("mode", choices=["record", "replay"])
+parser.add_argument("cassette", help="Cassette file (gzip JSON)")
+parser.add_argument("script", help="Script to run, e.g. scripts/seed_mock_data.py")
+parser.add_argument("--timing", choices=["zero", "original"], default="zero", help="Replay latency")
+args, script_args = parser.parse_known_args()
+if script_args[:1] == ["--"]:
+    script_args = script_args[1:]
+
+real_urlopen = urllib.request.urlopen
+started = time.monotonic()
+if args.mode == "record":
+    recorder = Recorder(real_urlopen)
+    urllib.request.urlopen = recorder.urlopen
+    try:
+        code = run_script(args.script, script_args)
+    finally:
+        urllib.request.urlopen = real_urlopen
+        meta = {
+            "script": os.path.basename(args.script),
+            "args": script_args,
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+            "seconds": round(time.monotonic() - started, 3),
+        }
+        recorder.save(args.cassette, meta)
+    print(f"Recorded {len(recorder.entries)} requests to {args.cassette}", file=sys.stderr)
+else:
+    with gzip.open(args.cassette, "rt", encoding="utf-8") as f:
+        cassette = json.load(f)
+    # Scripts refuse to start without credentials; replay never uses them.
+    for name in ("FEISHU_APP_ID", "FEISHU_APP_SECRET", "FEISHU_BASE_APP_TOKEN"):
+        os.environ.setdefault(name, "replay")
+    player = Player(cassette, args.timing)
+    urllib.request.urlopen = player.urlopen
+    try:
+        code = run_script(args.script, script_args)
+    finally:
+        urllib.request.urlopen = real_urlopen
+    print(
+        f"Replayed {player.served} requests in {time.monotonic() - started:.2f}s "
+        f"(recorded run {cassette['meta']['seconds']:.2f}s), {player.missed} missed, {player.remaining()} unused",
+        file=sys.stderr,
+    )
+sys.exit(code)
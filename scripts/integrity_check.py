@@ -0,0 +1,239 @@
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+api_base = os.environ.get("FEISHU_API_BASE", "https://open.feishu.cn")
+app_id = os.environ.get("FEISHU_APP_ID")
+app_secret = os.environ.get("FEISHU_APP_SECRET")
+app_token = os.environ.get("FEISHU_BASE_APP_TOKEN")
+
+if not (app_id and app_secret and app_token):
+    print("Missing env vars: FEISHU_APP_ID/FEISHU_APP_SECRET/FEISHU_BASE_APP_TOKEN")
+    sys.exit(1)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_REPORT = os.path.join(ROOT_DIR, "generated", "integrity_report.json")
+BATCH_SIZE = 500
+LINK_TYPES = {18, 21}
+SAMPLE_SIZE = 20
+
+ACTION_TITLE_CANDIDATES = ["Actions", "Action_Title", "Action"]
+KR_CANDIDATES = ["Key Results", "KR_Title", "KR"]
+
+
+def http_json(method, url, data=None, token=None):
+    body = None
+    headers = {"Content-Type": "application/json; charset=utf-8"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if data is not None:
+        body = json.dumps(data).encode("utf-8")
+    req = Request(url, data=body, headers=headers, method=method)
+    try:
+        with urlopen(req) as resp:
+            raw = resp.read().decode("utf-8")
+            return json.loads(raw)
+    except HTTPError as exc:
+        body = exc.read().decode("utf-8")
+        raise RuntimeError(f"HTTP {exc.code}: {body}") from exc
+
+
+def get_tenant_token():
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/auth/v3/tenant_access_token/internal",
+        {"app_id": app_id, "app_secret": app_secret},
+    )
+    token = resp.get("tenant_access_token")
+    if not token:
+        print("Failed to get tenant access token", resp)
+        sys.exit(1)
+    return token
+
+
+def get_tables(token):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables?page_size=100",
+        None,
+        token,
+    )
+    items = resp.get("data", {}).get("items", [])
+    return {item.get("name"): item.get("table_id") for item in items}
+
+
+def get_fields(token, table_id):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/fields?page_size=200",
+        None,
+        token,
+    )
+    return resp.get("data", {}).get("items", [])
+
+
+def iter_records(token, table_id, page_size=500):
+    page_token = ""
+    while True:
+        url = f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records?page_size={page_size}"
+        if page_token:
+            url += f"&page_token={page_token}"
+        resp = http_json("GET", url, None, token)
+        data = resp.get("data") or {}
+        for item in data.get("items") or []:
+            yield item
+        page_token = data.get("page_token")
+        if not data.get("has_more") or not page_token:
+            break
+
+
+def batch_update_records(token, table_id, records):
+    updated = 0
+    for i in range(0, len(records), BATCH_SIZE):
+        chunk = records[i:i + BATCH_SIZE]
+        resp = http_json(
+            "POST",
+            f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_update",
+            {"records": chunk},
+            token,
+        )
+        if resp.get("code") not in (0, None):
+            print(f"Failed to update {len(chunk)} records: {resp}")
+            continue
+        updated += len(chunk)
+    return updated
+
+
+def to_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float, bool)):
+        return str(value)
+    if isinstance(value, list):
+        return "".join(to_text(v) for v in value)
+    if isinstance(value, dict):
+        if value.get("text"):
+            return str(value.get("text"))
+        if value.get("name"):
+            return str(value.get("name"))
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def to_link_ids(value):
+    if isinstance(value, list):
+        ids = []
+        for item in value:
+            if isinstance(item, str):
+                ids.append(item)
+            elif isinstance(item, dict):
+                ids.extend(item.get("record_ids") or [])
+        return ids
+    if isinstance(value, dict):
+        return value.get("link_record_ids") or value.get("record_ids") or []
+    return []
+
+
+def first_present(candidates, field_names):
+    return next((name for name in candidates if name in field_names), None)
+
+
+parser = argparse.ArgumentParser(description="Check link fields across all tables for dangling record ids.")
+parser.add_argument("--repair", action="store_true", help="Drop dangling ids from link fields")
+parser.add_argument("--report", default=DEFAULT_REPORT, help="Where to write the JSON report")
+args = parser.parse_args()
+
+TOKEN = get_tenant_token()
+TABLES = get_tables(TOKEN)
+names_by_id = {tid: name for name, tid in TABLES.items()}
+
+# Single pass: every table is streamed once. Record ids go into one hash set
+# per table; non-empty link cells are kept as (record_id, field, ids) probes.
+record_ids = {}
+probes = {}
+link_targets = {}
+orphan_actions = []
+evidence_without_action = []
+for name, table_id in TABLES.items():
+    fields = get_fields(TOKEN, table_id)
+    field_names = {f.get("field_name") for f in fields}
+    links = {
+        f.get("field_name"): (f.get("property") or {}).get("table_id")
+        for f in fields
+        if f.get("type") in LINK_TYPES
+    }
+    link_targets[name] = links
+    action_field = first_present(ACTION_TITLE_CANDIDATES, field_names) if name == "OKRPlan" else None
+    kr_field = first_present(KR_CANDIDATES, field_names) if name == "OKRPlan" else None
+
+    ids = set()
+    table_probes = []
+    for record in iter_records(TOKEN, table_id):
+        record_id = record.get("record_id")
+        values = record.get("fields") or {}
+        ids.add(record_id)
+        for field_name in links:
+            linked = to_link_ids(values.get(field_name))
+            if linked:
+                table_probes.append((record_id, field_name, linked))
+        if action_field and to_text(values.get(action_field)).strip():
+            kr_value = values.get(kr_field) if kr_field else None
+            if not (to_link_ids(kr_value) or to_text(kr_value).strip()):
+                orphan_actions.append(record_id)
+        if name == "Evidence" and "Action" in links and not to_link_ids(values.get("Action")):
+            evidence_without_action.append(record_id)
+    record_ids[table_id] = ids
+    probes[name] = table_probes
+    print(f"Scanned {name}: {len(ids)} records, {len(table_probes)} link cells")
+
+dangling = {}
+repairs = {}
+for name, table_probes in probes.items():
+    for record_id, field_name, linked in table_probes:
+        target_ids = record_ids.get(link_targets[name][field_name])
+        if target_ids is None:
+            missing = linked
+        else:
+            missing = [rid for rid in linked if rid not in target_ids]
+        if not missing:
+            continue
+        key = f"{name}.{field_name}"
+        entry = dangling.setdefault(key, {"target": names_by_id.get(link_targets[name][field_name]), "records": 0, "ids": 0, "sample": []})
+        entry["records"] += 1
+        entry["ids"] += len(missing)
+        if len(entry["sample"]) < SAMPLE_SIZE:
+            entry["sample"].append({"record_id": record_id, "missing": missing})
+        kept = [rid for rid in linked if rid not in missing]
+        repairs.setdefault(name, {}).setdefault(record_id, {})[field_name] = kept
+
+report = {
+    "checked_at": datetime.now().isoformat(timespec="seconds"),
+    "tables": {names_by_id[tid]: len(ids) for tid, ids in record_ids.items()},
+    "dangling_links": dangling,
+    "orphan_actions": {"count": len(orphan_actions), "sample": orphan_actions[:SAMPLE_SIZE]},
+    "evidence_without_action": {"count": len(evidence_without_action), "sample": evidence_without_action[:SAMPLE_SIZE]},
+}
+
+for key, entry in sorted(dangling.items()):
+    print(f"- {key} -> {entry['target']}: {entry['records']} records, {entry['ids']} dangling ids")
+print(f"- Orphan actions (no KR): {len(orphan_actions)}")
+print(f"- Evidence without Action: {len(evidence_without_action)}")
+
+if args.repair and repairs:
+    repaired = 0
+    for name, by_record in repairs.items():
+        updates = [{"record_id": rid, "fields": fields} for rid, fields in by_record.items()]
+        repaired += batch_update_records(TOKEN, TABLES[name], updates)
+    report["repaired_records"] = repaired
+    print(f"Repaired {repaired} records.")
+
+os.makedirs(os.path.dirname(os.path.abspath(args.report)), exist_ok=True)
+with open(args.report, "w", encoding="utf-8") as f:
+    json.dump(report, f, ensure_ascii=False, indent=2)
+print(f"Report saved to {args.report}")
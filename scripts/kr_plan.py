@@ -0,0 +1,367 @@
+import argparse
+import json
+import os
+import sys
+from datetime import date, datetime, timedelta
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from aimd_limiter import HTTP_TIMEOUT, run_adaptive
+
+api_base = os.environ.get("FEISHU_API_BASE", "https://open.feishu.cn")
+app_id = os.environ.get("FEISHU_APP_ID")
+app_secret = os.environ.get("FEISHU_APP_SECRET")
+app_token = os.environ.get("FEISHU_BASE_APP_TOKEN")
+
+if not (app_id and app_secret and app_token):
+    print("Missing env vars: FEISHU_APP_ID/FEISHU_APP_SECRET/FEISHU_BASE_APP_TOKEN")
+    sys.exit(1)
+
+BATCH_SIZE = 500
+# Not "Plan": that name belongs to the retired table removed by cleanup_tables.py.
+PLAN_TABLE = "KRPlan"
+PLAN_FIELDS = [
+    {"field_name": "Plan_Key", "type": 1},
+    {"field_name": "KR", "type": 1},
+    {"field_name": "Week", "type": 1},
+    {"field_name": "Week_Start", "type": 5},
+    {"field_name": "Week_End", "type": 5},
+    {"field_name": "Expected_Progress", "type": 2},
+    {"field_name": "Expected_Delta", "type": 2},
+    {"field_name": "Deliverable", "type": 1},
+    {"field_name": "Risk", "type": 1},
+]
+# Written by the planner; Deliverable and Risk are filled in by people and never touched.
+GENERATED = ["KR", "Week", "Week_Start", "Week_End", "Expected_Progress", "Expected_Delta"]
+
+FIELD_CANDIDATES = {
+    "kr": ["Key Results", "KR_Title", "KR"],
+    "kr_due": ["KR_Due_Date", "Due_Date"],
+    "kr_progress": ["KR_Progress", "Progress"],
+}
+
+
+def http_json(method, url, data=None, token=None):
+    body = None
+    headers = {"Content-Type": "application/json; charset=utf-8"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if data is not None:
+        body = json.dumps(data).encode("utf-8")
+    req = Request(url, data=body, headers=headers, method=method)
+    try:
+        with urlopen(req, timeout=HTTP_TIMEOUT) as resp:
+            raw = resp.read().decode("utf-8")
+            return json.loads(raw)
+    except HTTPError as exc:
+        body = exc.read().decode("utf-8")
+        raise RuntimeError(f"HTTP {exc.code}: {body}") from exc
+
+
+def get_tenant_token():
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/auth/v3/tenant_access_token/internal",
+        {"app_id": app_id, "app_secret": app_secret},
+    )
+    token = resp.get("tenant_access_token")
+    if not token:
+        print("Failed to get tenant access token", resp)
+        sys.exit(1)
+    return token
+
+
+def get_tables(token):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables?page_size=100",
+        None,
+        token,
+    )
+    items = resp.get("data", {}).get("items", [])
+    return {item.get("name"): item.get("table_id") for item in items}
+
+
+def get_fields(token, table_id):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/fields?page_size=200",
+        None,
+        token,
+    )
+    return resp.get("data", {}).get("items", [])
+
+
+def iter_records(token, table_id, page_size=500):
+    page_token = ""
+    while True:
+        url = f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records?page_size={page_size}"
+        if page_token:
+            url += f"&page_token={page_token}"
+        resp = http_json("GET", url, None, token)
+        data = resp.get("data") or {}
+        for item in data.get("items") or []:
+            yield item
+        page_token = data.get("page_token")
+        if not data.get("has_more") or not page_token:
+            break
+
+
+def create_table(token, name, fields):
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables",
+        {"table": {"name": name, "fields": fields}},
+        token,
+    )
+    table_id = (resp.get("data") or {}).get("table_id")
+    if not table_id:
+        print(f"Failed to create table {name}: {resp}")
+    return table_id
+
+
+def create_field(token, table_id, field_config):
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/fields",
+        field_config,
+        token,
+    )
+    if resp.get("code") not in (0, None):
+        print(f"Failed to create field {field_config['field_name']}: {resp}")
+        return False
+    return True
+
+
+def batch_write(token, table_id, op, records):
+    chunks = [records[i:i + BATCH_SIZE] for i in range(0, len(records), BATCH_SIZE)]
+    if not chunks:
+        return []
+
+    def send(chunk):
+        return http_json(
+            "POST",
+            f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/{op}",
+            {"records": chunk},
+            token,
+        )
+
+    responses, report = run_adaptive(chunks, send, retry_timeouts=op != "batch_create")
+    print(f"  {op}: {report}")
+    results = []
+    for chunk, resp in zip(chunks, responses):
+        if resp.get("code") not in (0, None):
+            print(f"Failed to {op} {len(chunk)} records: {resp}")
+            results.extend([None] * len(chunk))
+            continue
+        results.extend((resp.get("data") or {}).get("records") or [{}] * len(chunk))
+    return results
+
+
+def to_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float, bool)):
+        return str(value)
+    if isinstance(value, list):
+        return "".join(to_text(v) for v in value)
+    if isinstance(value, dict):
+        if value.get("text"):
+            return str(value.get("text"))
+        if value.get("name"):
+            return str(value.get("name"))
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def to_number(value):
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(to_text(value))
+    except ValueError:
+        return None
+
+
+def normalize_progress(value):
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        return 0
+    return value / 100 if value > 1 else value
+
+
+def to_day(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return datetime.fromtimestamp(value / 1000).date()
+
+
+def day_ms(day):
+    return int(datetime(day.year, day.month, day.day).timestamp() * 1000)
+
+
+def week_key(day):
+    # Same numbering as WEEKNUM(date, 2): weeks start on Monday, week 1 holds Jan 1.
+    jan1 = date(day.year, 1, 1)
+    number = (day.timetuple().tm_yday - 1 + jan1.weekday()) // 7 + 1
+    return f"{day.year}-W{number:02d}"
+
+
+def resolve_field_names(field_names):
+    return {key: next((n for n in names if n in field_names), None) for key, names in FIELD_CANDIDATES.items()}
+
+
+def weekly_targets(progress, due, week_start):
+    """[(week start, cumulative expected %, delta %)] from this week through the week of due.
+
+    The remaining work is spread evenly over the days left from this Monday to the due
+    date, so a rerun in the same week with the same progress yields the same targets.
+    Cumulative targets are rounded first and deltas taken between them, so the deltas
+    add up to exactly the remaining percent.
+    """
+    if due < week_start or progress >= 1:
+        return []
+    total_days = (due - week_start).days + 1
+    targets = []
+    previous = round(progress * 100)
+    week = week_start
+    while week <= due:
+        covered = (min(week + timedelta(days=6), due) - week_start).days + 1
+        expected = round(100 * (progress + (1 - progress) * covered / total_days))
+        targets.append((week, expected, expected - previous))
+        previous = expected
+        week += timedelta(days=7)
+    return targets
+
+
+def plan_values(kr, week, expected, delta):
+    return {
+        "KR": kr,
+        "Week": week_key(week),
+        "Week_Start": day_ms(week),
+        "Week_End": day_ms(week + timedelta(days=6)),
+        "Expected_Progress": expected,
+        "Expected_Delta": delta,
+    }
+
+
+def same_value(current, wanted):
+    if isinstance(wanted, str):
+        return to_text(current) == wanted
+    number = to_number(current)
+    return number is not None and abs(number - wanted) < 1e-9
+
+
+parser = argparse.ArgumentParser(description="Generate weekly expected-progress Plan rows for every KR up to its due date.")
+parser.add_argument("--kr", default="", help="Only plan these KRs (comma-separated)")
+parser.add_argument("--dry-run", action="store_true", help="Print the weekly targets without writing")
+args = parser.parse_args()
+only_krs = {name.strip() for name in args.kr.split(",") if name.strip()}
+
+TOKEN = get_tenant_token()
+TABLES = get_tables(TOKEN)
+okr_table = TABLES.get("OKRPlan")
+if not okr_table:
+    print("OKRPlan table not found")
+    sys.exit(1)
+
+names = resolve_field_names({f.get("field_name") for f in get_fields(TOKEN, okr_table)})
+if not (names["kr"] and names["kr_due"]):
+    print("OKRPlan needs Key Results and KR_Due_Date fields")
+    sys.exit(1)
+
+# OKRPlan repeats KR columns on every Action row; take the latest due date and highest progress seen.
+krs = {}
+for record in iter_records(TOKEN, okr_table):
+    values = record.get("fields") or {}
+    kr = to_text(values.get(names["kr"]))
+    if not kr or (only_krs and kr not in only_krs):
+        continue
+    entry = krs.setdefault(kr, {"due": None, "progress": 0})
+    due = to_day(values.get(names["kr_due"]))
+    if due and (entry["due"] is None or due > entry["due"]):
+        entry["due"] = due
+    if names["kr_progress"]:
+        entry["progress"] = max(entry["progress"], normalize_progress(values.get(names["kr_progress"])))
+
+today = datetime.now().date()
+week_start = today - timedelta(days=today.weekday())
+target = {}
+skipped = {"no due date": 0, "past due": 0, "done": 0}
+for kr, entry in sorted(krs.items()):
+    if not entry["due"]:
+        skipped["no due date"] += 1
+        continue
+    if entry["progress"] >= 1:
+        skipped["done"] += 1
+        continue
+    if entry["due"] < week_start:
+        skipped["past due"] += 1
+        continue
+    for week, expected, delta in weekly_targets(entry["progress"], entry["due"], week_start):
+        target[f"{kr}|{week_key(week)}"] = plan_values(kr, week, expected, delta)
+weeks_by_kr = {}
+for values in target.values():
+    weeks_by_kr[values["KR"]] = weeks_by_kr.get(values["KR"], 0) + 1
+print(f"KRs: {len(weeks_by_kr)} planned over {len(target)} weeks; skipped "
+      + ", ".join(f"{count} {reason}" for reason, count in skipped.items()))
+
+plan_table = TABLES.get(PLAN_TABLE)
+existing = {}
+if plan_table:
+    field_names = {f.get("field_name") for f in get_fields(TOKEN, plan_table)}
+    for field in PLAN_FIELDS:
+        if field["field_name"] not in field_names and not args.dry_run:
+            print(f"Creating field: {PLAN_TABLE}.{field['field_name']}")
+            create_field(TOKEN, plan_table, field)
+    for record in iter_records(TOKEN, plan_table):
+        values = record.get("fields") or {}
+        key = to_text(values.get("Plan_Key"))
+        if key:
+            existing[key] = (record.get("record_id"), values)
+
+creates, updates, deletes, kept = [], [], [], 0
+for key, values in target.items():
+    if key not in existing:
+        creates.append({"fields": dict(values, Plan_Key=key)})
+        continue
+    record_id, current = existing[key]
+    changed = {name: values[name] for name in GENERATED if not same_value(current.get(name), values[name])}
+    if changed:
+        updates.append({"record_id": record_id, "fields": changed})
+for key, (record_id, current) in existing.items():
+    if key in target:
+        continue
+    kr = key.rsplit("|", 1)[0]
+    start = to_day(to_number(current.get("Week_Start")))
+    # Past weeks are history, other KRs are out of scope; rows someone wrote in are left alone.
+    if (start and start < week_start) or (only_krs and kr not in only_krs):
+        continue
+    if to_text(current.get("Deliverable")) or to_text(current.get("Risk")):
+        kept += 1
+        continue
+    deletes.append(record_id)
+print(f"{PLAN_TABLE}: {len(creates)} to create, {len(updates)} to update, {len(deletes)} to delete"
+      + (f", {kept} stale weeks kept for their Deliverable/Risk" if kept else ""))
+
+if args.dry_run:
+    for key, values in target.items():
+        print(f"  {key}: {values['Expected_Progress']}% (+{values['Expected_Delta']})")
+    sys.exit(0)
+
+if not plan_table:
+    print(f"Creating table: {PLAN_TABLE}")
+    plan_table = create_table(TOKEN, PLAN_TABLE, PLAN_FIELDS)
+    if not plan_table:
+        sys.exit(1)
+
+failed = 0
+for op, records in (("batch_create", creates), ("batch_update", updates), ("batch_delete", deletes)):
+    failed += sum(1 for result in batch_write(TOKEN, plan_table, op, records) if result is None)
+if failed:
+    print(f"Failed to write {failed} {PLAN_TABLE} rows; rerun to retry.")
+    sys.exit(1)
+print("KR plan done.")
@@ -0,0 +1,539 @@
+import argparse
+import heapq
+import json
+import math
+import os
+import sys
+from datetime import datetime
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from aimd_limiter import HTTP_TIMEOUT, run_adaptive
+
+api_base = os.environ.get("FEISHU_API_BASE", "https://open.feishu.cn")
+app_id = os.environ.get("FEISHU_APP_ID")
+app_secret = os.environ.get("FEISHU_APP_SECRET")
+app_token = os.environ.get("FEISHU_BASE_APP_TOKEN")
+
+if not (app_id and app_secret and app_token):
+    print("Missing env vars: FEISHU_APP_ID/FEISHU_APP_SECRET/FEISHU_BASE_APP_TOKEN")
+    sys.exit(1)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_STATE = os.path.join(ROOT_DIR, "generated", "lagging_rank.json")
+BATCH_SIZE = 500
+DEFAULT_K = 10
+ALL = "all"
+NO_KR = "(no KR)"
+UNASSIGNED = "(unassigned)"
+RANK_TABLE = "LaggingRank"
+RANK_FIELDS = [
+    {"field_name": "Rank_Key", "type": 1},
+    {"field_name": "Group", "type": 1},
+    {"field_name": "Rank", "type": 2},
+    {"field_name": "Action", "type": 1},
+    {"field_name": "Action_Id", "type": 1},
+    {"field_name": "Lag", "type": 2},
+    {"field_name": "Explanation", "type": 1},
+]
+
+FIELD_CANDIDATES = {
+    "title": ["Actions", "Action_Title", "Action"],
+    "kr": ["Key Results", "KR_Title", "KR"],
+    "owner": ["Owner", "Action_Owner"],
+    "plan_start": ["预期开始", "Action_Plan_Start", "Plan_Start", "Plan_Date"],
+    "plan_end": ["预期结束", "Action_Plan_End", "Plan_End", "Plan_Date"],
+    "progress": ["Action Progress"],
+}
+
+
+def http_json(method, url, data=None, token=None):
+    body = None
+    headers = {"Content-Type": "application/json; charset=utf-8"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if data is not None:
+        body = json.dumps(data).encode("utf-8")
+    req = Request(url, data=body, headers=headers, method=method)
+    try:
+        with urlopen(req, timeout=HTTP_TIMEOUT) as resp:
+            raw = resp.read().decode("utf-8")
+            return json.loads(raw)
+    except HTTPError as exc:
+        body = exc.read().decode("utf-8")
+        raise RuntimeError(f"HTTP {exc.code}: {body}") from exc
+
+
+def get_tenant_token():
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/auth/v3/tenant_access_token/internal",
+        {"app_id": app_id, "app_secret": app_secret},
+    )
+    token = resp.get("tenant_access_token")
+    if not token:
+        print("Failed to get tenant access token", resp)
+        sys.exit(1)
+    return token
+
+
+def get_tables(token):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables?page_size=100",
+        None,
+        token,
+    )
+    items = resp.get("data", {}).get("items", [])
+    return {item.get("name"): item.get("table_id") for item in items}
+
+
+def get_fields(token, table_id):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/fields?page_size=200",
+        None,
+        token,
+    )
+    return resp.get("data", {}).get("items", [])
+
+
+def iter_records(token, table_id, page_size=500):
+    page_token = ""
+    while True:
+        url = f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records?page_size={page_size}"
+        if page_token:
+            url += f"&page_token={page_token}"
+        resp = http_json("GET", url, None, token)
+        data = resp.get("data") or {}
+        for item in data.get("items") or []:
+            yield item
+        page_token = data.get("page_token")
+        if not data.get("has_more") or not page_token:
+            break
+
+
+def batch_get_records(token, table_id, record_ids):
+    records = []
+    for i in range(0, len(record_ids), 100):
+        resp = http_json(
+            "POST",
+            f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_get",
+            {"record_ids": record_ids[i:i + 100]},
+            token,
+        )
+        records.extend((resp.get("data") or {}).get("records") or [])
+    return records
+
+
+def create_table(token, name, fields):
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables",
+        {"table": {"name": name, "fields": fields}},
+        token,
+    )
+    table_id = (resp.get("data") or {}).get("table_id")
+    if not table_id:
+        print(f"Failed to create table {name}: {resp}")
+    return table_id
+
+
+def batch_write(token, table_id, op, records):
+    chunks = [records[i:i + BATCH_SIZE] for i in range(0, len(records), BATCH_SIZE)]
+    if not chunks:
+        return []
+
+    def send(chunk):
+        return http_json(
+            "POST",
+            f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/{op}",
+            {"records": chunk},
+            token,
+        )
+
+    responses, report = run_adaptive(chunks, send, retry_timeouts=op != "batch_create")
+    print(f"  {op}: {report}")
+    results = []
+    for chunk, resp in zip(chunks, responses):
+        if resp.get("code") not in (0, None):
+            print(f"Failed to {op} {len(chunk)} records: {resp}")
+            results.extend([None] * len(chunk))
+            continue
+        results.extend((resp.get("data") or {}).get("records") or [{}] * len(chunk))
+    return results
+
+
+def to_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float, bool)):
+        return str(value)
+    if isinstance(value, list):
+        return "".join(to_text(v) for v in value)
+    if isinstance(value, dict):
+        if value.get("text"):
+            return str(value.get("text"))
+        if value.get("name"):
+            return str(value.get("name"))
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def to_number(value):
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(to_text(value))
+    except ValueError:
+        return None
+
+
+def to_day(ts):
+    return datetime.fromtimestamp(ts / 1000).date()
+
+
+def normalize_progress(value):
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        return 0
+    return value / 100 if value > 1 else value
+
+
+def action_score(plan_start, plan_end, progress, today):
+    # Mirrors computeActionScore in App.tsx.
+    start = to_day(plan_start)
+    end = to_day(plan_end)
+    if end < start:
+        return None
+    duration = (end - start).days
+    time_progress = 1 if duration == 0 else min(1, max(0, (today - start).days / duration))
+    actual = normalize_progress(progress)
+    delta = actual - time_progress
+    score = 100 if delta >= 0 else max(0, round(100 * (1 + delta)))
+    return score, actual, delta, time_progress
+
+
+def resolve_field_names(field_names):
+    return {key: next((n for n in names if n in field_names), None) for key, names in FIELD_CANDIDATES.items()}
+
+
+def extract_action(record, names):
+    values = record.get("fields") or {}
+
+    def get(key):
+        return values.get(names[key]) if names[key] else None
+
+    title = to_text(get("title"))
+    if not title:
+        return None
+    return {
+        "title": title,
+        "kr": to_text(get("kr")) or NO_KR,
+        "owner": to_text(get("owner")) or UNASSIGNED,
+        "plan_start": to_number(get("plan_start")),
+        "plan_end": to_number(get("plan_end")),
+        "progress": to_number(get("progress")),
+    }
+
+
+def lag_of(action, today):
+    """(delta, time progress, actual progress) for a started, lagging action; None otherwise (as laggingActions)."""
+    if not action or not action["plan_start"] or not action["plan_end"]:
+        return None
+    scored = action_score(action["plan_start"], action["plan_end"], action["progress"], today)
+    if not scored or to_day(action["plan_start"]) > today or scored[2] >= 0:
+        return None
+    _, actual, delta, time_progress = scored
+    return [delta, time_progress, actual]
+
+
+def groups_of(action):
+    return (ALL, f"owner:{action['owner']}", f"kr:{action['kr']}")
+
+
+class Ranking:
+    """Top-k most lagging actions per group, kept in bounded heaps.
+
+    Each heap holds (-delta, record_id) for the k most negative deltas, so its root is
+    the least-lagging member and a worse newcomer replaces it in O(log k). Ties go to
+    the newer record id. Only when a member of the top-k itself improves or leaves is
+    that one group refilled from its lagging members.
+    """
+
+    def __init__(self, k):
+        self.k = k
+        self.members = {}
+        self.heaps = {}
+        self.dirty = set()
+
+    def load(self, lags, actions, tops):
+        for record_id, lag in lags.items():
+            for group in groups_of(actions[record_id]):
+                self.members.setdefault(group, {})[record_id] = lag[0]
+        for group, record_ids in tops.items():
+            members = self.members.get(group, {})
+            heap = [(-members[rid], rid) for rid in record_ids if rid in members]
+            heapq.heapify(heap)
+            self.heaps[group] = heap
+            if len(heap) != len(record_ids):
+                self.dirty.add(group)
+
+    def in_top(self, group, record_id):
+        return any(rid == record_id for _, rid in self.heaps.get(group, []))
+
+    def remove(self, group, record_id):
+        members = self.members.get(group)
+        if not members or record_id not in members:
+            return
+        del members[record_id]
+        if self.in_top(group, record_id):
+            self.dirty.add(group)
+
+    def add(self, group, record_id, delta):
+        self.members.setdefault(group, {})[record_id] = delta
+        if group in self.dirty:
+            return
+        heap = self.heaps.setdefault(group, [])
+        if len(heap) < self.k:
+            heapq.heappush(heap, (-delta, record_id))
+        elif (-delta, record_id) > heap[0]:
+            heapq.heapreplace(heap, (-delta, record_id))
+
+    def update(self, record_id, old_action, old_lag, new_action, new_lag):
+        touched = set()
+        if old_lag is not None:
+            for group in groups_of(old_action):
+                self.remove(group, record_id)
+                touched.add(group)
+        if new_lag is not None:
+            for group in groups_of(new_action):
+                self.add(group, record_id, new_lag[0])
+                touched.add(group)
+        return touched
+
+    def settle(self):
+        """Refill groups whose top-k lost a member; returns them."""
+        refilled = set(self.dirty)
+        for group in refilled:
+            members = self.members.get(group, {})
+            heap = heapq.nlargest(self.k, ((-delta, rid) for rid, delta in members.items()))
+            heapq.heapify(heap)
+            self.heaps[group] = heap
+        self.dirty.clear()
+        for group in [g for g, heap in self.heaps.items() if not heap and not self.members.get(g)]:
+            del self.heaps[group]
+        return refilled
+
+    def top(self, group):
+        """Record ids from most to least lagging."""
+        return [rid for _, rid in sorted(self.heaps.get(group, []), reverse=True)]
+
+
+def percent(value):
+    # Math.round: halves round up, unlike Python's round().
+    return math.floor(value * 100 + 0.5)
+
+
+def explain(action, lag):
+    # Same wording as laggingActions in App.tsx.
+    delta, time_progress, actual = lag
+    return f"《{action['title']}》落后 {percent(abs(delta))}%（时间 {percent(time_progress)}%，实际 {percent(actual)}%）"
+
+
+def load_state(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(path, state):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def read_rank_rows(token, table_id):
+    """Existing LaggingRank rows by Rank_Key, plus record ids of duplicate keys."""
+    rows, duplicates = {}, []
+    for record in iter_records(token, table_id):
+        values = record.get("fields") or {}
+        key = to_text(values.get("Rank_Key"))
+        if not key or key in rows:
+            duplicates.append(record.get("record_id"))
+            continue
+        rows[key] = {
+            "record_id": record.get("record_id"),
+            "values": {
+                "Group": to_text(values.get("Group")),
+                "Rank": to_number(values.get("Rank")),
+                "Action": to_text(values.get("Action")),
+                "Action_Id": to_text(values.get("Action_Id")),
+                "Lag": to_number(values.get("Lag")),
+                "Explanation": to_text(values.get("Explanation")),
+            },
+        }
+    return rows, duplicates
+
+
+parser = argparse.ArgumentParser(description="Maintain the k most lagging actions overall, per owner and per KR.")
+parser.add_argument("--record-ids", default="", help="Only refresh these OKRPlan records (comma-separated)")
+parser.add_argument("--rebuild", action="store_true", help="Rescan OKRPlan and rebuild the ranking")
+parser.add_argument("--k", type=int, default=DEFAULT_K, help="Actions kept per group")
+parser.add_argument("--show", help="Print a group from the local state and exit: all, owner:<name> or kr:<name>")
+parser.add_argument("--dry-run", action="store_true", help="Rank without writing the LaggingRank table")
+parser.add_argument("--state", default=DEFAULT_STATE, help="Local ranking state file")
+args = parser.parse_args()
+
+state = None if args.rebuild else load_state(args.state)
+if state is not None and state.get("k") != args.k:
+    state = None
+
+if args.show:
+    if state is None:
+        print("No ranking yet. Run scripts/lagging_rank.py first.")
+        sys.exit(1)
+    rows = state["explanations"].get(args.show) or []
+    print(f"{args.show} (as of {state['as_of']}):")
+    for rank, (record_id, text) in enumerate(rows, 1):
+        print(f"{rank:>3}. {text}  [{record_id}]")
+    if not rows:
+        print("  暂无落后的 Action")
+    sys.exit(0)
+
+TOKEN = get_tenant_token()
+TABLES = get_tables(TOKEN)
+okr_table = TABLES.get("OKRPlan")
+if not okr_table:
+    print("OKRPlan table not found")
+    sys.exit(1)
+
+names = resolve_field_names({f.get("field_name") for f in get_fields(TOKEN, okr_table)})
+today = datetime.now().date()
+as_of = today.isoformat()
+if state is None:
+    state = {"k": args.k, "as_of": None, "actions": {}, "lags": {}, "tops": {}, "explanations": {}, "rows": {}}
+actions = state["actions"]
+lags = state["lags"]
+ranking = Ranking(args.k)
+record_ids = [rid.strip() for rid in args.record_ids.split(",") if rid.strip()]
+
+changed = {}
+if record_ids and state["as_of"]:
+    fetched = {r.get("record_id"): r for r in batch_get_records(TOKEN, okr_table, record_ids)}
+    for record_id in record_ids:
+        action = extract_action(fetched[record_id], names) if record_id in fetched else None
+        if action != actions.get(record_id):
+            changed[record_id] = action
+else:
+    seen = set()
+    for record in iter_records(TOKEN, okr_table):
+        record_id = record.get("record_id")
+        seen.add(record_id)
+        action = extract_action(record, names)
+        if action != actions.get(record_id):
+            changed[record_id] = action
+    changed.update({record_id: None for record_id in actions if record_id not in seen})
+
+touched = set()
+if state["as_of"] != as_of:
+    # Time progress moves every day, so every lag is recomputed from the cached attributes.
+    actions.update({rid: a for rid, a in changed.items() if a})
+    for record_id in [rid for rid, a in changed.items() if a is None]:
+        actions.pop(record_id, None)
+    lags.clear()
+    for record_id, action in actions.items():
+        lag = lag_of(action, today)
+        if lag is not None:
+            lags[record_id] = lag
+            for group in groups_of(action):
+                ranking.add(group, record_id, lag[0])
+    touched = set(ranking.heaps) | set(state["tops"])
+else:
+    ranking.load(lags, actions, state["tops"])
+    for record_id, action in changed.items():
+        new_lag = lag_of(action, today)
+        touched |= ranking.update(record_id, actions.get(record_id), lags.get(record_id), action, new_lag)
+        if action:
+            actions[record_id] = action
+        else:
+            actions.pop(record_id, None)
+        if new_lag is None:
+            lags.pop(record_id, None)
+        else:
+            lags[record_id] = new_lag
+touched |= ranking.settle()
+state["as_of"] = as_of
+
+explanations = state["explanations"]
+for group in touched:
+    top = ranking.top(group)
+    if top:
+        state["tops"][group] = top
+        explanations[group] = [[rid, explain(actions[rid], lags[rid])] for rid in top]
+    else:
+        state["tops"].pop(group, None)
+        explanations.pop(group, None)
+print(f"OKRPlan: {len(changed)} changed, {len(lags)} lagging; {len(touched)} groups re-ranked, {len(explanations)} total")
+
+target = {}
+for group, rows in explanations.items():
+    for rank, (record_id, text) in enumerate(rows, 1):
+        target[f"{group}|{rank}"] = {
+            "Group": group,
+            "Rank": rank,
+            "Action": actions[record_id]["title"],
+            "Action_Id": record_id,
+            "Lag": percent(abs(lags[record_id][0])),
+            "Explanation": text,
+        }
+rows = state["rows"]
+rank_table = TABLES.get(RANK_TABLE)
+duplicates = []
+if state.get("rank_table") != rank_table:
+    # Fresh state (--rebuild, new --k, lost file): adopt the rows already in the table instead of adding copies.
+    rows.clear()
+    if rank_table:
+        existing, duplicates = read_rank_rows(TOKEN, rank_table)
+        rows.update(existing)
+        print(f"{RANK_TABLE}: adopted {len(existing)} existing rows, {len(duplicates)} duplicate keys")
+creates = [key for key in target if key not in rows]
+updates = [key for key in target if key in rows and rows[key]["values"] != target[key]]
+deletes = [key for key in rows if key not in target]
+print(f"{RANK_TABLE}: {len(creates)} to create, {len(updates)} to update, {len(deletes) + len(duplicates)} to delete")
+if args.dry_run:
+    for rank, (record_id, text) in enumerate(explanations.get(ALL, []), 1):
+        print(f"{rank:>3}. {text}")
+    sys.exit(0)
+
+if not rank_table:
+    print(f"Creating table: {RANK_TABLE}")
+    rank_table = create_table(TOKEN, RANK_TABLE, RANK_FIELDS)
+    if not rank_table:
+        sys.exit(1)
+state["rank_table"] = rank_table
+
+created = batch_write(TOKEN, rank_table, "batch_create", [{"fields": dict(target[key], Rank_Key=key)} for key in creates])
+for key, record in zip(creates, created):
+    if record:
+        rows[key] = {"record_id": record.get("record_id"), "values": target[key]}
+updated = batch_write(
+    TOKEN, rank_table, "batch_update", [{"record_id": rows[key]["record_id"], "fields": target[key]} for key in updates]
+)
+for key, record in zip(updates, updated):
+    if record is not None:
+        rows[key]["values"] = target[key]
+deleted = batch_write(
+    TOKEN, rank_table, "batch_delete", [rows[key]["record_id"] for key in deletes] + duplicates
+)
+for key, record in zip(deletes, deleted):
+    if record is not None:
+        del rows[key]
+save_state(args.state, state)
+print("Lagging rank done.")
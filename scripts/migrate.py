@@ -0,0 +1,382 @@
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+api_base = os.environ.get("FEISHU_API_BASE", "https://open.feishu.cn")
+app_id = os.environ.get("FEISHU_APP_ID")
+app_secret = os.environ.get("FEISHU_APP_SECRET")
+app_token = os.environ.get("FEISHU_BASE_APP_TOKEN")
+
+if not (app_id and app_secret and app_token):
+    print("Missing env vars: FEISHU_APP_ID/FEISHU_APP_SECRET/FEISHU_BASE_APP_TOKEN")
+    sys.exit(1)
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPTS_DIR)
+DEFAULT_LEDGER = os.path.join(ROOT_DIR, "generated", "migrations.json")
+LEDGER_TABLE = "Migrations"
+LINK_TYPES = {18, 21}
+
+
+def http_json(method, url, data=None, token=None):
+    body = None
+    headers = {"Content-Type": "application/json; charset=utf-8"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if data is not None:
+        body = json.dumps(data).encode("utf-8")
+    req = Request(url, data=body, headers=headers, method=method)
+    try:
+        with urlopen(req) as resp:
+            raw = resp.read().decode("utf-8")
+            return json.loads(raw)
+    except HTTPError as exc:
+        body = exc.read().decode("utf-8")
+        raise RuntimeError(f"HTTP {exc.code}: {body}") from exc
+
+
+def get_tenant_token():
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/auth/v3/tenant_access_token/internal",
+        {"app_id": app_id, "app_secret": app_secret},
+    )
+    token = resp.get("tenant_access_token")
+    if not token:
+        print("Failed to get tenant access token", resp)
+        sys.exit(1)
+    return token
+
+
+def get_tables(token):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables?page_size=100",
+        None,
+        token,
+    )
+    items = resp.get("data", {}).get("items", [])
+    return {item.get("name"): item.get("table_id") for item in items}
+
+
+def get_fields(token, table_id):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/fields?page_size=200",
+        None,
+        token,
+    )
+    return resp.get("data", {}).get("items", [])
+
+
+def create_table(token, name, fields):
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables",
+        {"table": {"name": name, "fields": fields}},
+        token,
+    )
+    table_id = (resp.get("data") or {}).get("table_id")
+    if not table_id:
+        print(f"Failed to create table {name}: {resp}")
+    return table_id
+
+
+def iter_records(token, table_id, page_size=500):
+    page_token = ""
+    while True:
+        url = f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records?page_size={page_size}"
+        if page_token:
+            url += f"&page_token={page_token}"
+        resp = http_json("GET", url, None, token)
+        data = resp.get("data") or {}
+        for item in data.get("items") or []:
+            yield item
+        page_token = data.get("page_token")
+        if not data.get("has_more") or not page_token:
+            break
+
+
+def create_record(token, table_id, fields):
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records",
+        {"fields": fields},
+        token,
+    )
+    if resp.get("code") not in (0, None):
+        print(f"Failed to record migration: {resp}")
+        return False
+    return True
+
+
+def script_constant(script, name):
+    """Read a literal constant (e.g. FIELDS_TO_ADD) from a migration script without running it."""
+    with open(os.path.join(SCRIPTS_DIR, script), "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == name for t in node.targets):
+            return ast.literal_eval(node.value)
+    raise KeyError(f"{name} not found in {script}")
+
+
+# Checks against the introspected schema ({table: {field_name: field}}). A migration
+# whose check already holds is recorded as applied without running its script.
+def has_fields(schema, table, names):
+    return table not in schema or all(name in schema[table] for name in names)
+
+
+def planning_fields_done(schema):
+    return all(has_fields(schema, t, [f["field_name"] for f in fields])
+               for t, fields in script_constant("add_planning_fields.py", "FIELDS_TO_ADD").items())
+
+
+def plan_week_formula_done(schema):
+    return "Actions" not in schema or (schema["Actions"].get("Plan_Week") or {}).get("type") == 20
+
+
+def field_types_done(schema):
+    desired = script_constant("normalize_field_types.py", "DESIRED_TYPES")
+    return all(
+        field_name not in schema.get(table, {}) or schema[table][field_name].get("type") == field_type
+        for table, fields in desired.items()
+        for field_name, field_type in fields.items()
+    )
+
+
+def okrplan_fields_done(schema):
+    names = [f["field_name"] for f in script_constant("ensure_okrplan_fields.py", "FIELDS_TO_ADD")]
+    return "OKRPlan" in schema and has_fields(schema, "OKRPlan", names)
+
+
+def action_status_done(schema):
+    return "OKRPlan" in schema and any(n in schema["OKRPlan"] for n in ("Action Status", "Action_Status", "Status"))
+
+
+def score_field_done(schema):
+    return "OKRPlan" in schema and "Score" in schema["OKRPlan"]
+
+
+def links_rewired(schema):
+    target = schema.get("OKRPlan", {}).get("__table_id__")
+    if not target:
+        return False
+    for table, names in script_constant("rewire_links_to_okrplan.py", "FIELDS_TO_REWIRE").items():
+        for name in names if table in schema else []:
+            field = schema[table].get(name) or {}
+            if field.get("type") not in LINK_TYPES or (field.get("property") or {}).get("table_id") != target:
+                return False
+    return True
+
+
+# Ordered registry: (id, script, check). New migrations are appended, never reordered.
+MIGRATIONS = [
+    ("0001_planning_fields", "add_planning_fields.py", planning_fields_done),
+    ("0002_plan_week_formula", "convert_plan_week_to_formula.py", plan_week_formula_done),
+    ("0003_normalize_field_types", "normalize_field_types.py", field_types_done),
+    ("0004_okrplan_fields", "ensure_okrplan_fields.py", okrplan_fields_done),
+    ("0005_okrplan_action_status", "add_okrplan_action_status.py", action_status_done),
+    ("0006_okrplan_score_formula", "add_okrplan_score_field.py", score_field_done),
+    ("0007_rewire_links_to_okrplan", "rewire_links_to_okrplan.py", links_rewired),
+]
+
+# Migrations that delete and recreate fields, losing their values; never run unattended.
+DESTRUCTIVE = {"0007_rewire_links_to_okrplan"}
+
+
+class LocalLedger:
+    def __init__(self, path):
+        self.path = path
+        self.data = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.data = json.load(f)
+
+    def applied(self):
+        return self.data.get(app_token, {})
+
+    def record(self, migration_id, how):
+        self.data.setdefault(app_token, {})[migration_id] = {
+            "applied_at": datetime.now().isoformat(timespec="seconds"),
+            "how": how,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class BaseLedger:
+    """Ledger kept in a Migrations table of the Base itself, shared by everyone deploying to it."""
+
+    def __init__(self, session):
+        self.session = session
+        self.table_id = session.tables().get(LEDGER_TABLE)
+        self.rows = {}
+        if self.table_id:
+            for record in iter_records(session.token(), self.table_id):
+                values = record.get("fields") or {}
+                migration_id = values.get("Migration")
+                if isinstance(migration_id, list):
+                    migration_id = "".join(seg.get("text", "") for seg in migration_id if isinstance(seg, dict))
+                applied_at = values.get("Applied_At")
+                if isinstance(applied_at, (int, float)):
+                    applied_at = datetime.fromtimestamp(applied_at / 1000).isoformat(timespec="seconds")
+                if migration_id:
+                    self.rows[migration_id] = {"applied_at": applied_at, "how": values.get("How")}
+
+    def applied(self):
+        return self.rows
+
+    def record(self, migration_id, how):
+        if not self.table_id:
+            self.table_id = create_table(
+                self.session.token(),
+                LEDGER_TABLE,
+                [
+                    {"field_name": "Migration", "type": 1},
+                    {"field_name": "Applied_At", "type": 5},
+                    {"field_name": "How", "type": 1},
+                ],
+            )
+            if not self.table_id:
+                sys.exit(1)
+        applied_at = int(datetime.now().timestamp() * 1000)
+        create_record(self.session.token(), self.table_id, {"Migration": migration_id, "Applied_At": applied_at, "How": how})
+        self.rows[migration_id] = {"applied_at": datetime.now().isoformat(timespec="seconds"), "how": how}
+
+
+class Session:
+    """Lazily fetched token/tables/schema so an up-to-date run makes no API calls."""
+
+    def __init__(self):
+        self._token = None
+        self._tables = None
+        self._schema = None
+
+    def token(self):
+        if self._token is None:
+            self._token = get_tenant_token()
+        return self._token
+
+    def tables(self):
+        if self._tables is None:
+            self._tables = get_tables(self.token())
+        return self._tables
+
+    def schema(self):
+        if self._schema is None:
+            self._schema = {}
+            for name, table_id in self.tables().items():
+                fields = {f.get("field_name"): f for f in get_fields(self.token(), table_id)}
+                fields["__table_id__"] = table_id
+                self._schema[name] = fields
+        return self._schema
+
+    def invalidate(self):
+        self._tables = None
+        self._schema = None
+
+
+def run_migration(script):
+    proc = subprocess.run(
+        [sys.executable, os.path.join(SCRIPTS_DIR, script)],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+    lines = proc.stdout.splitlines()
+    for line in lines:
+        print(f"    {line}")
+    # Field scripts report per-field problems as "- Failed ..." / "- Update not supported ...".
+    failed = [line for line in lines if line.lstrip("- ").startswith(("Failed", "Update not supported"))]
+    return proc.returncode == 0 and not failed
+
+
+parser = argparse.ArgumentParser(description="Apply pending schema migrations in order, skipping applied ones.")
+parser.add_argument("--ledger", choices=["local", "base"], default="local", help="Where the applied ledger lives")
+parser.add_argument("--ledger-file", default=DEFAULT_LEDGER, help="Local ledger file")
+parser.add_argument("--status", action="store_true", help="Show applied/pending migrations and exit")
+parser.add_argument("--dry-run", action="store_true", help="Show what would run without running it")
+parser.add_argument("--no-detect", action="store_true", help="Run pending scripts even if the schema already matches")
+parser.add_argument(
+    "--allow-destructive",
+    action="store_true",
+    help="Also run migrations that recreate fields and lose their values (back up first)",
+)
+parser.add_argument(
+    "--mark-applied",
+    default="",
+    help="Record these migration ids as applied without running them (comma-separated), "
+    "e.g. when Feishu refuses a conversion the migration needs",
+)
+args = parser.parse_args()
+
+session = Session()
+ledger = BaseLedger(session) if args.ledger == "base" else LocalLedger(args.ledger_file)
+applied = ledger.applied()
+
+marked = [m.strip() for m in args.mark_applied.split(",") if m.strip()]
+unknown = [m for m in marked if m not in {migration_id for migration_id, _, _ in MIGRATIONS}]
+if unknown:
+    print(f"Unknown migration id(s): {', '.join(unknown)}")
+    sys.exit(1)
+for migration_id in marked:
+    if migration_id in applied:
+        print(f"- {migration_id}: already applied")
+        continue
+    check = next(check for m, _, check in MIGRATIONS if m == migration_id)
+    if not check(session.schema()):
+        print(f"Warning: {migration_id} is marked applied but the schema does not match; fix it by hand.")
+    if args.dry_run:
+        print(f"- {migration_id}: would mark applied")
+        continue
+    ledger.record(migration_id, "marked")
+    print(f"- {migration_id}: marked applied")
+applied = ledger.applied()
+pending = [m for m in MIGRATIONS if m[0] not in applied and m[0] not in marked]
+
+if args.status or not pending:
+    for migration_id, script, _ in MIGRATIONS:
+        entry = applied.get(migration_id)
+        state = f"applied ({entry.get('how')}, {entry.get('applied_at')})" if entry else "pending"
+        print(f"- {migration_id:<32} {script:<36} {state}")
+    if not pending:
+        print("Up to date.")
+    sys.exit(0)
+
+print(f"{len(pending)} pending migration(s)")
+for migration_id, script, check in pending:
+    if not args.no_detect and check(session.schema()):
+        print(f"- {migration_id}: already satisfied by the schema")
+        if not args.dry_run:
+            ledger.record(migration_id, "detected")
+        continue
+    if args.dry_run:
+        print(f"- {migration_id}: would run {script}" + (" (destructive)" if migration_id in DESTRUCTIVE else ""))
+        continue
+    if migration_id in DESTRUCTIVE and not args.allow_destructive:
+        print(f"Failed: {migration_id} deletes and recreates fields, so their values are lost.")
+        print("Back up first with scripts/backup_base.sh, then rerun with --allow-destructive.")
+        sys.exit(1)
+    print(f"- {migration_id}: running {script}")
+    if not run_migration(script):
+        print(f"Failed: {migration_id}; later migrations were not run.")
+        print(f"If the remaining difference is known and acceptable, rerun with --mark-applied {migration_id}.")
+        sys.exit(1)
+    # The script changed the schema; introspect again and confirm it actually did what it should.
+    session.invalidate()
+    if not check(session.schema()):
+        print(f"Failed: {migration_id} exited cleanly but the schema still does not match; not recorded.")
+        print(f"If the remaining difference is known and acceptable, rerun with --mark-applied {migration_id}.")
+        sys.exit(1)
+    ledger.record(migration_id, "ran")
+
+print("Migrations done.")
@@ -10,4 +10,4 @@ if [[ -f "$ROOT_DIR/.env" ]]; then
   set +a
 fi
 
-python3 "$ROOT_DIR/scripts/normalize_field_types.py"
+python3 ${OKR_PROFILE:+"$ROOT_DIR/scripts/profile_run.py"} "$ROOT_DIR/scripts/normalize_field_types.py"
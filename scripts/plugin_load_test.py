@@ -0,0 +1,362 @@
+import argparse
+import gzip
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_REPORT = os.path.join(ROOT_DIR, "generated", "load_test_report.json")
+# The plugin's getRecords({ pageSize: 5000 }) is served as OpenAPI pages of at most 500.
+PAGE_SIZE = 500
+STAND_IN_TOKEN = "appLoadTest"
+TOKEN_PLACEHOLDER = "{app_token}"
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class StandIn:
+    """Read-only local Bitable with OKRPlan/Evidence of a given size and a simple server cost model.
+
+    Each request costs base_ms + per_kb_ms * response size, and at most `concurrency`
+    requests are served at once, so queueing shows up in the tail like it does upstream.
+    """
+
+    def __init__(self, okr_rows, evidence_rows, base_ms, per_kb_ms, concurrency, seed=7):
+        rnd = random.Random(seed)
+        now = int(time.time() * 1000)
+        day = 86400000
+        self.tables = {
+            "tblOKRPlan": ("OKRPlan", [
+                {"field_id": "fldAct", "field_name": "Actions", "type": 1, "is_primary": True},
+                {"field_id": "fldObj", "field_name": "Objectives", "type": 1},
+                {"field_id": "fldKR", "field_name": "Key Results", "type": 1},
+                {"field_id": "fldOwn", "field_name": "Owner", "type": 11},
+                {"field_id": "fldSt", "field_name": "Action Status", "type": 3, "property": {"options": [
+                    {"id": f"opt{n}", "name": n} for n in ("Backlog", "Today", "Doing", "Done", "Blocked")]}},
+                {"field_id": "fldMin", "field_name": "Action Est Minutes", "type": 2},
+                {"field_id": "fldPS", "field_name": "预期开始", "type": 5},
+                {"field_id": "fldPE", "field_name": "预期结束", "type": 5},
+                {"field_id": "fldAP", "field_name": "Action Progress", "type": 2},
+                {"field_id": "fldKP", "field_name": "KR_Progress", "type": 2},
+            ]),
+            "tblEvidence": ("Evidence", [
+                {"field_id": "fldET", "field_name": "Evidence_Title", "type": 1, "is_primary": True},
+                {"field_id": "fldEY", "field_name": "Evidence_Type", "type": 3},
+                {"field_id": "fldLk", "field_name": "Link", "type": 15},
+                {"field_id": "fldDt", "field_name": "Date", "type": 5},
+                {"field_id": "fldEA", "field_name": "Action", "type": 18, "property": {"table_id": "tblOKRPlan"}},
+            ]),
+        }
+        okr = []
+        for i in range(okr_rows):
+            start = now - rnd.randint(-10, 30) * day
+            okr.append({"record_id": f"recA{i:07d}", "fields": {
+                "Actions": [{"type": "text", "text": f"Action {i} 验证搜索价值"}],
+                "Objectives": f"O{i % 12}",
+                "Key Results": f"KR{i % 60}",
+                "Owner": [{"id": f"ou_{i % 40}", "name": f"User {i % 40}"}],
+                "Action Status": rnd.choice(["Backlog", "Today", "Doing", "Done"]),
+                "Action Est Minutes": rnd.choice([20, 30, 45, 60, 90]),
+                "预期开始": start,
+                "预期结束": start + rnd.randint(0, 14) * day,
+                "Action Progress": rnd.choice([0, 20, 50, 80, 100]),
+                "KR_Progress": rnd.randint(0, 100),
+            }})
+        evidence = []
+        for i in range(evidence_rows):
+            evidence.append({"record_id": f"recE{i:07d}", "fields": {
+                "Evidence_Title": [{"type": "text", "text": f"证据 {i}"}],
+                "Evidence_Type": "Doc",
+                "Link": {"link": f"https://example.com/{i}", "text": f"doc {i}"},
+                "Date": now - rnd.randint(0, 60) * day,
+                "Action": [{"record_ids": [f"recA{rnd.randrange(max(1, okr_rows)):07d}"], "table_id": "tblOKRPlan"}],
+            }})
+        self.records = {"tblOKRPlan": okr, "tblEvidence": evidence}
+        self.base_ms = base_ms
+        self.per_kb_ms = per_kb_ms
+        self.slots = threading.BoundedSemaphore(max(1, concurrency))
+        self.pages = {}
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "bytes": 0}
+
+    def respond(self, path, query):
+        parts = path.strip("/").split("/")
+        if path.endswith("tenant_access_token/internal"):
+            return {"code": 0, "tenant_access_token": "t-load-test", "expire": 7200}
+        rest = parts[5:] if len(parts) > 5 else []
+        if rest == ["tables"]:
+            return {"code": 0, "data": {"items": [{"table_id": tid, "name": t[0]} for tid, t in self.tables.items()],
+                                        "has_more": False}}
+        if len(rest) == 3 and rest[1] in self.tables and rest[2] == "fields":
+            return {"code": 0, "data": {"items": self.tables[rest[1]][1], "has_more": False}}
+        if len(rest) == 3 and rest[1] in self.records and rest[2] == "records":
+            size = min(int(query.get("page_size", 20)), PAGE_SIZE)
+            start = int(query.get("page_token") or 0)
+            rows = self.records[rest[1]]
+            more = start + size < len(rows)
+            return {"code": 0, "data": {"items": rows[start:start + size], "has_more": more,
+                                        "page_token": str(start + size) if more else "", "total": len(rows)}}
+        return {"code": 404, "msg": "unknown"}
+
+    def body_for(self, path, query):
+        key = (path, tuple(sorted(query.items())))
+        body = self.pages.get(key)
+        if body is None:
+            body = json.dumps(self.respond(path, query), ensure_ascii=False).encode("utf-8")
+            self.pages[key] = body
+        return body
+
+    def start(self, port=0):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def handle_one(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                parts = urlsplit(self.path)
+                query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+                body = stand_in.body_for(parts.path, query)
+                with stand_in.slots:
+                    time.sleep((stand_in.base_ms + stand_in.per_kb_ms * len(body) / 1024) / 1000)
+                with stand_in.lock:
+                    stand_in.stats["requests"] += 1
+                    stand_in.stats["bytes"] += len(body)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = handle_one
+            do_POST = handle_one
+
+        server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class Client:
+    """One simulated user: a keep-alive connection like the panel's webview."""
+
+    def __init__(self, base_url, bearer, shared_cache, cache_mode, cache_ttl):
+        parts = urlsplit(base_url)
+        conn_cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self.conn = conn_cls(parts.netloc, timeout=60)
+        self.prefix = parts.path.rstrip("/")
+        self.bearer = bearer
+        self.shared_cache = shared_cache
+        self.cache_mode = cache_mode
+        self.cache_ttl = cache_ttl
+        self.meta_cache = {}
+        self.samples = []
+
+    def request(self, method, path, body=None, cacheable=None):
+        cache = None
+        if cacheable == "meta" and self.cache_mode in ("meta", "shared"):
+            cache = self.meta_cache
+        elif cacheable == "records" and self.cache_mode == "shared":
+            cache = self.shared_cache
+        if cache is not None:
+            hit = cache.get(path)
+            if hit and time.monotonic() - hit[0] < self.cache_ttl:
+                return hit[1]
+        headers = {"Content-Type": "application/json; charset=utf-8"}
+        if self.bearer:
+            headers["Authorization"] = f"Bearer {self.bearer}"
+        started = time.monotonic()
+        status, raw = 0, b""
+        for attempt in range(2):
+            try:
+                self.conn.request(method, self.prefix + path, body=body, headers=headers)
+                resp = self.conn.getresponse()
+                status, raw = resp.status, resp.read()
+                break
+            except (http.client.HTTPException, OSError):
+                # Server closed the idle keep-alive connection; reconnect once.
+                self.conn.close()
+                if attempt:
+                    status = -1
+        elapsed = time.monotonic() - started
+        self.samples.append((elapsed, len(raw), status))
+        try:
+            data = json.loads(raw) if raw else {}
+        except ValueError:
+            data = {}
+        if cache is not None and status == 200:
+            cache[path] = (time.monotonic(), data)
+        return data
+
+    def list_pages(self, path):
+        page_token = ""
+        while True:
+            url = f"{path}?page_size={PAGE_SIZE}" + (f"&page_token={page_token}" if page_token else "")
+            data = self.request("GET", url, cacheable="records").get("data") or {}
+            page_token = data.get("page_token")
+            if not data.get("has_more") or not page_token:
+                break
+
+    def refresh_data(self, app):
+        """The panel's refreshData: table list, both field lists, then OKRPlan and Evidence records."""
+        tables = self.request("GET", f"/open-apis/bitable/v1/apps/{app}/tables?page_size=100", cacheable="meta")
+        ids = {item.get("name"): item.get("table_id") for item in (tables.get("data") or {}).get("items") or []}
+        for name in ("OKRPlan", "Evidence"):
+            if ids.get(name):
+                self.request("GET", f"/open-apis/bitable/v1/apps/{app}/tables/{ids[name]}/fields?page_size=200",
+                             cacheable="meta")
+        for name in ("OKRPlan", "Evidence"):
+            if ids.get(name):
+                self.list_pages(f"/open-apis/bitable/v1/apps/{app}/tables/{ids[name]}/records")
+
+    def replay_trace(self, app, entries):
+        for entry in entries:
+            method, path, body = entry["key"].split(" ", 2)
+            path = path.replace(TOKEN_PLACEHOLDER, app)
+            self.request(method, path, body.replace(TOKEN_PLACEHOLDER, app).encode("utf-8") if body else None)
+
+
+def load_trace(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        cassette = json.load(f)
+    # Token requests happen once per process, not per panel open.
+    return [e for e in cassette["entries"] if "tenant_access_token" not in e["key"]]
+
+
+def get_tenant_token(base_url, app_id, app_secret):
+    client = Client(base_url, None, {}, "none", 0)
+    resp = client.request("POST", "/open-apis/auth/v3/tenant_access_token/internal",
+                          json.dumps({"app_id": app_id, "app_secret": app_secret}).encode("utf-8"))
+    token = resp.get("tenant_access_token")
+    if not token:
+        print("Failed to get tenant access token", resp)
+        sys.exit(1)
+    return token
+
+
+parser = argparse.ArgumentParser(description="Simulate many users opening the plugin panel at once.")
+parser.add_argument("--users", type=int, default=50, help="Concurrent simulated users")
+parser.add_argument("--opens", type=int, default=1, help="Panel opens per user")
+parser.add_argument("--ramp", type=float, default=0.0, help="Spread user start times over this many seconds")
+parser.add_argument("--think", type=float, default=0.0, help="Seconds between one user's opens")
+parser.add_argument("--trace", help="Replay this http_cassette recording per open instead of refreshData")
+parser.add_argument("--cache", choices=["none", "meta", "shared"], default="none",
+                    help="meta: reuse table/field lists per user; shared: also one shared record-page cache")
+parser.add_argument("--cache-ttl", type=float, default=30.0, help="Cache entry lifetime in seconds")
+parser.add_argument("--stand-in", action="store_true", help="Run against a built-in local Bitable stand-in")
+parser.add_argument("--okr-rows", type=int, default=5000, help="Stand-in OKRPlan size")
+parser.add_argument("--evidence-rows", type=int, default=2000, help="Stand-in Evidence size")
+parser.add_argument("--server-ms", type=float, default=30.0, help="Stand-in base cost per request (ms)")
+parser.add_argument("--server-ms-per-kb", type=float, default=0.2, help="Stand-in cost per KB of response (ms)")
+parser.add_argument("--server-concurrency", type=int, default=16, help="Requests the stand-in serves at once")
+parser.add_argument("--report", default=DEFAULT_REPORT, help="Where to write the JSON report")
+args = parser.parse_args()
+
+stand_in = None
+if args.stand_in:
+    stand_in = StandIn(args.okr_rows, args.evidence_rows, args.server_ms, args.server_ms_per_kb, args.server_concurrency)
+    base_url = stand_in.start()
+    app, bearer = STAND_IN_TOKEN, None
+else:
+    base_url = os.environ.get("FEISHU_API_BASE", "https://open.feishu.cn")
+    app_id = os.environ.get("FEISHU_APP_ID")
+    app_secret = os.environ.get("FEISHU_APP_SECRET")
+    app = os.environ.get("FEISHU_BASE_APP_TOKEN")
+    if not (app_id and app_secret and app):
+        print("Missing env vars: FEISHU_APP_ID/FEISHU_APP_SECRET/FEISHU_BASE_APP_TOKEN (or pass --stand-in)")
+        sys.exit(1)
+    bearer = get_tenant_token(base_url, app_id, app_secret)
+
+trace = load_trace(args.trace) if args.trace else None
+shared_cache = {}
+clients = [Client(base_url, bearer, shared_cache, args.cache, args.cache_ttl) for _ in range(args.users)]
+open_times = []
+open_lock = threading.Lock()
+start_gate = threading.Event()
+
+
+def run_user(index, client):
+    start_gate.wait()
+    if args.ramp:
+        time.sleep(args.ramp * index / max(1, args.users))
+    for n in range(args.opens):
+        if n and args.think:
+            time.sleep(args.think)
+        started = time.monotonic()
+        if trace is not None:
+            client.replay_trace(app, trace)
+        else:
+            client.refresh_data(app)
+        with open_lock:
+            open_times.append(time.monotonic() - started)
+    client.conn.close()
+
+
+threads = [threading.Thread(target=run_user, args=(i, c), daemon=True) for i, c in enumerate(clients)]
+for thread in threads:
+    thread.start()
+began = time.monotonic()
+start_gate.set()
+for thread in threads:
+    thread.join()
+wall = time.monotonic() - began
+
+samples = [s for c in clients for s in c.samples]
+latencies = [s[0] for s in samples]
+errors = sum(1 for s in samples if s[2] != 200)
+client_bytes = sum(s[1] for s in samples)
+server_bytes = stand_in.stats["bytes"] if stand_in else client_bytes
+report = {
+    "generated_at": datetime.now().isoformat(timespec="seconds"),
+    "target": "stand-in" if stand_in else base_url,
+    "pattern": f"trace:{os.path.basename(args.trace)}" if trace is not None else "refreshData",
+    "users": args.users,
+    "opens_per_user": args.opens,
+    "cache": args.cache,
+    "wall_seconds": round(wall, 3),
+    "opens": len(open_times),
+    "opens_per_second": round(len(open_times) / wall, 2) if wall else 0,
+    "requests": len(samples),
+    "requests_per_second": round(len(samples) / wall, 1) if wall else 0,
+    "errors": errors,
+    "open_latency_ms": {p: round(percentile(open_times, q) * 1000, 1) for p, q in (("p50", 50), ("p95", 95), ("p99", 99))},
+    "request_latency_ms": {p: round(percentile(latencies, q) * 1000, 1) for p, q in (("p50", 50), ("p95", 95), ("p99", 99))},
+    "server_bytes_per_user": server_bytes // max(1, args.users),
+    "server_bytes_total": server_bytes,
+}
+if stand_in:
+    report["stand_in"] = {"okr_rows": args.okr_rows, "evidence_rows": args.evidence_rows,
+                          "server_ms": args.server_ms, "server_ms_per_kb": args.server_ms_per_kb,
+                          "server_concurrency": args.server_concurrency}
+
+os.makedirs(os.path.dirname(os.path.abspath(args.report)), exist_ok=True)
+tmp_path = args.report + ".tmp"
+with open(tmp_path, "w", encoding="utf-8") as f:
+    json.dump(report, f, ensure_ascii=False, indent=2)
+os.replace(tmp_path, args.report)
+
+print(f"{args.users} users x {args.opens} opens ({report['pattern']}, cache={args.cache}) in {wall:.1f}s")
+print(f"- throughput: {report['opens_per_second']} opens/s, {report['requests_per_second']} req/s, {errors} errors")
+print(f"- open latency ms: p50 {report['open_latency_ms']['p50']}, p95 {report['open_latency_ms']['p95']}, "
+      f"p99 {report['open_latency_ms']['p99']}")
+print(f"- request latency ms: p50 {report['request_latency_ms']['p50']}, p95 {report['request_latency_ms']['p95']}, "
+      f"p99 {report['request_latency_ms']['p99']}")
+print(f"- server bytes per user: {report['server_bytes_per_user'] / 1024:.0f} KB")
+print(f"Report written to {args.report}")
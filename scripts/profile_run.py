@@ -0,0 +1,195 @@
+import argparse
+import cProfile
+import json
+import os
+import pstats
+import runpy
+import sys
+import threading
+import time
+import tracemalloc
+import urllib.request
+from datetime import datetime
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DIR = os.path.join(ROOT_DIR, "generated", "profiles")
+MEMORY_FRAMES = 10
+
+
+class NetworkClock:
+    """Wraps urlopen so time spent waiting on HTTP (including reading the body) is measured apart."""
+
+    def __init__(self, real_urlopen):
+        self.real_urlopen = real_urlopen
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.seconds = 0.0
+        self.bytes = 0
+
+    def add(self, seconds, size=0, request=False):
+        with self.lock:
+            self.seconds += seconds
+            self.bytes += size
+            self.requests += 1 if request else 0
+
+    def urlopen(self, *args, **kwargs):
+        started = time.monotonic()
+        try:
+            resp = self.real_urlopen(*args, **kwargs)
+        finally:
+            self.add(time.monotonic() - started, request=True)
+        clock = self
+        real_read = resp.read
+
+        def timed_read(*read_args):
+            read_started = time.monotonic()
+            data = real_read(*read_args)
+            clock.add(time.monotonic() - read_started, len(data))
+            return data
+
+        resp.read = timed_read
+        return resp
+
+
+class ThreadProfiles:
+    """cProfile only sees the thread it was enabled in; give every worker thread its own profiler."""
+
+    def __init__(self):
+        self.profiles = []
+        self.lock = threading.Lock()
+
+    def start_thread(self, *_):
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        with self.lock:
+            self.profiles.append(profile)
+        profile.enable()
+
+    def merged(self, main):
+        main.disable()
+        stats = pstats.Stats(main)
+        with self.lock:
+            for profile in self.profiles:
+                profile.disable()
+                try:
+                    stats.add(profile)
+                except TypeError:
+                    # A thread that never made a call has nothing to merge.
+                    pass
+        return stats
+
+
+def top_functions(stats, limit):
+    rows = []
+    for (filename, line, name), (_, calls, self_time, cumulative, _) in stats.stats.items():
+        rows.append({
+            "function": f"{os.path.relpath(filename, ROOT_DIR) if filename.startswith(ROOT_DIR) else filename}:{line}({name})",
+            "calls": calls,
+            "self_s": round(self_time, 4),
+            "cumulative_s": round(cumulative, 4),
+        })
+    rows.sort(key=lambda row: row["self_s"], reverse=True)
+    return rows[:limit]
+
+
+def top_allocations(snapshot, limit):
+    rows = []
+    for stat in snapshot.statistics("lineno")[:limit]:
+        frame = stat.traceback[0]
+        filename = frame.filename
+        rows.append({
+            "line": f"{os.path.relpath(filename, ROOT_DIR) if filename.startswith(ROOT_DIR) else filename}:{frame.lineno}",
+            "kb": round(stat.size / 1024, 1),
+            "blocks": stat.count,
+        })
+    return rows
+
+
+parser = argparse.ArgumentParser(description="Run a script under cProfile and/or tracemalloc with a network/compute split.")
+parser.add_argument("--mode", choices=["cpu", "mem", "both"], default=os.environ.get("OKR_PROFILE") or "cpu",
+                    help="cpu: cProfile, mem: tracemalloc, both (default from OKR_PROFILE)")
+parser.add_argument("--top", type=int, default=int(os.environ.get("OKR_PROFILE_TOP", "15")), help="Hotspots to print")
+parser.add_argument("--out", default=os.environ.get("OKR_PROFILE_DIR", DEFAULT_DIR), help="Directory for profile artifacts")
+parser.add_argument("script", help="Script to run, e.g. scripts/seed_mock_data.py")
+parser.add_argument("script_args", nargs=argparse.REMAINDER, help="Arguments passed to the script")
+args = parser.parse_args()
+
+if args.mode not in ("cpu", "mem", "both"):
+    args.mode = "cpu"
+
+clock = NetworkClock(urllib.request.urlopen)
+urllib.request.urlopen = clock.urlopen
+sys.argv = [args.script] + args.script_args
+# Scripts import siblings (aimd_limiter, snapshot_reader) from their own directory.
+sys.path.insert(0, os.path.dirname(os.path.abspath(args.script)))
+
+profile = thread_profiles = None
+if args.mode in ("cpu", "both"):
+    thread_profiles = ThreadProfiles()
+    threading.setprofile(thread_profiles.start_thread)
+    profile = cProfile.Profile()
+if args.mode in ("mem", "both"):
+    tracemalloc.start(MEMORY_FRAMES)
+
+exit_code = 0
+error = None
+wall_started = time.monotonic()
+cpu_started = time.process_time()
+if profile:
+    profile.enable()
+try:
+    runpy.run_path(args.script, run_name="__main__")
+except SystemExit as exc:
+    exit_code = exc.code if isinstance(exc.code, int) else (0 if exc.code is None else 1)
+except BaseException as exc:  # a crashed run is the one worth profiling; re-raised after the artifacts
+    error = exc
+    exit_code = 1
+finally:
+    wall = time.monotonic() - wall_started
+    cpu = time.process_time() - cpu_started
+    threading.setprofile(None)
+
+stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+base_name = os.path.join(args.out, f"{os.path.splitext(os.path.basename(args.script))[0]}-{stamp}")
+os.makedirs(args.out, exist_ok=True)
+summary = {
+    "script": args.script,
+    "args": args.script_args,
+    "mode": args.mode,
+    "exit_code": exit_code,
+    "error": f"{type(error).__name__}: {error}" if error else None,
+    "wall_s": round(wall, 3),
+    "cpu_s": round(cpu, 3),
+    # Summed over threads, so it can exceed wall time when requests run in parallel.
+    "network_wait_s": round(clock.seconds, 3),
+    "network_requests": clock.requests,
+    "network_kb": round(clock.bytes / 1024, 1),
+}
+if profile:
+    stats = thread_profiles.merged(profile)
+    stats.dump_stats(base_name + ".prof")
+    summary["cpu_hotspots"] = top_functions(stats, args.top)
+if args.mode in ("mem", "both"):
+    snapshot = tracemalloc.take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    summary["memory_peak_kb"] = round(peak / 1024, 1)
+    summary["memory_current_kb"] = round(current / 1024, 1)
+    summary["memory_hotspots"] = top_allocations(snapshot, args.top)
+with open(base_name + ".json", "w", encoding="utf-8") as f:
+    json.dump(summary, f, ensure_ascii=False, indent=2)
+
+out = sys.stderr
+print(f"\n== profile: {args.script} ({args.mode}) ==", file=out)
+print(f"wall {wall:.2f}s, cpu {cpu:.2f}s, idle/wait {max(0.0, wall - cpu):.2f}s; "
+      f"network {clock.seconds:.2f}s over {clock.requests} requests ({clock.bytes / 1024:.0f} KB)", file=out)
+for row in summary.get("cpu_hotspots", []):
+    print(f"  {row['self_s']:>8.3f}s self {row['cumulative_s']:>8.3f}s cum {row['calls']:>8} calls  {row['function']}", file=out)
+if "memory_peak_kb" in summary:
+    print(f"memory peak {summary['memory_peak_kb']:.0f} KB", file=out)
+    for row in summary["memory_hotspots"]:
+        print(f"  {row['kb']:>10.1f} KB {row['blocks']:>8} blocks  {row['line']}", file=out)
+print(f"Profile written to {base_name}.json" + (f" and {base_name}.prof" if profile else ""), file=out)
+if error:
+    raise error
+sys.exit(exit_code)
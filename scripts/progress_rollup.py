@@ -0,0 +1,428 @@
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from aimd_limiter import HTTP_TIMEOUT, run_adaptive
+
+api_base = os.environ.get("FEISHU_API_BASE", "https://open.feishu.cn")
+app_id = os.environ.get("FEISHU_APP_ID")
+app_secret = os.environ.get("FEISHU_APP_SECRET")
+app_token = os.environ.get("FEISHU_BASE_APP_TOKEN")
+
+if not (app_id and app_secret and app_token):
+    print("Missing env vars: FEISHU_APP_ID/FEISHU_APP_SECRET/FEISHU_BASE_APP_TOKEN")
+    sys.exit(1)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_STATE = os.path.join(ROOT_DIR, "generated", "progress_rollup.json")
+BATCH_SIZE = 500
+KR_PROGRESS_FIELD = "KR_Progress"
+OBJECTIVE_PROGRESS_FIELD = "Objective_Progress"
+
+FIELD_CANDIDATES = {
+    "objective": ["Objectives", "Objective", "O_Title"],
+    "kr": ["Key Results", "KR_Title", "KR"],
+    "status": ["Action Status", "Action_Status", "Status"],
+    "progress": ["Action Progress"],
+    # PRD A1: weights are optional; missing weights count as 1.
+    "weight": ["Action_Weight", "Action Weight"],
+    "kr_weight": ["KR_Weight", "KR Weight"],
+}
+
+
+def http_json(method, url, data=None, token=None):
+    body = None
+    headers = {"Content-Type": "application/json; charset=utf-8"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if data is not None:
+        body = json.dumps(data).encode("utf-8")
+    req = Request(url, data=body, headers=headers, method=method)
+    try:
+        with urlopen(req, timeout=HTTP_TIMEOUT) as resp:
+            raw = resp.read().decode("utf-8")
+            return json.loads(raw)
+    except HTTPError as exc:
+        body = exc.read().decode("utf-8")
+        raise RuntimeError(f"HTTP {exc.code}: {body}") from exc
+
+
+def get_tenant_token():
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/auth/v3/tenant_access_token/internal",
+        {"app_id": app_id, "app_secret": app_secret},
+    )
+    token = resp.get("tenant_access_token")
+    if not token:
+        print("Failed to get tenant access token", resp)
+        sys.exit(1)
+    return token
+
+
+def get_tables(token):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables?page_size=100",
+        None,
+        token,
+    )
+    items = resp.get("data", {}).get("items", [])
+    return {item.get("name"): item.get("table_id") for item in items}
+
+
+def get_fields(token, table_id):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/fields?page_size=200",
+        None,
+        token,
+    )
+    return resp.get("data", {}).get("items", [])
+
+
+def create_field(token, table_id, field_config):
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/fields",
+        field_config,
+        token,
+    )
+    if resp.get("code") not in (0, None):
+        print(f"Failed to create field {field_config['field_name']}: {resp}")
+        return False
+    return True
+
+
+def iter_records(token, table_id, page_size=500):
+    page_token = ""
+    while True:
+        url = f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records?page_size={page_size}"
+        if page_token:
+            url += f"&page_token={page_token}"
+        resp = http_json("GET", url, None, token)
+        data = resp.get("data") or {}
+        for item in data.get("items") or []:
+            yield item
+        page_token = data.get("page_token")
+        if not data.get("has_more") or not page_token:
+            break
+
+
+def batch_get_records(token, table_id, record_ids):
+    records = []
+    for i in range(0, len(record_ids), 100):
+        resp = http_json(
+            "POST",
+            f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_get",
+            {"record_ids": record_ids[i:i + 100]},
+            token,
+        )
+        records.extend((resp.get("data") or {}).get("records") or [])
+    return records
+
+
+def batch_update_records(token, table_id, records):
+    chunks = [records[i:i + BATCH_SIZE] for i in range(0, len(records), BATCH_SIZE)]
+    if not chunks:
+        return 0
+
+    def send(chunk):
+        return http_json(
+            "POST",
+            f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_update",
+            {"records": chunk},
+            token,
+        )
+
+    responses, report = run_adaptive(chunks, send)
+    print(f"  batch_update: {report}")
+    updated = 0
+    for chunk, resp in zip(chunks, responses):
+        if resp.get("code") not in (0, None):
+            print(f"Failed to update {len(chunk)} records: {resp}")
+            continue
+        updated += len(chunk)
+    return updated
+
+
+def to_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float, bool)):
+        return str(value)
+    if isinstance(value, list):
+        return "".join(to_text(v) for v in value)
+    if isinstance(value, dict):
+        if value.get("text"):
+            return str(value.get("text"))
+        if value.get("name"):
+            return str(value.get("name"))
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def to_link_ids(value):
+    if isinstance(value, list):
+        ids = []
+        for item in value:
+            if isinstance(item, str):
+                ids.append(item)
+            elif isinstance(item, dict):
+                ids.extend(item.get("record_ids") or [])
+        return ids
+    if isinstance(value, dict):
+        return value.get("link_record_ids") or value.get("record_ids") or []
+    return []
+
+
+def to_number(value):
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(to_text(value))
+    except ValueError:
+        return None
+
+
+def node_key(value):
+    """Objective/KR identity: linked record id when the column is a link, otherwise its text."""
+    ids = to_link_ids(value)
+    if ids:
+        return ids[0]
+    return to_text(value).strip()
+
+
+def normalize_progress(value):
+    if value is None:
+        return 0
+    return value / 100 if value > 1 else value
+
+
+def extract_row(record, names):
+    values = record.get("fields") or {}
+
+    def get(key):
+        return values.get(names[key]) if names[key] else None
+
+    status = to_text(get("status"))
+    progress = 1 if status == "Done" else normalize_progress(to_number(get("progress")))
+    return {
+        "objective": node_key(get("objective")),
+        "kr": node_key(get("kr")),
+        "progress": round(min(1, max(0, progress)), 4),
+        "weight": to_number(get("weight")) or 1,
+        "kr_weight": to_number(get("kr_weight")) or 1,
+        "cells": {
+            KR_PROGRESS_FIELD: to_number(values.get(KR_PROGRESS_FIELD)),
+            OBJECTIVE_PROGRESS_FIELD: to_number(values.get(OBJECTIVE_PROGRESS_FIELD)),
+        },
+    }
+
+
+class ProgressTree:
+    """Objective -> KR -> Action tree over OKRPlan rows with weighted bottom-up progress."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.kr_rows = {}
+        self.objective_krs = {}
+        self.kr_progress = {}
+        self.objective_progress = {}
+        for record_id, row in rows.items():
+            self._attach(record_id, row)
+
+    def _attach(self, record_id, row):
+        if not row["kr"]:
+            return
+        self.kr_rows.setdefault(row["kr"], set()).add(record_id)
+        if row["objective"]:
+            # objective -> {kr: number of rows linking them}
+            krs = self.objective_krs.setdefault(row["objective"], {})
+            krs[row["kr"]] = krs.get(row["kr"], 0) + 1
+
+    def _detach(self, record_id, row):
+        if not row["kr"]:
+            return
+        members = self.kr_rows.get(row["kr"])
+        if members:
+            members.discard(record_id)
+            if not members:
+                del self.kr_rows[row["kr"]]
+        krs = self.objective_krs.get(row["objective"])
+        if krs and row["kr"] in krs:
+            krs[row["kr"]] -= 1
+            if not krs[row["kr"]]:
+                del krs[row["kr"]]
+            if not krs:
+                del self.objective_krs[row["objective"]]
+
+    def update(self, record_id, row):
+        """Replace one leaf; returns the (krs, objectives) whose progress must be recomputed."""
+        old = self.rows.get(record_id)
+        krs, objectives = set(), set()
+        if old:
+            self._detach(record_id, old)
+            krs.add(old["kr"])
+            objectives.add(old["objective"])
+        if row:
+            self.rows[record_id] = row
+            self._attach(record_id, row)
+            krs.add(row["kr"])
+            objectives.add(row["objective"])
+        else:
+            self.rows.pop(record_id, None)
+        return krs - {""}, objectives - {""}
+
+    def recompute_kr(self, kr):
+        members = [self.rows[rid] for rid in self.kr_rows.get(kr, ())]
+        total = sum(row["weight"] for row in members)
+        if not total:
+            self.kr_progress.pop(kr, None)
+            return
+        self.kr_progress[kr] = round(100 * sum(row["weight"] * row["progress"] for row in members) / total, 1)
+
+    def kr_weight(self, kr):
+        return max((self.rows[rid]["kr_weight"] for rid in self.kr_rows.get(kr, ())), default=1)
+
+    def recompute_objective(self, objective):
+        krs = [kr for kr in self.objective_krs.get(objective, ()) if kr in self.kr_progress]
+        total = sum(self.kr_weight(kr) for kr in krs)
+        if not total:
+            self.objective_progress.pop(objective, None)
+            return
+        self.objective_progress[objective] = round(
+            sum(self.kr_weight(kr) * self.kr_progress[kr] for kr in krs) / total, 1
+        )
+
+    def recompute_all(self):
+        for kr in self.kr_rows:
+            self.recompute_kr(kr)
+        for objective in self.objective_krs:
+            self.recompute_objective(objective)
+
+    def targets(self, record_id):
+        row = self.rows[record_id]
+        return {
+            KR_PROGRESS_FIELD: self.kr_progress.get(row["kr"]),
+            OBJECTIVE_PROGRESS_FIELD: self.objective_progress.get(row["objective"]),
+        }
+
+
+def load_state(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(path, state):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+parser = argparse.ArgumentParser(description="Roll Action progress up to KR_Progress and Objective_Progress.")
+parser.add_argument("--record-ids", default="", help="Only refresh these OKRPlan rows (comma-separated)")
+parser.add_argument("--rebuild", action="store_true", help="Rescan OKRPlan and rebuild the tree")
+parser.add_argument("--dry-run", action="store_true", help="Compute without writing")
+parser.add_argument("--state", default=DEFAULT_STATE, help="Local tree state file")
+args = parser.parse_args()
+
+TOKEN = get_tenant_token()
+TABLES = get_tables(TOKEN)
+table_id = TABLES.get("OKRPlan")
+if not table_id:
+    print("OKRPlan table not found")
+    sys.exit(1)
+
+field_names = {f.get("field_name") for f in get_fields(TOKEN, table_id)}
+names = {key: next((n for n in cands if n in field_names), None) for key, cands in FIELD_CANDIDATES.items()}
+if not names["kr"]:
+    print("OKRPlan has no KR column")
+    sys.exit(1)
+
+state = None if args.rebuild else load_state(args.state)
+record_ids = [rid.strip() for rid in args.record_ids.split(",") if rid.strip()]
+if state is None or state.get("table_id") != table_id:
+    # Build the tree once from a full scan; later runs only touch changed leaves.
+    rows = {record.get("record_id"): extract_row(record, names) for record in iter_records(TOKEN, table_id)}
+    tree = ProgressTree(rows)
+    tree.recompute_all()
+    dirty = set(rows)
+    print(f"Built tree: {len(tree.objective_krs)} objectives, {len(tree.kr_rows)} KRs, {len(rows)} actions")
+else:
+    tree = ProgressTree(state["rows"])
+    tree.kr_progress = state["kr_progress"]
+    tree.objective_progress = state["objective_progress"]
+    fetched = {r.get("record_id"): r for r in batch_get_records(TOKEN, table_id, record_ids)} if record_ids else {}
+    krs, objectives = set(), set()
+    for record_id in record_ids:
+        row = extract_row(fetched[record_id], names) if record_id in fetched else None
+        old = tree.rows.get(record_id)
+        if row and old and {k: v for k, v in row.items() if k != "cells"} == {k: v for k, v in old.items() if k != "cells"}:
+            continue
+        if row and old:
+            row["cells"] = old["cells"]
+        changed_krs, changed_objectives = tree.update(record_id, row)
+        krs |= changed_krs
+        objectives |= changed_objectives
+    # Only the ancestors of changed leaves are recomputed.
+    before = {kr: tree.kr_progress.get(kr) for kr in krs}
+    for kr in krs:
+        tree.recompute_kr(kr)
+    for kr in krs:
+        if tree.kr_progress.get(kr) != before[kr]:
+            objectives |= {o for o, members in tree.objective_krs.items() if kr in members}
+    for objective in objectives:
+        tree.recompute_objective(objective)
+    dirty = {rid for kr in krs for rid in tree.kr_rows.get(kr, ())}
+    dirty |= {rid for o in objectives for kr in tree.objective_krs.get(o, ()) for rid in tree.kr_rows.get(kr, ())}
+    print(f"Refreshed {len(record_ids)} rows: {len(krs)} KRs, {len(objectives)} objectives recomputed")
+
+updates = []
+for record_id in sorted(dirty):
+    if record_id not in tree.rows:
+        continue
+    targets = tree.targets(record_id)
+    cells = tree.rows[record_id]["cells"]
+    fields = {name: value for name, value in targets.items() if value is not None and cells.get(name) != value}
+    if fields:
+        updates.append({"record_id": record_id, "fields": fields})
+
+print(f"Rows to update: {len(updates)}")
+if not args.dry_run:
+    if any(OBJECTIVE_PROGRESS_FIELD in u["fields"] for u in updates) and OBJECTIVE_PROGRESS_FIELD not in field_names:
+        print(f"Creating OKRPlan.{OBJECTIVE_PROGRESS_FIELD}")
+        create_field(TOKEN, table_id, {"field_name": OBJECTIVE_PROGRESS_FIELD, "type": 2})
+    if any(KR_PROGRESS_FIELD in u["fields"] for u in updates) and KR_PROGRESS_FIELD not in field_names:
+        print(f"Creating OKRPlan.{KR_PROGRESS_FIELD}")
+        create_field(TOKEN, table_id, {"field_name": KR_PROGRESS_FIELD, "type": 2})
+    updated = batch_update_records(TOKEN, table_id, updates)
+    if updated == len(updates):
+        for update in updates:
+            tree.rows[update["record_id"]]["cells"].update(update["fields"])
+    print(f"Updated {updated} rows")
+    save_state(
+        args.state,
+        {
+            "table_id": table_id,
+            "rows": tree.rows,
+            "kr_progress": tree.kr_progress,
+            "objective_progress": tree.objective_progress,
+            "updated_at": datetime.now().isoformat(timespec="seconds"),
+        },
+    )
+
+for objective, progress in sorted(tree.objective_progress.items())[:10]:
+    print(f"- {objective}: {progress}% ({len(tree.objective_krs.get(objective, ()))} KRs)")
@@ -0,0 +1,374 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+api_base = os.environ.get("FEISHU_API_BASE", "https://open.feishu.cn")
+app_id = os.environ.get("FEISHU_APP_ID")
+app_secret = os.environ.get("FEISHU_APP_SECRET")
+app_token = os.environ.get("FEISHU_BASE_APP_TOKEN")
+
+if not (app_id and app_secret and app_token):
+    print("Missing env vars: FEISHU_APP_ID/FEISHU_APP_SECRET/FEISHU_BASE_APP_TOKEN")
+    sys.exit(1)
+
+BATCH_SIZE = 500
+LINK_TYPES = {18, 21}
+# Fields whose definition references other tables/fields; created after all tables exist.
+DEFERRED_TYPES = {18, 19, 20, 21}
+# Values Bitable computes itself; never written back.
+READ_ONLY_TYPES = {19, 20, 1001, 1002, 1003, 1004, 1005}
+
+
+def http_json(method, url, data=None, token=None):
+    body = None
+    headers = {"Content-Type": "application/json; charset=utf-8"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if data is not None:
+        body = json.dumps(data).encode("utf-8")
+    req = Request(url, data=body, headers=headers, method=method)
+    try:
+        with urlopen(req) as resp:
+            raw = resp.read().decode("utf-8")
+            return json.loads(raw)
+    except HTTPError as exc:
+        body = exc.read().decode("utf-8")
+        raise RuntimeError(f"HTTP {exc.code}: {body}") from exc
+
+
+def get_tenant_token():
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/auth/v3/tenant_access_token/internal",
+        {"app_id": app_id, "app_secret": app_secret},
+    )
+    token = resp.get("tenant_access_token")
+    if not token:
+        print("Failed to get tenant access token", resp)
+        sys.exit(1)
+    return token
+
+
+def get_tables(token):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables?page_size=100",
+        None,
+        token,
+    )
+    items = resp.get("data", {}).get("items", [])
+    return {item.get("name"): item.get("table_id") for item in items}
+
+
+def get_fields(token, table_id):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/fields?page_size=200",
+        None,
+        token,
+    )
+    return resp.get("data", {}).get("items", [])
+
+
+def create_table(token, name, fields):
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables",
+        {"table": {"name": name, "fields": fields}},
+        token,
+    )
+    table_id = (resp.get("data") or {}).get("table_id")
+    if not table_id:
+        print(f"Failed to create table {name}: {resp}")
+    return table_id
+
+
+def create_field(token, table_id, field_config):
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/fields",
+        field_config,
+        token,
+    )
+    if resp.get("code") not in (0, None):
+        print(f"Failed to create field {field_config['field_name']}: {resp}")
+        return False
+    return True
+
+
+def batch_create_records(token, table_id, records):
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_create",
+        {"records": [{"fields": fields} for fields in records]},
+        token,
+    )
+    if resp.get("code") not in (0, None):
+        print(f"Failed to create {len(records)} records: {resp}")
+        return []
+    return [item.get("record_id") for item in (resp.get("data") or {}).get("records") or []]
+
+
+def batch_update_records(token, table_id, records):
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_update",
+        {"records": records},
+        token,
+    )
+    if resp.get("code") not in (0, None):
+        print(f"Failed to update {len(records)} records: {resp}")
+        return 0
+    return len(records)
+
+
+def has_records(token, table_id):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records?page_size=1",
+        None,
+        token,
+    )
+    return bool((resp.get("data") or {}).get("items"))
+
+
+def read_schema(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.loads(f.readline())
+
+
+def iter_backup_records(path):
+    with open(path, "r", encoding="utf-8") as f:
+        f.readline()
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def to_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float, bool)):
+        return str(value)
+    if isinstance(value, list):
+        return "".join(to_text(v) for v in value)
+    if isinstance(value, dict):
+        return str(value.get("text") or value.get("name") or "")
+    return str(value)
+
+
+def to_link_ids(value):
+    if isinstance(value, list):
+        ids = []
+        for item in value:
+            if isinstance(item, str):
+                ids.append(item)
+            elif isinstance(item, dict):
+                ids.extend(item.get("record_ids") or [])
+        return ids
+    if isinstance(value, dict):
+        return value.get("link_record_ids") or value.get("record_ids") or []
+    return []
+
+
+def writable_value(field_type, value):
+    """Convert a value as returned by the list API into what the create API accepts."""
+    if value is None:
+        return None
+    if field_type == 1:
+        return to_text(value)
+    if field_type == 11 and isinstance(value, list):
+        return [{"id": item.get("id")} for item in value if isinstance(item, dict) and item.get("id")]
+    if field_type == 17 and isinstance(value, list):
+        return [{"file_token": item.get("file_token")} for item in value if isinstance(item, dict)]
+    return value
+
+
+def field_definition(field, property_override=None):
+    config = {"field_name": field.get("field_name"), "type": field.get("type")}
+    prop = property_override if property_override is not None else field.get("property")
+    if isinstance(prop, dict) and prop.get("options"):
+        prop = dict(prop)
+        prop["options"] = [{k: v for k, v in opt.items() if k != "id"} for opt in prop["options"]]
+    if prop:
+        config["property"] = prop
+    return config
+
+
+def remap_ids(obj, id_map):
+    raw = json.dumps(obj, ensure_ascii=False)
+    # Longest ids first so one id that prefixes another is never half-replaced.
+    for old in sorted(id_map, key=len, reverse=True):
+        raw = raw.replace(old, id_map[old])
+    return json.loads(raw)
+
+
+def restore_records(token, name, plan):
+    """Phase 2: insert plain values, return old -> new record id map."""
+    table_id = plan["table_id"]
+    plain = {f["field_name"]: f["type"] for f in plan["schema"]["fields"]
+             if f.get("type") not in DEFERRED_TYPES and f.get("type") not in READ_ONLY_TYPES}
+    record_map = {}
+    old_ids = []
+    batch = []
+
+    def flush():
+        new_ids = batch_create_records(token, table_id, batch)
+        for old_id, new_id in zip(old_ids, new_ids):
+            record_map[old_id] = new_id
+        old_ids.clear()
+        batch.clear()
+
+    for record in iter_backup_records(plan["path"]):
+        fields = {}
+        for field_name, value in (record.get("fields") or {}).items():
+            if field_name in plain:
+                converted = writable_value(plain[field_name], value)
+                if converted not in (None, "", []):
+                    fields[field_name] = converted
+        old_ids.append(record.get("record_id"))
+        batch.append(fields)
+        if len(batch) >= BATCH_SIZE:
+            flush()
+    if batch:
+        flush()
+    print(f"- {name}: {len(record_map)} records inserted")
+    return record_map
+
+
+def restore_links(token, name, plan, record_maps, table_map):
+    """Phase 4: fill link fields using the remapped record ids."""
+    links = {f["field_name"]: f for f in plan["schema"]["fields"] if f.get("type") in LINK_TYPES}
+    if not links:
+        return 0
+    own_map = record_maps[name]
+    target_maps = {}
+    for field_name, field in links.items():
+        target_old_table = (field.get("property") or {}).get("table_id")
+        target_name = table_map.get(target_old_table)
+        target_maps[field_name] = record_maps.get(target_name, {})
+    updated = 0
+    batch = []
+    for record in iter_backup_records(plan["path"]):
+        new_id = own_map.get(record.get("record_id"))
+        if not new_id:
+            continue
+        fields = {}
+        for field_name, value in (record.get("fields") or {}).items():
+            if field_name not in links:
+                continue
+            mapped = [target_maps[field_name][rid] for rid in to_link_ids(value) if rid in target_maps[field_name]]
+            if mapped:
+                fields[field_name] = mapped
+        if fields:
+            batch.append({"record_id": new_id, "fields": fields})
+        if len(batch) >= BATCH_SIZE:
+            updated += batch_update_records(token, plan["table_id"], batch)
+            batch = []
+    if batch:
+        updated += batch_update_records(token, plan["table_id"], batch)
+    print(f"- {name}: {updated} records relinked")
+    return updated
+
+
+parser = argparse.ArgumentParser(description="Restore a backup made by backup_base.py.")
+parser.add_argument("backup_dir", help="Directory containing manifest.json")
+parser.add_argument("--target-token", help="Restore into this app_token (default FEISHU_BASE_APP_TOKEN)")
+parser.add_argument("--tables", default="", help="Only restore these tables (comma-separated)")
+parser.add_argument("--workers", type=int, default=4, help="Tables restored in parallel")
+parser.add_argument("--append", action="store_true", help="Allow adding the backup's records to tables that already have records")
+args = parser.parse_args()
+
+if args.target_token:
+    app_token = args.target_token
+
+with open(os.path.join(args.backup_dir, "manifest.json"), "r", encoding="utf-8") as f:
+    manifest = json.load(f)
+
+wanted = [t.strip() for t in args.tables.split(",") if t.strip()]
+plans = {}
+for entry in manifest["tables"]:
+    if wanted and entry["name"] not in wanted:
+        continue
+    path = os.path.join(args.backup_dir, entry["file"])
+    plans[entry["name"]] = {"path": path, "schema": read_schema(path)}
+
+started = time.monotonic()
+TOKEN = get_tenant_token()
+existing_tables = get_tables(TOKEN)
+
+# Records are always inserted as new rows; restoring into a filled table would duplicate them.
+filled = [name for name in plans if existing_tables.get(name) and has_records(TOKEN, existing_tables[name])]
+if filled and not args.append:
+    print(f"Refusing to restore into tables that already have records: {', '.join(filled)}")
+    print("Restore into an empty Base (--target-token), drop those tables, or pass --append to add the records anyway.")
+    sys.exit(1)
+
+# Phase 1: tables with their plain fields (primary first).
+id_map = {}
+table_map = {}
+for name, plan in plans.items():
+    schema = plan["schema"]
+    table_map[schema["table_id"]] = name
+    fields = sorted(schema["fields"], key=lambda f: not f.get("is_primary"))
+    plain_fields = [field_definition(f) for f in fields if f.get("type") not in DEFERRED_TYPES]
+    table_id = existing_tables.get(name)
+    if table_id:
+        print(f"Found table: {name} ({table_id}); adding missing fields")
+        current = {f.get("field_name") for f in get_fields(TOKEN, table_id)}
+        for config in plain_fields:
+            if config["field_name"] not in current:
+                create_field(TOKEN, table_id, config)
+    else:
+        print(f"Creating table: {name}")
+        table_id = create_table(TOKEN, name, plain_fields)
+        if not table_id:
+            sys.exit(1)
+    plan["table_id"] = table_id
+    id_map[schema["table_id"]] = table_id
+
+# Phase 2: records, tables in parallel.
+with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+    futures = {name: pool.submit(restore_records, TOKEN, name, plan) for name, plan in plans.items()}
+    record_maps = {name: future.result() for name, future in futures.items()}
+
+# Phase 3: link, lookup and formula fields, with table/field ids remapped.
+created_backs = set()
+for deferred_types in (LINK_TYPES, {19, 20}):
+    # Re-read before each pass so lookups/formulas see the ids of the links created in the previous one.
+    current_fields = {name: get_fields(TOKEN, plan["table_id"]) for name, plan in plans.items()}
+    for name, plan in plans.items():
+        by_name = {f.get("field_name"): f.get("field_id") for f in current_fields[name]}
+        for field in plan["schema"]["fields"]:
+            if field.get("field_name") in by_name:
+                id_map[field.get("field_id")] = by_name[field.get("field_name")]
+    for name, plan in plans.items():
+        current = {f.get("field_name") for f in current_fields[name]}
+        for field in plan["schema"]["fields"]:
+            field_name = field.get("field_name")
+            if field.get("type") not in deferred_types or field_name in current:
+                continue
+            if (name, field_name) in created_backs:
+                continue
+            prop = remap_ids(field.get("property") or {}, id_map)
+            if field.get("type") == 21 and prop.get("back_field_name"):
+                # Creating one side of a two-way link also creates its back field.
+                created_backs.add((table_map.get((field.get("property") or {}).get("table_id")), prop["back_field_name"]))
+            print(f"Creating {name}.{field_name}")
+            create_field(TOKEN, plan["table_id"], field_definition(field, prop))
+
+# Phase 4: link values, tables in parallel.
+with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+    futures = [pool.submit(restore_links, TOKEN, name, plan, record_maps, table_map) for name, plan in plans.items()]
+    for future in futures:
+        future.result()
+
+total = sum(len(m) for m in record_maps.values())
+print(f"Restored {len(plans)} tables / {total} records in {time.monotonic() - started:.1f}s")
@@ -0,0 +1,580 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+from datetime import date, datetime, timedelta
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from aimd_limiter import HTTP_TIMEOUT, run_adaptive
+
+api_base = os.environ.get("FEISHU_API_BASE", "https://open.feishu.cn")
+app_id = os.environ.get("FEISHU_APP_ID")
+app_secret = os.environ.get("FEISHU_APP_SECRET")
+app_token = os.environ.get("FEISHU_BASE_APP_TOKEN")
+
+if not (app_id and app_secret and app_token):
+    print("Missing env vars: FEISHU_APP_ID/FEISHU_APP_SECRET/FEISHU_BASE_APP_TOKEN")
+    sys.exit(1)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_STATE = os.path.join(ROOT_DIR, "generated", "rollup_cube.json")
+BATCH_SIZE = 500
+PERIODS = ("week", "month", "quarter")
+NO_KR = "(no KR)"
+UNASSIGNED = "(unassigned)"
+
+# Scorecard components (PRD E1). Evidence target follows USAGE: at least 2 per week.
+WEIGHTS = {"result": 0.4, "process": 0.4, "evidence": 0.2}
+EVIDENCE_TARGET = {"week": 2, "month": 8, "quarter": 24}
+DRIFT_PENALTY_PER_ACTION = 5
+DRIFT_PENALTY_CAP = 30
+PLAYBOOK = "1) 选一个 KR 的本周交付 2) 拉取一个最小动作（30min） 3) 产出一个证据"
+
+FIELD_CANDIDATES = {
+    "title": ["Actions", "Action_Title", "Action"],
+    "kr": ["Key Results", "KR_Title", "KR"],
+    "owner": ["Owner", "Action_Owner"],
+    "plan_start": ["预期开始", "Action_Plan_Start", "Plan_Start", "Plan_Date"],
+    "plan_end": ["预期结束", "Action_Plan_End", "Plan_End", "Plan_Date"],
+    "progress": ["Action Progress"],
+}
+SCORECARD_KEY_FIELDS = ["Cell_Key", "Period", "KR", "Owner"]
+
+
+def http_json(method, url, data=None, token=None):
+    body = None
+    headers = {"Content-Type": "application/json; charset=utf-8"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if data is not None:
+        body = json.dumps(data).encode("utf-8")
+    req = Request(url, data=body, headers=headers, method=method)
+    try:
+        with urlopen(req, timeout=HTTP_TIMEOUT) as resp:
+            raw = resp.read().decode("utf-8")
+            return json.loads(raw)
+    except HTTPError as exc:
+        body = exc.read().decode("utf-8")
+        raise RuntimeError(f"HTTP {exc.code}: {body}") from exc
+
+
+def get_tenant_token():
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/auth/v3/tenant_access_token/internal",
+        {"app_id": app_id, "app_secret": app_secret},
+    )
+    token = resp.get("tenant_access_token")
+    if not token:
+        print("Failed to get tenant access token", resp)
+        sys.exit(1)
+    return token
+
+
+def get_tables(token):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables?page_size=100",
+        None,
+        token,
+    )
+    items = resp.get("data", {}).get("items", [])
+    return {item.get("name"): item.get("table_id") for item in items}
+
+
+def get_fields(token, table_id):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/fields?page_size=200",
+        None,
+        token,
+    )
+    return resp.get("data", {}).get("items", [])
+
+
+def create_field(token, table_id, field_config):
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/fields",
+        field_config,
+        token,
+    )
+    if resp.get("code") not in (0, None):
+        print(f"Failed to create field {field_config['field_name']}: {resp}")
+        return False
+    return True
+
+
+def iter_records(token, table_id, page_size=500):
+    page_token = ""
+    while True:
+        url = f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records?page_size={page_size}"
+        if page_token:
+            url += f"&page_token={page_token}"
+        resp = http_json("GET", url, None, token)
+        data = resp.get("data") or {}
+        for item in data.get("items") or []:
+            yield item
+        page_token = data.get("page_token")
+        if not data.get("has_more") or not page_token:
+            break
+
+
+def batch_get_records(token, table_id, record_ids):
+    records = []
+    for i in range(0, len(record_ids), 100):
+        resp = http_json(
+            "POST",
+            f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_get",
+            {"record_ids": record_ids[i:i + 100]},
+            token,
+        )
+        records.extend((resp.get("data") or {}).get("records") or [])
+    return records
+
+
+def batch_write(token, table_id, op, payload_key, items):
+    """Run batch_create/batch_update/batch_delete in chunks; return the API records."""
+    chunks = [items[i:i + BATCH_SIZE] for i in range(0, len(items), BATCH_SIZE)]
+    if not chunks:
+        return []
+
+    def send(chunk):
+        return http_json(
+            "POST",
+            f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/{op}",
+            {payload_key: chunk},
+            token,
+        )
+
+    responses, report = run_adaptive(chunks, send, retry_timeouts=op != "batch_create")
+    print(f"  {op}: {report}")
+    results = []
+    for chunk, resp in zip(chunks, responses):
+        if resp.get("code") not in (0, None):
+            print(f"Failed to {op} {len(chunk)} records: {resp}")
+            results.extend([None] * len(chunk))
+            continue
+        results.extend((resp.get("data") or {}).get("records") or [{}] * len(chunk))
+    return results
+
+
+def to_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float, bool)):
+        return str(value)
+    if isinstance(value, list):
+        return "".join(to_text(v) for v in value)
+    if isinstance(value, dict):
+        if value.get("text"):
+            return str(value.get("text"))
+        if value.get("name"):
+            return str(value.get("name"))
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def to_link_ids(value):
+    if isinstance(value, list):
+        ids = []
+        for item in value:
+            if isinstance(item, str):
+                ids.append(item)
+            elif isinstance(item, dict):
+                ids.extend(item.get("record_ids") or [])
+        return ids
+    if isinstance(value, dict):
+        return value.get("link_record_ids") or value.get("record_ids") or []
+    return []
+
+
+def to_number(value):
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(to_text(value))
+    except ValueError:
+        return None
+
+
+def to_day(ts):
+    return datetime.fromtimestamp(ts / 1000).date()
+
+
+def day_ms(day):
+    return int(datetime(day.year, day.month, day.day).timestamp() * 1000)
+
+
+def period_start(kind, day):
+    # Same boundaries as getWeekStart/getMonthStart/getQuarterStart in App.tsx.
+    if kind == "week":
+        return day - timedelta(days=day.weekday())
+    if kind == "month":
+        return date(day.year, day.month, 1)
+    return date(day.year, (day.month - 1) // 3 * 3 + 1, 1)
+
+
+def period_end(kind, start):
+    if kind == "week":
+        return start + timedelta(days=6)
+    months = 1 if kind == "month" else 3
+    year, month = divmod(start.month - 1 + months, 12)
+    return date(start.year + year, month + 1, 1) - timedelta(days=1)
+
+
+def periods_between(kind, first, last):
+    starts = []
+    cursor = period_start(kind, first)
+    while cursor <= last:
+        starts.append(cursor)
+        cursor = period_end(kind, cursor) + timedelta(days=1)
+    return starts
+
+
+def normalize_progress(value):
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        return 0
+    return value / 100 if value > 1 else value
+
+
+def action_score(plan_start, plan_end, progress, today):
+    # Mirrors computeActionScore in App.tsx.
+    start = to_day(plan_start)
+    end = to_day(plan_end)
+    if end < start:
+        return None
+    duration = (end - start).days
+    time_progress = 1 if duration == 0 else min(1, max(0, (today - start).days / duration))
+    actual = normalize_progress(progress)
+    delta = actual - time_progress
+    score = 100 if delta >= 0 else max(0, round(100 * (1 + delta)))
+    return score, actual, delta, time_progress
+
+
+def cell_key(kind, start, kr, owner):
+    return f"{kind}|{start.isoformat()}|{kr}|{owner}"
+
+
+def action_contribution(action, today):
+    """Cells an action counts toward, following buildSummary: planned, started, overlapping the period."""
+    if not action["plan_start"] or not action["plan_end"]:
+        return {}
+    scored = action_score(action["plan_start"], action["plan_end"], action["progress"], today)
+    if not scored:
+        return {}
+    score, actual, delta, time_progress = scored
+    start = to_day(action["plan_start"])
+    end = to_day(action["plan_end"])
+    if start > today:
+        return {}
+    values = {"actions": 1, "score_sum": score, "progress_sum": actual, "lagging": 1 if delta < 0 else 0}
+    member = [action["title"], round(delta, 4), round(time_progress, 4), round(actual, 4)]
+    cells = {}
+    for kind in PERIODS:
+        for start_day in periods_between(kind, start, min(end, today)):
+            cells[cell_key(kind, start_day, action["kr"], action["owner"])] = {"values": values, "member": member}
+    return cells
+
+
+def evidence_contribution(evidence, actions):
+    if not evidence["date"]:
+        return {}
+    action = actions.get(evidence["action_id"]) if evidence["action_id"] else None
+    kr = action["kr"] if action else NO_KR
+    owner = action["owner"] if action else UNASSIGNED
+    day = to_day(evidence["date"])
+    values = {"evidence": 1, "quality_sum": evidence["quality"] or 0}
+    return {cell_key(kind, period_start(kind, day), kr, owner): {"values": values} for kind in PERIODS}
+
+
+def apply(cells, record_id, contribution, sign):
+    for key, part in contribution.items():
+        cell = cells.setdefault(key, {"sums": {}, "members": {}})
+        for name, value in part["values"].items():
+            cell["sums"][name] = round(cell["sums"].get(name, 0) + sign * value, 6)
+        if "member" in part:
+            if sign > 0:
+                cell["members"][record_id] = part["member"]
+            else:
+                cell["members"].pop(record_id, None)
+        if not any(abs(v) > 1e-9 for v in cell["sums"].values()) and not cell["members"]:
+            del cells[key]
+
+
+def score_cell(key, cell):
+    kind, start_iso, kr, owner = key.split("|", 3)
+    sums = cell["sums"]
+    count = sums.get("actions", 0)
+    process = round(sums.get("score_sum", 0) / count) if count else 100
+    result = round(100 * sums.get("progress_sum", 0) / count) if count else 0
+    evidence = min(100, round(100 * sums.get("evidence", 0) / EVIDENCE_TARGET[kind]))
+    drift = min(DRIFT_PENALTY_CAP, DRIFT_PENALTY_PER_ACTION * round(sums.get("lagging", 0)))
+    total = WEIGHTS["result"] * result + WEIGHTS["process"] * process + WEIGHTS["evidence"] * evidence - drift
+    worst = sorted((m for m in cell["members"].values() if m[1] < 0), key=lambda m: m[1])[:3]
+    deductions = [
+        f"《{title}》落后 {round(abs(delta) * 100)}%（时间 {round(tp * 100)}%，实际 {round(ap * 100)}%）"
+        for title, delta, tp, ap in worst
+    ]
+    start = date.fromisoformat(start_iso)
+    return {
+        "Cell_Key": key,
+        "Period": kind,
+        "KR": kr,
+        "Owner": owner,
+        "Week_Start": day_ms(start),
+        "Week_End": day_ms(period_end(kind, start)),
+        "Total_Score": max(0, min(100, round(total))),
+        "Result_Score": result,
+        "Process_Score": process,
+        "Evidence_Score": evidence,
+        "Drift_Penalty": drift,
+        "Top_Deductions": "；".join(deductions) or "暂无扣分项",
+        "Recommended_Actions": PLAYBOOK if deductions or evidence < 100 else "",
+    }
+
+
+def resolve_field_names(field_names):
+    return {key: next((n for n in names if n in field_names), None) for key, names in FIELD_CANDIDATES.items()}
+
+
+def extract_action(record, names):
+    values = record.get("fields") or {}
+
+    def get(key):
+        return values.get(names[key]) if names[key] else None
+
+    title = to_text(get("title"))
+    if not title:
+        return None
+    return {
+        "title": title,
+        "kr": to_text(get("kr")) or NO_KR,
+        "owner": to_text(get("owner")) or UNASSIGNED,
+        "plan_start": to_number(get("plan_start")),
+        "plan_end": to_number(get("plan_end")),
+        "progress": to_number(get("progress")),
+    }
+
+
+def extract_evidence(record):
+    values = record.get("fields") or {}
+    action_ids = to_link_ids(values.get("Action"))
+    return {
+        "date": to_number(values.get("Date")),
+        "action_id": action_ids[0] if action_ids else None,
+        "quality": to_number(values.get("Evidence_Quality")),
+    }
+
+
+def load_state(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(path, state):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def read_cell_rows(token, table_id):
+    """Existing Scorecard rows by Cell_Key, plus record ids of duplicate keys.
+
+    Rows without a Cell_Key were not written by the cube and are left alone. Adopted
+    rows carry no hash, so the next diff rewrites each of them once.
+    """
+    rows, duplicates = {}, []
+    for record in iter_records(token, table_id):
+        key = to_text((record.get("fields") or {}).get("Cell_Key"))
+        if not key:
+            continue
+        if key in rows:
+            duplicates.append(record.get("record_id"))
+            continue
+        rows[key] = {"record_id": record.get("record_id"), "hash": None}
+    return rows, duplicates
+
+
+def row_hash(row):
+    return hashlib.sha1(json.dumps(row, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+parser = argparse.ArgumentParser(description="Maintain week/month/quarter Scorecard rollups per KR and owner.")
+parser.add_argument("--record-ids", default="", help="Only refresh these OKRPlan/Evidence records (comma-separated)")
+parser.add_argument("--rebuild", action="store_true", help="Rescan both tables and rebuild the cube")
+parser.add_argument("--dry-run", action="store_true", help="Compute cells without writing Scorecard")
+parser.add_argument("--state", default=DEFAULT_STATE, help="Local cube state file")
+args = parser.parse_args()
+
+TOKEN = get_tenant_token()
+TABLES = get_tables(TOKEN)
+okr_table = TABLES.get("OKRPlan")
+evidence_table = TABLES.get("Evidence")
+scorecard_table = TABLES.get("Scorecard")
+if not (okr_table and evidence_table and scorecard_table):
+    print("OKRPlan/Evidence/Scorecard table not found")
+    sys.exit(1)
+
+names = resolve_field_names({f.get("field_name") for f in get_fields(TOKEN, okr_table)})
+today = datetime.now().date()
+state = None if args.rebuild else load_state(args.state)
+if state is None:
+    state = {"actions": {}, "evidence": {}, "contributions": {}, "cells": {}, "rows": {}, "as_of": None}
+
+actions = state["actions"]
+evidence = state["evidence"]
+cells = state["cells"]
+record_ids = [rid.strip() for rid in args.record_ids.split(",") if rid.strip()]
+changed_actions = {}
+changed_evidence = {}
+
+if record_ids and state["as_of"]:
+    fetched_actions = {r.get("record_id"): r for r in batch_get_records(TOKEN, okr_table, record_ids)}
+    fetched_evidence = {r.get("record_id"): r for r in batch_get_records(TOKEN, evidence_table, record_ids)}
+    for record_id in record_ids:
+        if record_id in fetched_actions:
+            action = extract_action(fetched_actions[record_id], names)
+            if action != actions.get(record_id):
+                changed_actions[record_id] = action
+        elif record_id in fetched_evidence:
+            item = extract_evidence(fetched_evidence[record_id])
+            if item != evidence.get(record_id):
+                changed_evidence[record_id] = item
+        elif record_id in actions:
+            changed_actions[record_id] = None
+        elif record_id in evidence:
+            changed_evidence[record_id] = None
+else:
+    seen = set()
+    for record in iter_records(TOKEN, okr_table):
+        record_id = record.get("record_id")
+        seen.add(record_id)
+        action = extract_action(record, names)
+        if action != actions.get(record_id):
+            changed_actions[record_id] = action
+    for record_id in actions:
+        if record_id not in seen:
+            changed_actions[record_id] = None
+    seen = set()
+    for record in iter_records(TOKEN, evidence_table):
+        record_id = record.get("record_id")
+        seen.add(record_id)
+        item = extract_evidence(record)
+        if item != evidence.get(record_id):
+            changed_evidence[record_id] = item
+    for record_id in evidence:
+        if record_id not in seen:
+            changed_evidence[record_id] = None
+
+as_of = today.isoformat()
+if state["as_of"] != as_of:
+    # Time progress moves every day, so every action contribution is recomputed
+    # from the cached attributes (no extra reads).
+    for record_id in actions:
+        changed_actions.setdefault(record_id, actions[record_id])
+
+contributions = state["contributions"]
+touched = set()
+
+
+def refresh(record_id, contribution):
+    before = contributions.pop(record_id, {})
+    apply(cells, record_id, before, -1)
+    touched.update(before)
+    if contribution:
+        contributions[record_id] = contribution
+        apply(cells, record_id, contribution, 1)
+        touched.update(contribution)
+
+
+for record_id, action in changed_actions.items():
+    if action:
+        actions[record_id] = action
+    else:
+        actions.pop(record_id, None)
+    refresh(record_id, action_contribution(action, today) if action else {})
+
+# An action moving to another KR/owner re-homes its evidence as well.
+for record_id, item in evidence.items():
+    if item["action_id"] in changed_actions and record_id not in changed_evidence:
+        changed_evidence[record_id] = item
+
+for record_id, item in changed_evidence.items():
+    if item:
+        evidence[record_id] = item
+    else:
+        evidence.pop(record_id, None)
+    refresh(record_id, evidence_contribution(item, actions) if item else {})
+
+state["as_of"] = as_of
+print(f"Changed: {len(changed_actions)} actions, {len(changed_evidence)} evidence; {len(touched)} cells touched, {len(cells)} total")
+
+rows = state["rows"]
+duplicates = []
+if state.get("scorecard_table") != scorecard_table:
+    # Fresh state (--rebuild, lost file, recreated table): adopt the rows already in
+    # Scorecard instead of adding copies; adopted keys without a cell are deleted.
+    existing, duplicates = read_cell_rows(TOKEN, scorecard_table)
+    rows.clear()
+    rows.update(existing)
+    touched.update(existing)
+    print(f"Scorecard: adopted {len(existing)} existing rows, {len(duplicates)} duplicate keys")
+creates, updates, deletes = [], [], []
+for key in sorted(touched):
+    entry = rows.get(key)
+    if key not in cells:
+        if entry and entry.get("record_id"):
+            deletes.append(key)
+        continue
+    row = score_cell(key, cells[key])
+    digest = row_hash(row)
+    if entry and entry.get("hash") == digest:
+        continue
+    if entry and entry.get("record_id"):
+        updates.append((key, row, digest))
+    else:
+        creates.append((key, row, digest))
+
+print(f"Scorecard: {len(creates)} to create, {len(updates)} to update, {len(deletes) + len(duplicates)} to delete")
+if not args.dry_run:
+    existing = {f.get("field_name") for f in get_fields(TOKEN, scorecard_table)}
+    for field_name in SCORECARD_KEY_FIELDS:
+        if field_name not in existing:
+            print(f"Creating Scorecard.{field_name}")
+            create_field(TOKEN, scorecard_table, {"field_name": field_name, "type": 1})
+
+    created = batch_write(TOKEN, scorecard_table, "batch_create", "records", [{"fields": row} for _, row, _ in creates])
+    for (key, _, digest), record in zip(creates, created):
+        if record:
+            rows[key] = {"record_id": record.get("record_id"), "hash": digest}
+    updated = batch_write(
+        TOKEN,
+        scorecard_table,
+        "batch_update",
+        "records",
+        [{"record_id": rows[key]["record_id"], "fields": row} for key, row, _ in updates],
+    )
+    for (key, _, digest), record in zip(updates, updated):
+        if record is not None:
+            rows[key]["hash"] = digest
+    deleted = batch_write(
+        TOKEN, scorecard_table, "batch_delete", "records", [rows[key]["record_id"] for key in deletes] + duplicates
+    )
+    for key, record in zip(deletes, deleted):
+        if record is not None:
+            rows.pop(key, None)
+    state["scorecard_table"] = scorecard_table
+    save_state(args.state, state)
+
+print("Rollup cube done.")
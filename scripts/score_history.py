@@ -0,0 +1,288 @@
+"""Daily per-KR / per-owner score history, append-only and delta-encoded.
+
+Each run appends one block for the day to generated/score_history/history.bin:
+
+    header   magic "SHB1", day (ordinal), flags (1 = keyframe, 2 = ABSENT padding), series count
+    lengths  compressed byte length of every column
+    columns  zlib(int32 array) per column, series in id order
+
+Non-keyframe columns hold the change since the previous block, so a day where
+little moved compresses to almost nothing; a keyframe (absolute values) is
+written every KEYFRAME_EVERY blocks so a range read only replays from the
+nearest one. Series ids ("kr\tKR1", "owner\tAlice") are append-only lines in
+history.names. Re-recording a day appends a block that supersedes the earlier one.
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+from datetime import date, datetime, timedelta
+from operator import add
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CUBE = os.path.join(ROOT_DIR, "generated", "rollup_cube.json")
+DEFAULT_STORE = os.path.join(ROOT_DIR, "generated", "score_history")
+MAGIC = b"SHB1"
+HEADER = struct.Struct("<4sIBI")
+KEYFRAME_EVERY = 30
+NO_KR = "(no KR)"
+UNASSIGNED = "(unassigned)"
+KINDS = ("kr", "owner")
+# -1 in days_without_evidence: no evidence ever.
+COLUMNS = ("total", "result", "process", "evidence", "drift_penalty", "lagging", "actions", "evidence_count",
+           "days_without_evidence")
+LENGTHS = struct.Struct("<" + "I" * len(COLUMNS))
+# Value of a series before it first appears and on days it is absent; no score takes it,
+# and deltas against it still fit in int32.
+ABSENT = -(1 << 30)
+# Blocks written before flag 2 padded with these, so an absent day there reads as 0.
+LEGACY_ABSENT = {column: -1 if column == "days_without_evidence" else 0 for column in COLUMNS}
+FLAG_KEYFRAME = 1
+FLAG_ABSENT = 2
+
+# Same scoring as rollup_cube.score_cell (weekly cell).
+WEIGHTS = {"result": 0.4, "process": 0.4, "evidence": 0.2}
+EVIDENCE_TARGET_WEEK = 2
+DRIFT_PENALTY_PER_ACTION = 5
+DRIFT_PENALTY_CAP = 30
+
+
+def score(sums):
+    count = sums.get("actions", 0)
+    process = round(sums.get("score_sum", 0) / count) if count else 100
+    result = round(100 * sums.get("progress_sum", 0) / count) if count else 0
+    evidence = min(100, round(100 * sums.get("evidence", 0) / EVIDENCE_TARGET_WEEK))
+    drift = min(DRIFT_PENALTY_CAP, DRIFT_PENALTY_PER_ACTION * round(sums.get("lagging", 0)))
+    total = WEIGHTS["result"] * result + WEIGHTS["process"] * process + WEIGHTS["evidence"] * evidence - drift
+    return {
+        "total": max(0, min(100, round(total))),
+        "result": result,
+        "process": process,
+        "evidence": evidence,
+        "drift_penalty": drift,
+        "lagging": round(sums.get("lagging", 0)),
+        "actions": round(count),
+        "evidence_count": round(sums.get("evidence", 0)),
+    }
+
+
+def snapshot_from_cube(cube, day):
+    """{(kind, name): column values} for the week containing `day`."""
+    week_start = (day - timedelta(days=day.weekday())).isoformat()
+    sums = {}
+    for key, cell in (cube.get("cells") or {}).items():
+        kind, start_iso, kr, owner = key.split("|", 3)
+        if kind != "week" or start_iso != week_start:
+            continue
+        for entity in (("kr", kr), ("owner", owner)):
+            target = sums.setdefault(entity, {})
+            for name, value in cell["sums"].items():
+                target[name] = target.get(name, 0) + value
+    actions = cube.get("actions") or {}
+    for action in actions.values():
+        if action:
+            sums.setdefault(("kr", action["kr"]), {})
+            sums.setdefault(("owner", action["owner"]), {})
+    last_evidence = {}
+    for item in (cube.get("evidence") or {}).values():
+        if not item or not item.get("date"):
+            continue
+        evidence_day = datetime.fromtimestamp(item["date"] / 1000).date()
+        if evidence_day > day:
+            continue
+        action = actions.get(item.get("action_id")) if item.get("action_id") else None
+        for entity in (("kr", action["kr"] if action else NO_KR), ("owner", action["owner"] if action else UNASSIGNED)):
+            if entity not in last_evidence or last_evidence[entity] < evidence_day:
+                last_evidence[entity] = evidence_day
+    snapshot = {}
+    for entity, entity_sums in sums.items():
+        values = score(entity_sums)
+        last = last_evidence.get(entity)
+        values["days_without_evidence"] = (day - last).days if last else -1
+        snapshot[entity] = values
+    return snapshot
+
+
+class Store:
+    def __init__(self, directory):
+        self.directory = directory
+        self.data_path = os.path.join(directory, "history.bin")
+        self.names_path = os.path.join(directory, "history.names")
+        self.names = []
+        if os.path.exists(self.names_path):
+            with open(self.names_path, "r", encoding="utf-8") as f:
+                self.names = [line.rstrip("\n") for line in f if line.strip()]
+        self.ids = {name: i for i, name in enumerate(self.names)}
+
+    def blocks(self, buf):
+        """[(day, keyframe, count, {column: (offset, length)}, {column: padding})] in file order."""
+        blocks = []
+        offset = 0
+        while offset + HEADER.size <= len(buf):
+            magic, day, flags, count = HEADER.unpack_from(buf, offset)
+            if magic != MAGIC:
+                raise ValueError(f"Corrupt history block at byte {offset}")
+            offset += HEADER.size
+            lengths = LENGTHS.unpack_from(buf, offset)
+            offset += LENGTHS.size
+            columns = {}
+            for column, length in zip(COLUMNS, lengths):
+                columns[column] = (offset, length)
+                offset += length
+            padding = dict.fromkeys(COLUMNS, ABSENT) if flags & FLAG_ABSENT else LEGACY_ABSENT
+            blocks.append((day, bool(flags & FLAG_KEYFRAME), count, columns, padding))
+        return blocks
+
+    def read(self, first_day, last_day, columns):
+        """{day: {column: [value per series id]}} for recorded days in [first_day, last_day]."""
+        if not os.path.exists(self.data_path) or not os.path.getsize(self.data_path):
+            return {}
+        with open(self.data_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            blocks = self.blocks(buf)
+            first, last = first_day.toordinal(), last_day.toordinal()
+            begin = next((i for i, block in enumerate(blocks) if block[0] >= first), len(blocks))
+            while begin > 0 and (begin == len(blocks) or not blocks[begin][1]):
+                begin -= 1
+            out = {}
+            running = {column: [] for column in columns}
+            for day, keyframe, count, offsets, padding in blocks[begin:]:
+                if day > last:
+                    break
+                for column in columns:
+                    offset, length = offsets[column]
+                    values = array("i")
+                    values.frombytes(zlib.decompress(buf[offset:offset + length]))
+                    if keyframe:
+                        running[column] = values.tolist()
+                    else:
+                        previous = running[column]
+                        if len(previous) < count:
+                            previous = previous + [padding[column]] * (count - len(previous))
+                        running[column] = list(map(add, previous, values))
+                if day >= first:
+                    out[day] = {column: running[column] for column in columns}
+        return out
+
+    def last_block(self):
+        """(day, block index, absolute values per column) of the newest block, or None."""
+        if not os.path.exists(self.data_path) or not os.path.getsize(self.data_path):
+            return None
+        with open(self.data_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            blocks = self.blocks(buf)
+        day = blocks[-1][0]
+        values = self.read(date.fromordinal(day), date.fromordinal(day), COLUMNS)[day]
+        return day, len(blocks), values
+
+    def append(self, day, snapshot):
+        last = self.last_block()
+        if last and day.toordinal() < last[0]:
+            raise ValueError(f"History already has {date.fromordinal(last[0])}; it only grows forward")
+        new_names = [f"{kind}\t{name}" for kind, name in sorted(snapshot) if f"{kind}\t{name}" not in self.ids]
+        count = len(self.names) + len(new_names)
+        current = {column: [ABSENT] * count for column in COLUMNS}
+        ids = dict(self.ids)
+        for offset, name in enumerate(new_names):
+            ids[name] = len(self.names) + offset
+        for (kind, name), values in snapshot.items():
+            series = ids[f"{kind}\t{name}"]
+            for column in COLUMNS:
+                current[column][series] = values[column]
+        if last:
+            previous = {c: v + [ABSENT] * (count - len(v)) for c, v in last[2].items()}
+            if last[0] == day.toordinal() and previous == current:
+                return False
+        keyframe = not last or last[1] % KEYFRAME_EVERY == 0
+        blobs = []
+        for column in COLUMNS:
+            if keyframe:
+                values = current[column]
+            else:
+                values = [now - before for now, before in zip(current[column], previous[column])]
+            blobs.append(zlib.compress(array("i", values).tobytes(), 6))
+        os.makedirs(self.directory, exist_ok=True)
+        # Names first: a block never refers to a series id that is not on disk.
+        if new_names:
+            with open(self.names_path, "a", encoding="utf-8") as f:
+                f.write("".join(name + "\n" for name in new_names))
+            self.names.extend(new_names)
+            self.ids = ids
+        with open(self.data_path, "ab") as f:
+            f.write(HEADER.pack(MAGIC, day.toordinal(), (FLAG_KEYFRAME if keyframe else 0) | FLAG_ABSENT, count))
+            f.write(LENGTHS.pack(*(len(blob) for blob in blobs)))
+            for blob in blobs:
+                f.write(blob)
+        return True
+
+
+def trend(store, kind, column, first_day, last_day, entity=None):
+    """(iso days, {name: [value per day]}) for every series of a kind over the range.
+
+    A series has None for the days before it existed and the days it was absent.
+    """
+    days = store.read(first_day, last_day, (column,))
+    ordered = sorted(days)
+    width = len(store.names)
+    rows = [days[d][column] + [None] * (width - len(days[d][column])) for d in ordered]
+    by_series = list(zip(*rows)) if rows else [()] * width
+    series = {}
+    for i, name in enumerate(store.names):
+        series_kind, series_name = name.split("\t", 1)
+        if series_kind == kind and (entity is None or series_name == entity):
+            series[series_name] = [None if v == ABSENT else v for v in by_series[i]]
+    return [date.fromordinal(d).isoformat() for d in ordered], series
+
+
+parser = argparse.ArgumentParser(description="Record and query daily per-KR / per-owner score history.")
+parser.add_argument("--store", default=DEFAULT_STORE, help="History directory")
+parser.add_argument("--cube", default=DEFAULT_CUBE, help="rollup_cube state file to snapshot")
+parser.add_argument("--date", help="Record the snapshot as this day (default today)")
+parser.add_argument("--trend", choices=KINDS, help="Print a trend per KR or per owner")
+parser.add_argument("--column", choices=COLUMNS, default="total", help="Trend column")
+parser.add_argument("--days", type=int, default=90, help="Trend length in days")
+parser.add_argument("--entity", help="Only this KR/owner")
+parser.add_argument("--json", action="store_true", help="Print the trend as JSON")
+args = parser.parse_args()
+
+store = Store(args.store)
+
+if args.trend:
+    last_day = date.fromisoformat(args.date) if args.date else datetime.now().date()
+    first_day = last_day - timedelta(days=args.days - 1)
+    started = time.perf_counter()
+    days, series = trend(store, args.trend, args.column, first_day, last_day, args.entity)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if args.json:
+        print(json.dumps({"days": days, "column": args.column, "series": series}, ensure_ascii=False))
+    else:
+        for name, values in sorted(series.items()):
+            values = [v for v in values if v is not None]
+            if not values:
+                continue
+            change = values[-1] - values[0]
+            print(f"- {name}: {values[0]} -> {values[-1]} ({change:+d}) over {len(values)} days, "
+                  f"min {min(values)}, max {max(values)}")
+    print(f"{len(series)} {args.trend} series, {args.column}, {first_day} ~ {last_day} in {elapsed_ms:.1f} ms",
+          file=sys.stderr)
+    sys.exit(0)
+
+if not os.path.exists(args.cube):
+    print(f"Cube state not found: {args.cube}. Run scripts/rollup_cube.py first.")
+    sys.exit(1)
+with open(args.cube, "r", encoding="utf-8") as f:
+    cube = json.load(f)
+day = date.fromisoformat(args.date) if args.date else datetime.now().date()
+snapshot = snapshot_from_cube(cube, day)
+try:
+    written = store.append(day, snapshot)
+except ValueError as exc:
+    print(f"Failed to record history: {exc}")
+    sys.exit(1)
+krs = sum(1 for kind, _ in snapshot if kind == "kr")
+print(f"{'Recorded' if written else 'Unchanged'} {day}: {krs} KRs, {len(snapshot) - krs} owners "
+      f"({os.path.getsize(store.data_path) if os.path.exists(store.data_path) else 0} bytes on disk)")
@@ -0,0 +1,165 @@
+"""Memory-mapped reader for the columnar snapshots written by export_snapshot.py.
+
+File layout (little-endian):
+    8 bytes   magic b"OKRSNAP1"
+    4 bytes   uint32 header length
+    N bytes   JSON header, then zero padding to an 8-byte boundary
+    ...       column blocks; header offsets are relative to the padded start
+
+Column kinds:
+    f64   float64 values, NaN for empty cells
+    ts    int64 millisecond timestamps, TS_NULL for empty cells
+    u8    uint8 (checkbox), 0/1
+    dict  uint32 codes (0 = empty, n = dictionary entry n-1) plus a dictionary
+          stored as uint32 end offsets into a UTF-8 blob
+
+Opening a snapshot only reads the header. Column data is paged in by the OS
+when a column is first touched.
+
+Usage:
+    python3 scripts/snapshot_reader.py generated/snapshots/OKRPlan.okrs --head 5
+"""
+
+import argparse
+import json
+import mmap
+import struct
+import sys
+
+MAGIC = b"OKRSNAP1"
+TS_NULL = -(2**63)
+FORMATS = {"f64": "d", "ts": "q", "u8": "B", "dict": "I"}
+
+
+def _align8(value):
+    return (value + 7) & ~7
+
+
+class DictColumn:
+    def __init__(self, codes, offsets, blob):
+        self.codes = codes
+        self.offsets = offsets
+        self.blob = blob
+        self._cache = {}
+
+    def __len__(self):
+        return len(self.codes)
+
+    def entry(self, code):
+        if code == 0:
+            return None
+        cached = self._cache.get(code)
+        if cached is None:
+            start = self.offsets[code - 2] if code > 1 else 0
+            cached = bytes(self.blob[start:self.offsets[code - 1]]).decode("utf-8")
+            self._cache[code] = cached
+        return cached
+
+    def dictionary(self):
+        return [self.entry(code) for code in range(1, len(self.offsets) + 1)]
+
+    def __getitem__(self, index):
+        return self.entry(self.codes[index])
+
+    def __iter__(self):
+        for code in self.codes:
+            yield self.entry(code)
+
+
+class Snapshot:
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:8] != MAGIC:
+            self.close()
+            raise ValueError(f"Not a snapshot file: {path}")
+        (header_len,) = struct.unpack_from("<I", self._mm, 8)
+        self.header = json.loads(self._mm[12:12 + header_len].decode("utf-8"))
+        self._base = _align8(12 + header_len)
+        self._view = memoryview(self._mm)
+        self._columns = {col["name"]: col for col in self.header["columns"]}
+
+    @property
+    def table(self):
+        return self.header.get("table")
+
+    @property
+    def rows(self):
+        return self.header.get("rows", 0)
+
+    @property
+    def columns(self):
+        return [col["name"] for col in self.header["columns"]]
+
+    def kind(self, name):
+        return self._columns[name]["kind"]
+
+    def _block(self, offset, nbytes, fmt):
+        start = self._base + offset
+        return self._view[start:start + nbytes].cast(fmt)
+
+    def column(self, name):
+        meta = self._columns.get(name)
+        if not meta:
+            raise KeyError(f"Column not found: {name}")
+        kind = meta["kind"]
+        values = self._block(meta["offset"], meta["nbytes"], FORMATS[kind])
+        if kind != "dict":
+            return values
+        offsets = self._block(meta["dict_offsets"], 4 * meta["dict_count"], "I")
+        blob = self._view[self._base + meta["dict_blob"]:self._base + meta["dict_blob"] + meta["dict_nbytes"]]
+        return DictColumn(values, offsets, blob)
+
+    def value(self, name, index):
+        raw = self.column(name)[index]
+        kind = self.kind(name)
+        if kind == "f64" and raw != raw:
+            return None
+        if kind == "ts" and raw == TS_NULL:
+            return None
+        return raw
+
+    def close(self):
+        self._view = None
+        try:
+            self._mm.close()
+        except BufferError:
+            # Column views handed out to the caller still point into the map;
+            # it is unmapped once the last of them is dropped.
+            pass
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_snapshot(path):
+    return Snapshot(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect a columnar snapshot.")
+    parser.add_argument("path")
+    parser.add_argument("--head", type=int, default=0, help="Print the first N rows")
+    parser.add_argument("--columns", default="", help="Comma-separated columns to print")
+    args = parser.parse_args()
+
+    try:
+        snap = open_snapshot(args.path)
+    except (OSError, ValueError) as exc:
+        print(exc)
+        sys.exit(1)
+
+    with snap:
+        print(f"{snap.table}: {snap.rows} rows, exported {snap.header.get('exported_at', '')}")
+        for col in snap.header["columns"]:
+            extra = f", {col['dict_count']} distinct" if col["kind"] == "dict" else ""
+            print(f"- {col['name']} [{col['kind']}{extra}]")
+        names = [c for c in args.columns.split(",") if c] or snap.columns
+        for index in range(min(args.head, snap.rows)):
+            row = {name: snap.value(name, index) for name in names}
+            print(json.dumps(row, ensure_ascii=False))
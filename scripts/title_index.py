@@ -0,0 +1,371 @@
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import time
+import unicodedata
+from bisect import bisect_left
+from difflib import SequenceMatcher
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from snapshot_reader import open_snapshot
+
+api_base = os.environ.get("FEISHU_API_BASE", "https://open.feishu.cn")
+app_id = os.environ.get("FEISHU_APP_ID")
+app_secret = os.environ.get("FEISHU_APP_SECRET")
+app_token = os.environ.get("FEISHU_BASE_APP_TOKEN")
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_INDEX = os.path.join(ROOT_DIR, "generated", "title_index.json")
+DEFAULT_SNAPSHOTS = os.path.join(ROOT_DIR, "generated", "snapshots")
+
+# table -> (title candidates, notes candidates)
+TEXT_FIELDS = {
+    "OKRPlan": (["Actions", "Action_Title", "Action"], ["Action_Notes", "Notes"]),
+    "Evidence": (["Evidence_Title"], ["Notes"]),
+    "Ideas": (["Idea_Title"], ["Notes"]),
+    "FocusBlocks": (["Block_Title"], ["Goal"]),
+}
+CJK_RUN = re.compile(r"[぀-ヿ㐀-䶿一-鿿豈-﫿가-힯]+")
+WORD_RUN = re.compile(r"[a-z0-9]+")
+FUZZY_CANDIDATES = 50
+COMMON_GRAM_SHARE = 0.05
+
+
+def http_json(method, url, data=None, token=None):
+    body = None
+    headers = {"Content-Type": "application/json; charset=utf-8"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if data is not None:
+        body = json.dumps(data).encode("utf-8")
+    req = Request(url, data=body, headers=headers, method=method)
+    try:
+        with urlopen(req) as resp:
+            raw = resp.read().decode("utf-8")
+            return json.loads(raw)
+    except HTTPError as exc:
+        body = exc.read().decode("utf-8")
+        raise RuntimeError(f"HTTP {exc.code}: {body}") from exc
+
+
+def get_tenant_token():
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/auth/v3/tenant_access_token/internal",
+        {"app_id": app_id, "app_secret": app_secret},
+    )
+    token = resp.get("tenant_access_token")
+    if not token:
+        print("Failed to get tenant access token", resp)
+        sys.exit(1)
+    return token
+
+
+def get_tables(token):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables?page_size=100",
+        None,
+        token,
+    )
+    items = resp.get("data", {}).get("items", [])
+    return {item.get("name"): item.get("table_id") for item in items}
+
+
+def iter_records(token, table_id, page_size=500):
+    page_token = ""
+    while True:
+        url = f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records?page_size={page_size}"
+        if page_token:
+            url += f"&page_token={page_token}"
+        resp = http_json("GET", url, None, token)
+        data = resp.get("data") or {}
+        for item in data.get("items") or []:
+            yield item
+        page_token = data.get("page_token")
+        if not data.get("has_more") or not page_token:
+            break
+
+
+def batch_get_records(token, table_id, record_ids):
+    records = []
+    for i in range(0, len(record_ids), 100):
+        resp = http_json(
+            "POST",
+            f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_get",
+            {"record_ids": record_ids[i:i + 100]},
+            token,
+        )
+        records.extend((resp.get("data") or {}).get("records") or [])
+    return records
+
+
+def to_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float, bool)):
+        return str(value)
+    if isinstance(value, list):
+        return "".join(to_text(v) for v in value)
+    if isinstance(value, dict):
+        if value.get("text"):
+            return str(value.get("text"))
+        if value.get("name"):
+            return str(value.get("name"))
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def normalize(text):
+    return " ".join(unicodedata.normalize("NFKC", text or "").lower().split())
+
+
+def grams(text):
+    """CJK runs -> character bigrams (unigram for a lone char); Latin/digit words -> padded trigrams."""
+    text = normalize(text)
+    out = set()
+    for run in CJK_RUN.findall(text):
+        if len(run) == 1:
+            out.add(run)
+        out.update(run[i:i + 2] for i in range(len(run) - 1))
+    for word in WORD_RUN.findall(text):
+        padded = f"^{word}$"
+        out.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return out
+
+
+class TitleIndex:
+    def __init__(self, docs=None):
+        # doc key "Table/record_id" -> [title, notes]
+        self.docs = {}
+        self.postings = {}
+        self.exact = {}
+        self._sorted = None
+        for key, (title, notes) in (docs or {}).items():
+            self.add(key, title, notes)
+
+    def dump(self):
+        return {
+            "docs": self.docs,
+            "postings": {gram: sorted(keys) for gram, keys in self.postings.items()},
+            "exact": {title: sorted(keys) for title, keys in self.exact.items()},
+        }
+
+    @classmethod
+    def restore(cls, data):
+        """Load a dump() without re-tokenizing the documents."""
+        if "postings" not in data:
+            return cls(data.get("docs"))
+        index = cls()
+        index.docs = data["docs"]
+        index.postings = {gram: set(keys) for gram, keys in data["postings"].items()}
+        index.exact = {title: set(keys) for title, keys in data["exact"].items()}
+        return index
+
+    def add(self, key, title, notes):
+        if self.docs.get(key) == [title, notes]:
+            return False
+        self.remove(key)
+        self.docs[key] = [title, notes]
+        for gram in grams(title) | grams(notes):
+            self.postings.setdefault(gram, set()).add(key)
+        self.exact.setdefault(normalize(title), set()).add(key)
+        self._sorted = None
+        return True
+
+    def remove(self, key):
+        entry = self.docs.pop(key, None)
+        if not entry:
+            return False
+        title, notes = entry
+        for gram in grams(title) | grams(notes):
+            keys = self.postings.get(gram)
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del self.postings[gram]
+        keys = self.exact.get(normalize(title))
+        if keys:
+            keys.discard(key)
+            if not keys:
+                del self.exact[normalize(title)]
+        self._sorted = None
+        return True
+
+    def lookup_exact(self, query):
+        return sorted(self.exact.get(normalize(query), ()))
+
+    def lookup_prefix(self, query, limit):
+        if self._sorted is None:
+            self._sorted = sorted(self.exact)
+        prefix = normalize(query)
+        results = []
+        pos = bisect_left(self._sorted, prefix)
+        while pos < len(self._sorted) and self._sorted[pos].startswith(prefix) and len(results) < limit:
+            results.extend(sorted(self.exact[self._sorted[pos]]))
+            pos += 1
+        return results[:limit]
+
+    def lookup_fuzzy(self, query, limit):
+        wanted = grams(query)
+        if not wanted:
+            return []
+        # Rare grams carry the signal; grams present in a large share of the docs
+        # (e.g. "act" in every "action ...") are skipped unless nothing else is left.
+        ceiling = max(COMMON_GRAM_SHARE * len(self.docs), 1)
+        informative = [g for g in wanted if len(self.postings.get(g, ())) <= ceiling] or list(wanted)
+        hits = {}
+        for gram in informative:
+            keys = self.postings.get(gram, ())
+            weight = math.log(1 + len(self.docs) / (1 + len(keys)))
+            for key in keys:
+                hits[key] = hits.get(key, 0) + weight
+        total = sum(math.log(1 + len(self.docs) / (1 + len(self.postings.get(g, ())))) for g in informative)
+        # Rank by weighted share of query grams found, then re-rank the best few by edit similarity.
+        candidates = sorted(hits, key=lambda k: (-hits[k], len(self.docs[k][0])))[:FUZZY_CANDIDATES]
+        target = normalize(query)
+        scored = []
+        for key in candidates:
+            similarity = SequenceMatcher(None, target, normalize(self.docs[key][0])).ratio()
+            scored.append((round(0.5 * hits[key] / total + 0.5 * similarity, 3), key))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return scored[:limit]
+
+
+def first_present(candidates, names):
+    return next((name for name in candidates if name in names), None)
+
+
+def load_index(path):
+    if not os.path.exists(path):
+        return TitleIndex()
+    with open(path, "r", encoding="utf-8") as f:
+        return TitleIndex.restore(json.load(f))
+
+
+def save_index(path, index):
+    # Postings are stored with the documents so a one-off CLI lookup does not re-tokenize everything.
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index.dump(), f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def docs_from_snapshot(path):
+    with open_snapshot(path) as snap:
+        title_candidates, notes_candidates = TEXT_FIELDS.get(snap.table, ([], []))
+        title_field = first_present(title_candidates, snap.columns)
+        notes_field = first_present(notes_candidates, snap.columns)
+        if not title_field:
+            return snap.table, {}
+        ids = list(snap.column("record_id"))
+        titles = list(snap.column(title_field))
+        notes = list(snap.column(notes_field)) if notes_field else [None] * len(ids)
+        return snap.table, {f"{snap.table}/{rid}": [t or "", n or ""] for rid, t, n in zip(ids, titles, notes)}
+
+
+def print_results(index, label, keys):
+    print(f"{label}: {len(keys)}")
+    for item in keys:
+        score, key = item if isinstance(item, tuple) else (None, item)
+        prefix = f"{score:.3f} " if score is not None else ""
+        print(f"  {prefix}{key}  {index.docs[key][0]}")
+
+
+parser = argparse.ArgumentParser(description="CJK-aware n-gram index over Action/Evidence/Idea titles and notes.")
+parser.add_argument("--build", action="store_true", help="Rebuild from a full read of the tables")
+parser.add_argument("--from-snapshot", nargs="?", const=DEFAULT_SNAPSHOTS, help="Rebuild from export_snapshot.py files")
+parser.add_argument("--record-ids", default="", help="Refresh these records (comma-separated)")
+parser.add_argument("--tables", default=",".join(TEXT_FIELDS), help="Comma-separated table names")
+parser.add_argument("--exact", help="Exact title lookup")
+parser.add_argument("--prefix", help="Title prefix lookup")
+parser.add_argument("--fuzzy", help="Fuzzy title/notes lookup")
+parser.add_argument("--limit", type=int, default=10)
+parser.add_argument("--serve", action="store_true", help="Keep the index loaded and answer queries from stdin")
+parser.add_argument("--index", default=DEFAULT_INDEX, help="Local index file")
+args = parser.parse_args()
+
+tables = [t.strip() for t in args.tables.split(",") if t.strip()]
+started = time.monotonic()
+if args.from_snapshot:
+    docs = {}
+    for name in tables:
+        path = os.path.join(args.from_snapshot, f"{name}.okrs")
+        if not os.path.exists(path):
+            print(f"Snapshot not found: {path}")
+            continue
+        _, table_docs = docs_from_snapshot(path)
+        docs.update(table_docs)
+        print(f"{name}: {len(table_docs)} titles from snapshot")
+    index = TitleIndex(docs)
+else:
+    index = load_index(args.index)
+print(f"Index ready: {len(index.docs)} docs, {len(index.postings)} grams in {time.monotonic() - started:.2f}s")
+
+only_ids = [rid.strip() for rid in args.record_ids.split(",") if rid.strip()]
+if args.build or only_ids:
+    # Lookups are local; only a sync from the Base needs credentials.
+    if not (app_id and app_secret and app_token):
+        print("Missing env vars: FEISHU_APP_ID/FEISHU_APP_SECRET/FEISHU_BASE_APP_TOKEN")
+        sys.exit(1)
+    TOKEN = get_tenant_token()
+    TABLES = get_tables(TOKEN)
+    changed = removed = 0
+    for name in tables:
+        table_id = TABLES.get(name)
+        if not table_id or name not in TEXT_FIELDS:
+            continue
+        title_candidates, notes_candidates = TEXT_FIELDS[name]
+        records = batch_get_records(TOKEN, table_id, only_ids) if only_ids else iter_records(TOKEN, table_id)
+        seen = set()
+        for record in records:
+            values = record.get("fields") or {}
+            title_field = first_present(title_candidates, values)
+            notes_field = first_present(notes_candidates, values)
+            key = f"{name}/{record.get('record_id')}"
+            seen.add(key)
+            title = to_text(values.get(title_field)) if title_field else ""
+            notes = to_text(values.get(notes_field)) if notes_field else ""
+            changed += index.add(key, title, notes)
+        stale = [f"{name}/{rid}" for rid in only_ids] if only_ids else [k for k in index.docs if k.startswith(f"{name}/")]
+        for key in stale:
+            if key not in seen:
+                removed += index.remove(key)
+    print(f"Refreshed: {changed} docs changed, {removed} removed")
+
+if args.build or only_ids or args.from_snapshot:
+    save_index(args.index, index)
+    print(f"Title index saved to {args.index}")
+
+
+def run_query(label, query):
+    started = time.monotonic()
+    if label == "exact":
+        results = index.lookup_exact(query)
+    elif label == "prefix":
+        results = index.lookup_prefix(query, args.limit)
+    else:
+        results = index.lookup_fuzzy(query, args.limit)
+    print_results(index, f"{label} {query!r} ({(time.monotonic() - started) * 1000:.1f} ms)", results)
+
+
+for label, query in (("exact", args.exact), ("prefix", args.prefix), ("fuzzy", args.fuzzy)):
+    if query:
+        run_query(label, query)
+
+if args.serve:
+    print("Serving queries; one per line as exact:<q>, prefix:<q> or fuzzy:<q> (default fuzzy).", flush=True)
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        label, _, query = line.partition(":") if line.split(":", 1)[0] in ("exact", "prefix", "fuzzy") else ("fuzzy", "", line)
+        run_query(label, query)
+        sys.stdout.flush()
@@ -0,0 +1,333 @@
+import argparse
+import json
+import os
+import sys
+from datetime import date, datetime, timedelta
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+api_base = os.environ.get("FEISHU_API_BASE", "https://open.feishu.cn")
+app_id = os.environ.get("FEISHU_APP_ID")
+app_secret = os.environ.get("FEISHU_APP_SECRET")
+app_token = os.environ.get("FEISHU_BASE_APP_TOKEN")
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_INDEX = os.path.join(ROOT_DIR, "generated", "week_buckets.json")
+BATCH_SIZE = 500
+
+# (start candidates, end candidates); the bucket anchor is end, else start, like Plan_Week.
+DATE_FIELDS = {
+    "OKRPlan": (
+        ["预期开始", "Action_Plan_Start", "Plan_Start", "Plan_Date"],
+        ["预期结束", "Action_Plan_End", "Plan_End", "Plan_Date"],
+    ),
+    "Actions": (["Plan_Start", "Plan_Date"], ["Plan_End", "Plan_Date"]),
+    "Evidence": (["Date"], ["Date"]),
+}
+BUCKET_FIELDS = {"week": "Bucket_Week", "month": "Bucket_Month", "quarter": "Bucket_Quarter"}
+
+
+def http_json(method, url, data=None, token=None):
+    body = None
+    headers = {"Content-Type": "application/json; charset=utf-8"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if data is not None:
+        body = json.dumps(data).encode("utf-8")
+    req = Request(url, data=body, headers=headers, method=method)
+    try:
+        with urlopen(req) as resp:
+            raw = resp.read().decode("utf-8")
+            return json.loads(raw)
+    except HTTPError as exc:
+        body = exc.read().decode("utf-8")
+        raise RuntimeError(f"HTTP {exc.code}: {body}") from exc
+
+
+def get_tenant_token():
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/auth/v3/tenant_access_token/internal",
+        {"app_id": app_id, "app_secret": app_secret},
+    )
+    token = resp.get("tenant_access_token")
+    if not token:
+        print("Failed to get tenant access token", resp)
+        sys.exit(1)
+    return token
+
+
+def get_tables(token):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables?page_size=100",
+        None,
+        token,
+    )
+    items = resp.get("data", {}).get("items", [])
+    return {item.get("name"): item.get("table_id") for item in items}
+
+
+def get_fields(token, table_id):
+    resp = http_json(
+        "GET",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/fields?page_size=200",
+        None,
+        token,
+    )
+    return resp.get("data", {}).get("items", [])
+
+
+def create_field(token, table_id, field_config):
+    resp = http_json(
+        "POST",
+        f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/fields",
+        field_config,
+        token,
+    )
+    if resp.get("code") not in (0, None):
+        print(f"Failed to create field {field_config['field_name']}: {resp}")
+        return False
+    return True
+
+
+def iter_records(token, table_id, page_size=500):
+    page_token = ""
+    while True:
+        url = f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records?page_size={page_size}"
+        if page_token:
+            url += f"&page_token={page_token}"
+        resp = http_json("GET", url, None, token)
+        data = resp.get("data") or {}
+        for item in data.get("items") or []:
+            yield item
+        page_token = data.get("page_token")
+        if not data.get("has_more") or not page_token:
+            break
+
+
+def batch_get_records(token, table_id, record_ids):
+    records = []
+    for i in range(0, len(record_ids), 100):
+        resp = http_json(
+            "POST",
+            f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_get",
+            {"record_ids": record_ids[i:i + 100]},
+            token,
+        )
+        records.extend((resp.get("data") or {}).get("records") or [])
+    return records
+
+
+def batch_update_records(token, table_id, records):
+    """Return the ids of the records whose batch was accepted."""
+    updated = set()
+    for i in range(0, len(records), BATCH_SIZE):
+        chunk = records[i:i + BATCH_SIZE]
+        resp = http_json(
+            "POST",
+            f"{api_base}/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_update",
+            {"records": chunk},
+            token,
+        )
+        if resp.get("code") not in (0, None):
+            print(f"Failed to update {len(chunk)} records: {resp}")
+            continue
+        updated.update(record["record_id"] for record in chunk)
+    return updated
+
+
+def to_day(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return datetime.fromtimestamp(value / 1000).date()
+
+
+def week_key(day):
+    # Same numbering as WEEKNUM(date, 2): weeks start on Monday, week 1 holds Jan 1.
+    jan1 = date(day.year, 1, 1)
+    number = (day.timetuple().tm_yday - 1 + jan1.weekday()) // 7 + 1
+    return f"{day.year}-W{number:02d}"
+
+
+def month_key(day):
+    return f"{day.year}-{day.month:02d}"
+
+
+def quarter_key(day):
+    return f"{day.year}-Q{(day.month - 1) // 3 + 1}"
+
+
+def compute_buckets(start_ms, end_ms):
+    start = to_day(start_ms)
+    end = to_day(end_ms)
+    anchor = end or start
+    if not anchor:
+        return None
+    first = start or anchor
+    last = max(end or first, first)
+    weeks = []
+    cursor = first - timedelta(days=first.weekday())
+    while cursor <= last:
+        span_start, span_end = max(cursor, first), min(cursor + timedelta(days=6), last)
+        days = [span_start]
+        if span_end.year != span_start.year:
+            # WEEKNUM restarts at W01 on Jan 1, so a week straddling New Year is two buckets.
+            days.append(date(span_end.year, 1, 1))
+        for day in days:
+            key = week_key(day)
+            if key not in weeks:
+                weeks.append(key)
+        cursor += timedelta(days=7)
+    return {
+        "week": week_key(anchor),
+        "month": month_key(anchor),
+        "quarter": quarter_key(anchor),
+        "weeks": weeks,
+    }
+
+
+def load_index(path):
+    if not os.path.exists(path):
+        return {"tables": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_index(path, index):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def bucket_keys(entry):
+    keys = {f"week:{w}" for w in entry["weeks"]}
+    keys.add(f"month:{entry['month']}")
+    keys.add(f"quarter:{entry['quarter']}")
+    return keys
+
+
+def unlink(table_index, record_id):
+    entry = table_index["records"].pop(record_id, None)
+    if not entry or not entry.get("buckets"):
+        return
+    for key in bucket_keys(entry["buckets"]):
+        ids = table_index["by_bucket"].get(key)
+        if ids and record_id in ids:
+            ids.remove(record_id)
+            if not ids:
+                del table_index["by_bucket"][key]
+
+
+def link(table_index, record_id, entry):
+    table_index["records"][record_id] = entry
+    if not entry.get("buckets"):
+        return
+    for key in bucket_keys(entry["buckets"]):
+        table_index["by_bucket"].setdefault(key, []).append(record_id)
+
+
+def lookup(index, bucket):
+    kind = "quarter" if "-Q" in bucket else "week" if "-W" in bucket else "month"
+    key = f"{kind}:{bucket}"
+    for table_name, table_index in index["tables"].items():
+        ids = table_index["by_bucket"].get(key, [])
+        print(f"{table_name} {bucket}: {len(ids)} records")
+        for record_id in ids:
+            print(f"- {record_id}")
+
+
+parser = argparse.ArgumentParser(description="Maintain a week/month/quarter bucket index for Actions and Evidence.")
+parser.add_argument("--tables", default="OKRPlan,Evidence", help="Comma-separated table names")
+parser.add_argument("--record-ids", default="", help="Only refresh these records (comma-separated)")
+parser.add_argument("--write-back", action="store_true", help="Write buckets to plain text fields")
+parser.add_argument("--index", default=DEFAULT_INDEX, help="Local index file")
+parser.add_argument("--lookup", help="Print records in a bucket, e.g. 2026-W03, 2026-01 or 2026-Q1")
+args = parser.parse_args()
+
+index = load_index(args.index)
+if args.lookup:
+    lookup(index, args.lookup)
+    sys.exit(0)
+
+# --lookup above only reads the local index; refreshing needs credentials.
+if not (app_id and app_secret and app_token):
+    print("Missing env vars: FEISHU_APP_ID/FEISHU_APP_SECRET/FEISHU_BASE_APP_TOKEN")
+    sys.exit(1)
+
+TOKEN = get_tenant_token()
+TABLES = get_tables(TOKEN)
+only_ids = [rid.strip() for rid in args.record_ids.split(",") if rid.strip()]
+
+for table_name in [t.strip() for t in args.tables.split(",") if t.strip()]:
+    table_id = TABLES.get(table_name)
+    if not table_id or table_name not in DATE_FIELDS:
+        print(f"Table not found or not indexable: {table_name}")
+        continue
+    fields = get_fields(TOKEN, table_id)
+    field_names = {f.get("field_name") for f in fields}
+    start_candidates, end_candidates = DATE_FIELDS[table_name]
+    start_field = next((n for n in start_candidates if n in field_names), None)
+    end_field = next((n for n in end_candidates if n in field_names), None)
+    if not (start_field or end_field):
+        print(f"{table_name}: no date fields found")
+        continue
+
+    if args.write_back:
+        for field_name in BUCKET_FIELDS.values():
+            if field_name not in field_names:
+                print(f"Creating {table_name}.{field_name}")
+                create_field(TOKEN, table_id, {"field_name": field_name, "type": 1})
+
+    table_index = index["tables"].setdefault(table_name, {"records": {}, "by_bucket": {}})
+    if table_index.get("table_id") not in (None, table_id):
+        table_index = {"records": {}, "by_bucket": {}}
+        index["tables"][table_name] = table_index
+    table_index["table_id"] = table_id
+
+    records = batch_get_records(TOKEN, table_id, only_ids) if only_ids else iter_records(TOKEN, table_id)
+    seen = set()
+    changed = []
+    for record in records:
+        record_id = record.get("record_id")
+        seen.add(record_id)
+        values = record.get("fields") or {}
+        start_ms = values.get(start_field) if start_field else None
+        end_ms = values.get(end_field) if end_field else None
+        signature = [start_ms, end_ms]
+        previous = table_index["records"].get(record_id)
+        if previous and previous["sig"] == signature:
+            if args.write_back and not previous.get("written"):
+                changed.append(record_id)
+            continue
+        unlink(table_index, record_id)
+        link(table_index, record_id, {"sig": signature, "buckets": compute_buckets(start_ms, end_ms)})
+        changed.append(record_id)
+
+    removed = []
+    if not only_ids:
+        removed = [rid for rid in table_index["records"] if rid not in seen]
+        for record_id in removed:
+            unlink(table_index, record_id)
+
+    if args.write_back and changed:
+        updates = []
+        for record_id in changed:
+            buckets = table_index["records"][record_id]["buckets"] or {}
+            updates.append(
+                {
+                    "record_id": record_id,
+                    "fields": {name: buckets.get(kind, "") for kind, name in BUCKET_FIELDS.items()},
+                }
+            )
+        # Failed batches stay unwritten and are retried on the next run.
+        for record_id in batch_update_records(TOKEN, table_id, updates):
+            table_index["records"][record_id]["written"] = True
+
+    print(f"{table_name}: {len(seen)} scanned, {len(changed)} re-bucketed, {len(removed)} removed")
+
+index["updated_at"] = datetime.now().isoformat(timespec="seconds")
+save_index(args.index, index)
+print(f"Week bucket index saved to {args.index}")